@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import stories, audio, qr, upload
+from app.api.v1.endpoints import stories, audio, qr, upload, media, admin
 
 api_router = APIRouter()
 
@@ -7,3 +7,5 @@ api_router.include_router(stories.router, prefix="/stories", tags=["stories"])
 api_router.include_router(audio.router, prefix="/audio", tags=["audio"])
 api_router.include_router(qr.router, prefix="/qr", tags=["qr"])
 api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
+api_router.include_router(media.router, prefix="/media", tags=["media"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,80 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import Optional
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import profile_store
+from app.services.search_index import search_index
+
+def require_admin(x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")) -> None:
+    """Exigir la cabecera X-Admin-Token (endpoints desactivados si ADMIN_TOKEN está vacío)"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not found"
+        )
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    Listar los perfiles de peticiones guardados (más recientes primero)
+
+    Se generan con PROFILING_ENABLED=true; ver app/core/profiling.py.
+    """
+    return {
+        "enabled": settings.PROFILING_ENABLED,
+        "sample_rate": settings.PROFILING_SAMPLE_RATE,
+        "slow_threshold_ms": settings.PROFILING_SLOW_THRESHOLD_MS,
+        "profiles": profile_store.list()
+    }
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """Descargar un perfil (JSON de speedscope: abrir en https://www.speedscope.app)"""
+    path = profile_store.get_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="application/json", filename=name)
+
+@router.get("/loop")
+async def event_loop_stalls():
+    """
+    Bloqueos recientes del event loop con la pila capturada durante el
+    bloqueo y la ruta o tarea a la que se atribuyen
+    """
+    return loop_monitor.report()
+
+@router.get("/search")
+async def search_index_stats():
+    """Estado del índice de búsqueda de texto completo"""
+    return search_index.stats()
+
+@router.post("/search/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_search_index():
+    """
+    Reconstruir el índice de búsqueda desde Firestore en segundo plano
+
+    Las búsquedas siguen usando el índice actual hasta que termina.
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Search is disabled"
+        )
+    if not search_index.start_rebuild():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Search index rebuild already in progress"
+        )
+    return {"message": "Search index rebuild started"}
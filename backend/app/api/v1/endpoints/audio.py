@@ -3,9 +3,15 @@ from app.schemas.groq import AudioProcessRequest, AudioProcessResponse, AudioPro
 from app.services.groq_service import groq_service
 from app.services.firebase_service import firebase_service
 from app.services.qr_generator import qr_generator
+from app.services.local_storage import local_storage
+from app.services.storage_backend import storage_backend
+from app.services.transcoder import audio_transcoder
+from app.services.search_index import search_index
 from app.schemas.story import StoryStatus
 from app.core.config import settings
+from app.core.metrics import registry
 import uuid
+from collections import Counter
 from typing import Dict
 from datetime import datetime
 
@@ -14,15 +20,23 @@ router = APIRouter()
 # In-memory job storage (en producción usar Redis o Firestore)
 processing_jobs: Dict[str, AudioProcessStatus] = {}
 
+registry.gauge(
+    "audio_processing_jobs", "Trabajos de procesamiento de audio por estado", ("status",),
+    callback=lambda: {(status,): count for status, count in Counter(
+        job.status for job in list(processing_jobs.values())
+    ).items()}
+)
+
 async def process_audio_background(job_id: str, story_id: str, audio_url: str, language: str = "ay"):
     """
     Procesar audio en background
 
-    1. Transcribir con Groq
-    2. Analizar contenido
-    3. Actualizar Firestore
-    4. Generar QR
-    5. Cambiar status a published
+    1. Generar versiones compactas del audio
+    2. Transcribir con Groq
+    3. Analizar contenido
+    4. Actualizar Firestore
+    5. Generar QR
+    6. Cambiar status a published (e indexar para la búsqueda)
     """
     try:
         # Actualizar status a processing
@@ -42,13 +56,33 @@ async def process_audio_background(job_id: str, story_id: str, audio_url: str, l
 
         print(f"Audio URL convertida: {audio_url} -> {full_audio_url}")
 
-        # Paso 1: Pipeline completo de Groq (transcripción + análisis)
+        # Paso 1: Versiones compactas (si el audio está en almacenamiento local)
+        transcription_audio_url = full_audio_url
+        # Audio en el backend remoto: el bucket puede ser privado, Groq lo baja con URL firmada
+        audio_key = storage_backend.key_from_url(full_audio_url)
+        if audio_key:
+            transcription_audio_url = storage_backend.download_url(audio_key)
+        audio_filename = local_storage.audio_filename_from_url(audio_url)
+        if audio_filename:
+            try:
+                renditions = await audio_transcoder.create_renditions(audio_filename)
+                if renditions:
+                    await firebase_service.update_story(story_id, {
+                        'audioCompactUrl': renditions['compact']['url'],
+                        'audioTranscriptionUrl': renditions['transcription']['url']
+                    })
+                    transcription_audio_url = f"{settings.BASE_URL}{renditions['transcription']['url']}"
+            except Exception as e:
+                # Sin versiones compactas se sigue con el audio original
+                print(f"Transcodificación omitida: {e}")
+
+        # Paso 2: Pipeline completo de Groq (transcripción + análisis)
         processing_jobs[job_id].progress = 30
-        groq_result = await groq_service.full_pipeline(full_audio_url, language)
+        groq_result = await groq_service.full_pipeline(transcription_audio_url, language)
 
         processing_jobs[job_id].progress = 60
 
-        # Paso 2: Actualizar story en Firestore
+        # Paso 3: Actualizar story en Firestore
         update_data = {
             'transcription': groq_result['transcription'],
             'keywords': groq_result['keywords'],
@@ -63,8 +97,10 @@ async def process_audio_background(job_id: str, story_id: str, audio_url: str, l
         await firebase_service.update_story(story_id, update_data)
         processing_jobs[job_id].progress = 80
 
-        # Paso 3: Generar QR code
+        # Paso 4: Generar QR code
         story = await firebase_service.get_story(story_id)
+        # Ya publicado: indexarlo para la búsqueda de texto completo
+        search_index.update(story_id, story)
         qr_url = await qr_generator.generate_qr_code(story_id)
 
         # Generar también versión imprimible
@@ -78,7 +114,8 @@ async def process_audio_background(job_id: str, story_id: str, audio_url: str, l
         # Actualizar con URLs de QR
         await firebase_service.update_story(story_id, {
             'qrCodeUrl': qr_url,
-            'printableQrUrl': printable_qr_url
+            'printableQrUrl': printable_qr_url,
+            'qrEncodedUrl': qr_generator.story_url(story_id)
         })
 
         processing_jobs[job_id].progress = 100
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from app.core.responses import MediaFileResponse, audio_file_response
+from app.services.local_storage import local_storage
+from app.services.waveform import waveform_service
+import re
+
+router = APIRouter()
+
+BLOB_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,5})$")
+
+@router.api_route("/audio/{filename}", methods=["GET", "HEAD"])
+async def stream_audio(filename: str, request: Request):
+    """
+    Servir un audio con soporte de Range (206) y GET condicional
+
+    Pensado para el reproductor: saltar dentro del audio solo descarga
+    los bytes pedidos y una reproducción repetida cuesta un 304.
+    """
+    try:
+        file_path = local_storage.get_audio_path(filename)
+        stat_result = file_path.stat()
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found"
+        )
+
+    return audio_file_response(str(file_path), stat_result, request.headers)
+
+@router.api_route("/blobs/{name}", methods=["GET", "HEAD"])
+async def stream_audio_blob(name: str, request: Request):
+    """
+    Servir un audio por su hash de contenido (cache inmutable)
+    """
+    match = BLOB_NAME_RE.match(name)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio blob not found"
+        )
+
+    digest, suffix = match.groups()
+    file_path = local_storage.get_blob_path(digest, suffix)
+    try:
+        stat_result = file_path.stat()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio blob not found"
+        )
+
+    return audio_file_response(str(file_path), stat_result, request.headers, content_hash=digest)
+
+@router.get("/peaks/{filename}")
+async def get_waveform_peaks(filename: str, request: Request):
+    """
+    Obtener los picos precalculados de la forma de onda de un audio
+
+    Formato binario compacto (ver app/services/waveform.py). Si el audio
+    es anterior a esta función los picos se generan en la primera
+    petición.
+    """
+    try:
+        audio_exists = local_storage.get_audio_path(filename).exists()
+    except ValueError:
+        audio_exists = False
+    if not audio_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found"
+        )
+
+    peaks_path = waveform_service.get_peaks_path(filename)
+    if not peaks_path.exists():
+        peaks_path = await waveform_service.generate(filename)
+        if peaks_path is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate waveform peaks"
+            )
+
+    return MediaFileResponse(
+        str(peaks_path),
+        peaks_path.stat(),
+        request.headers,
+        media_type="application/octet-stream"
+    )
@@ -1,18 +1,142 @@
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from app.core.config import settings
+from app.core.responses import DEFAULT_CACHE_CONTROL, etag_matches
+from app.schemas.qr import QRSheetRequest
 from app.services.qr_generator import qr_generator
 from app.services.firebase_service import firebase_service
+from app.services.qr_cache import StoryNotFoundError, qr_image_cache, snap_size
+from app.services.qr_render import QR_FORMATS, QR_MEDIA_TYPES
+from app.services.qr_sheets import stream_sheet_pdf
 
 router = APIRouter()
 
+# Campos necesarios para componer una tarjeta (proyección)
+SHEET_FIELDS = ['title', 'narrator', 'status']
+
+@router.post("/sheets")
+async def create_qr_sheets(request: QRSheetRequest):
+    """
+    Generar un PDF con las tarjetas QR imprimibles de varios relatos
+
+    Lee los relatos en una sola consulta (comunidad) o lectura batch
+    (story_ids), compone las páginas en el pool de procesos y las envía
+    en streaming a medida que están listas, sin PNG intermedios.
+    """
+    try:
+        if request.story_ids:
+            if len(request.story_ids) > settings.QR_SHEET_MAX_STORIES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Too many stories. Maximum: {settings.QR_SHEET_MAX_STORIES}"
+                )
+            stories = await firebase_service.get_stories(request.story_ids, fields=SHEET_FIELDS)
+            stories = [story for story in stories if story.get('status') != 'archived']
+        else:
+            stories = await firebase_service.list_stories_by_community(
+                request.community, fields=SHEET_FIELDS
+            )
+            stories.sort(key=lambda story: story.get('title') or '')
+
+        if not stories:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No stories found"
+            )
+        if len(stories) > settings.QR_SHEET_MAX_STORIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many stories. Maximum: {settings.QR_SHEET_MAX_STORIES}"
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to load stories: {str(e)}"
+        )
+
+    cards = []
+    for story in stories:
+        narrator = story.get('narrator') or {}
+        cards.append((
+            f"{settings.BASE_URL}/story/{story['id']}",
+            story.get('title') or 'Untitled Story',
+            narrator.get('name', 'Anónimo'),
+            narrator.get('community', '')
+        ))
+
+    return StreamingResponse(
+        stream_sheet_pdf(
+            cards,
+            per_page=request.per_page,
+            page_size=request.page_size,
+            max_in_flight=settings.QR_SHEET_MAX_PAGES_IN_FLIGHT
+        ),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="qr_sheets.pdf"'}
+    )
+
+@router.get("/{story_id}/image")
+async def get_qr_image(request: Request, story_id: str, size: int = 512, format: str = "png"):
+    """
+    Imagen QR servida directamente (sin redirección)
+
+    Se renderiza la primera vez que se pide cada (relato, tamaño, formato),
+    tras comprobar que el relato existe, y luego se sirve desde caché con
+    ETag fuerte sin leer Firestore. El tamaño se redondea
+    al siguiente de QR_IMAGE_SIZES.
+    """
+    if format not in QR_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Allowed: {', '.join(QR_FORMATS)}"
+        )
+    if not settings.QR_MIN_SIZE <= size <= settings.QR_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid size. Allowed: {settings.QR_MIN_SIZE}-{settings.QR_MAX_SIZE}"
+        )
+
+    try:
+        content, etag = await qr_image_cache.get(story_id, snap_size(size), format)
+    except StoryNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Story not found"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate QR code: {str(e)}"
+        )
+
+    headers = {"etag": etag, "cache-control": DEFAULT_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=content, media_type=QR_MEDIA_TYPES[format], headers=headers)
+
 @router.get("/{story_id}")
-async def get_qr_code(story_id: str, size: int = 512):
+async def get_qr_code(story_id: str, size: int = 512, format: str = "png"):
     """
     Generar o obtener código QR para un relato
 
     Si ya existe, retorna la URL existente.
-    Si no existe, lo genera y lo sube a Firebase Storage.
+    Si no existe, lo genera (png, svg o pdf) y lo guarda en el almacenamiento.
     """
+    if format not in QR_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Allowed: {', '.join(QR_FORMATS)}"
+        )
+
     try:
         # Verificar que el story existe
         story = await firebase_service.get_story(story_id)
@@ -29,6 +153,7 @@ async def get_qr_code(story_id: str, size: int = 512):
         # Generar nuevo QR
         qr_url = await qr_generator.generate_qr_code(
             story_id=story_id,
+            format=format,
             size=size
         )
 
@@ -120,7 +245,8 @@ async def regenerate_qr(story_id: str):
         # Actualizar story
         await firebase_service.update_story(story_id, {
             'qrCodeUrl': qr_url,
-            'printableQrUrl': printable_qr_url
+            'printableQrUrl': printable_qr_url,
+            'qrEncodedUrl': qr_generator.story_url(story_id)
         })
 
         return {
@@ -9,10 +9,17 @@ from app.schemas.story import (
     StoryStatus
 )
 from app.services.firebase_service import firebase_service
+from app.services.local_storage import local_storage
+from app.services.audio_probe import AudioProbeError, probe_audio_file
+from app.services.search_index import search_index
+from app.core.config import settings
 from datetime import datetime
 
 router = APIRouter()
 
+# Campos leídos para cada resultado de búsqueda (transcription solo para resaltar)
+SEARCH_RESULT_FIELDS = ['title', 'description', 'keywords', 'category', 'narrator', 'transcription', 'status']
+
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_story(story_data: StoryCreate):
     """
@@ -25,6 +32,27 @@ async def create_story(story_data: StoryCreate):
         # Convertir a dict
         story_dict = story_data.model_dump()
 
+        # La duración del cliente no es confiable: leerla del archivo
+        audio_filename = local_storage.audio_filename_from_url(story_data.audioUrl)
+        if audio_filename:
+            audio_path = local_storage.get_audio_path(audio_filename)
+            if audio_path.exists():
+                try:
+                    metadata = probe_audio_file(str(audio_path))
+                except AudioProbeError as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Invalid audio file: {str(e)}"
+                    )
+                if metadata.duration is not None:
+                    if metadata.duration > settings.MAX_AUDIO_DURATION_MINUTES * 60:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Audio too long. Max duration: {settings.MAX_AUDIO_DURATION_MINUTES} minutes"
+                        )
+                    story_dict['audioDuration'] = round(metadata.duration)
+                story_dict['audioSize'] = audio_path.stat().st_size
+
         # Agregar campos adicionales
         story_dict['status'] = StoryStatus.DRAFT.value
         story_dict['views'] = 0
@@ -49,12 +77,82 @@ async def create_story(story_data: StoryCreate):
             "publicUrl": public_url
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create story: {str(e)}"
         )
 
+@router.get("/search")
+async def search_stories(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar"),
+    page: int = Query(1, ge=1, description="Número de página"),
+    page_size: int = Query(20, ge=1, le=50, description="Tamaño de página")
+):
+    """
+    Búsqueda de texto completo en relatos publicados
+
+    Busca en título, palabras clave, descripción y transcripciones con
+    ranking BM25. Ignora tildes y variantes del apóstrofo, y quita los
+    sufijos aymaras frecuentes (achachilanakaxa encuentra achachila).
+    Cada resultado incluye fragmentos con las coincidencias entre <mark>.
+    """
+    try:
+        if not settings.SEARCH_INDEX_ENABLED:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Search is disabled"
+            )
+        if not search_index.ready:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Search index is being built, try again shortly"
+            )
+
+        total, ranked, terms = search_index.search(q, (page - 1) * page_size, page_size)
+
+        stories = await firebase_service.get_stories(
+            [story_id for story_id, _ in ranked], fields=SEARCH_RESULT_FIELDS
+        ) if ranked else []
+        stories_by_id = {story['id']: story for story in stories}
+
+        results = []
+        for story_id, score in ranked:
+            story = stories_by_id.get(story_id)
+            # El índice puede ir por detrás de Firestore: descartar y corregir
+            if story is None or story.get('status') != StoryStatus.PUBLISHED.value:
+                search_index.remove(story_id)
+                continue
+            results.append({
+                "id": story_id,
+                "score": round(score, 4),
+                "title": story.get('title'),
+                "description": story.get('description'),
+                "keywords": story.get('keywords', []),
+                "category": story.get('category'),
+                "narrator": story.get('narrator'),
+                "highlights": search_index.highlights(story, terms)
+            })
+
+        return {
+            "query": q,
+            "results": results,
+            "total": total,
+            "page": page,
+            "pageSize": page_size,
+            "hasMore": page * page_size < total
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search stories: {str(e)}"
+        )
+
 @router.get("/{story_id}", response_model=Story)
 async def get_story(story_id: str):
     """
@@ -185,6 +283,8 @@ async def update_story(story_id: str, update_data: StoryUpdate):
                 detail="Failed to update story"
             )
 
+        search_index.update(story_id, {**story, **update_dict})
+
         return {
             "id": story_id,
             "message": "Story updated successfully"
@@ -221,6 +321,8 @@ async def delete_story(story_id: str):
                 detail="Failed to delete story"
             )
 
+        search_index.remove(story_id)
+
         return {
             "id": story_id,
             "message": "Story archived successfully"
@@ -1,19 +1,109 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
-from app.services.local_storage import local_storage
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, HTTPException, Request, Response, Header, status
+from app.services.local_storage import (
+    local_storage,
+    UploadNotFoundError,
+    UploadOffsetMismatchError,
+    UploadChecksumMismatchError,
+    UploadTooLargeError
+)
 from app.services.firebase_service import firebase_service
-from datetime import datetime
+from app.services.storage_backend import storage_backend, ObjectReader, StorageBackendError
+from app.schemas.upload import PresignedUploadRequest, PresignedUploadComplete
+from app.core.responses import AUDIO_MEDIA_TYPES
+from app.services.waveform import waveform_service
+from app.services.audio_probe import AudioMetadata, AudioProbeError, probe_audio, sniff_container
+from app.core.config import settings
+from app.core.metrics import record_upload
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from email.utils import format_datetime
+import asyncio
+import base64
+import time
+import weakref
 
 router = APIRouter()
 
+TUS_VERSION = "1.0.0"
+# Código no estándar definido por la extensión checksum de tus
+HTTP_460_CHECKSUM_MISMATCH = 460
+
+# Un solo PATCH concurrente por subida; el candado desaparece cuando
+# ningún PATCH lo usa (las subidas abandonadas no dejan entradas)
+upload_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Bytes necesarios para reconocer el contenedor (sniff_container)
+SNIFF_SIZE = 16
+
+def _check_audio_duration(metadata: AudioMetadata, allow_unknown: bool = False) -> None:
+    """
+    Rechazar audios que exceden MAX_AUDIO_DURATION_MINUTES
+
+    Sin duración conocida no se puede aplicar el límite: se rechaza,
+    salvo en subidas parciales (allow_unknown) que se revalidan completas.
+    """
+    if metadata.duration is None:
+        if allow_unknown:
+            return
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Invalid or unsupported audio file: Could not determine audio duration"
+        )
+    max_seconds = settings.MAX_AUDIO_DURATION_MINUTES * 60
+    if metadata.duration > max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Audio too long. Max duration: {settings.MAX_AUDIO_DURATION_MINUTES} minutes"
+        )
+
+def probe_and_validate_audio(file_obj, file_size: int) -> AudioMetadata:
+    """
+    Leer la cabecera del audio y validar formato y duración
+
+    Solo se leen los primeros y últimos KB, sin decodificar el audio; si
+    ahí no está la duración se sigue leyendo (el tamaño ya está acotado
+    por MAX_AUDIO_SIZE_MB).
+    """
+    try:
+        metadata = probe_audio(file_obj, file_size, full_scan=True)
+    except AudioProbeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Invalid or unsupported audio file: {str(e)}"
+        )
+    _check_audio_duration(metadata)
+    return metadata
+
+async def _iter_upload_file(file: UploadFile, chunk_size: int = 1024 * 1024):
+    """Leer el archivo temporal de la subida por bloques"""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def _stored_audio_result(filename: str, stored: Dict, content_type: Optional[str]) -> Dict:
+    """Resultado de una subida guardada en el backend de almacenamiento"""
+    return {
+        "filename": filename,
+        "key": stored["key"],
+        "url": stored["url"],
+        "size": stored["size"],
+        "content_type": content_type or "audio/webm"
+    }
+
 @router.post("/audio", status_code=status.HTTP_201_CREATED)
 async def upload_audio(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     story_id: str = Form(None)
 ):
     """
-    Subir archivo de audio al almacenamiento local del servidor
+    Subir archivo de audio al backend de almacenamiento
 
-    Alternativa gratuita a Firebase Storage
+    Con el backend local se guarda en storage/ (con deduplicación por
+    contenido); con uno remoto el archivo temporal de la subida se envía
+    por partes en paralelo y no queda copia en el servidor.
     """
     try:
         # Validar tipo de archivo
@@ -23,8 +113,8 @@ async def upload_audio(
                 detail="File must be an audio file"
             )
 
-        # Validar tamaño (max 50MB)
-        max_size = 50 * 1024 * 1024  # 50MB
+        # Validar tamaño
+        max_size = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
         file.file.seek(0, 2)  # Ir al final
         file_size = file.file.tell()
         file.file.seek(0)  # Volver al inicio
@@ -32,11 +122,29 @@ async def upload_audio(
         if file_size > max_size:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Max size: {max_size / 1024 / 1024}MB"
+                detail=f"File too large. Max size: {settings.MAX_AUDIO_SIZE_MB}MB"
             )
 
+        # Validar formato y duración leyendo solo la cabecera
+        metadata = probe_and_validate_audio(file.file, file_size)
+
         # Subir archivo
-        result = await local_storage.upload_audio(file, story_id)
+        started = time.perf_counter()
+        source_url = None
+        if storage_backend.name == "local":
+            result = await local_storage.upload_audio(file, story_id, metadata.suffix)
+        else:
+            filename = local_storage.new_audio_filename(story_id, metadata.suffix)
+            stored = await storage_backend.put_stream(
+                f"audios/{filename}", _iter_upload_file(file), file.content_type
+            )
+            result = _stored_audio_result(filename, stored, file.content_type)
+            source_url = storage_backend.download_url(stored["key"])
+        record_upload("direct", file_size, time.perf_counter() - started)
+        result["metadata"] = metadata.to_dict()
+
+        # Forma de onda precalculada para el reproductor
+        background_tasks.add_task(waveform_service.generate, result["filename"], source_url)
 
         return {
             "success": True,
@@ -52,6 +160,150 @@ async def upload_audio(
             detail=f"Failed to upload audio: {str(e)}"
         )
 
+# === SUBIDAS DIRECTAS AL ALMACENAMIENTO (URL FIRMADA) ===
+
+def _presigned_audio_key(content_type: str, story_id: Optional[str]) -> str:
+    """Clave audios/<nombre> con la extensión del tipo MIME"""
+    suffix = next(
+        (ext for ext, media_type in AUDIO_MEDIA_TYPES.items() if media_type == content_type),
+        None
+    )
+    if suffix is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type. Only audio files are allowed"
+        )
+    return f"audios/{local_storage.new_audio_filename(story_id, suffix)}"
+
+def _check_presigned_key(key: str) -> None:
+    """Solo se aceptan claves de audio generadas por create_presigned_upload"""
+    if not key.startswith("audios/") or "/" in key[len("audios/"):]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid upload key"
+        )
+
+@router.post("/audio/presigned", status_code=status.HTTP_201_CREATED)
+async def create_presigned_upload(request: PresignedUploadRequest):
+    """
+    Preparar una subida directa del cliente al almacenamiento de objetos
+
+    Los bytes no pasan por la API. Archivos pequeños reciben una URL PUT;
+    los grandes una subida multiparte con una URL firmada por parte, que
+    el cliente puede enviar en paralelo. Al terminar se llama a
+    POST /audio/presigned/complete con los ETag de cada parte.
+    """
+    if not storage_backend.supports_presigned:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Storage backend '{storage_backend.name}' does not support presigned uploads"
+        )
+
+    max_size = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+    if request.size > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {settings.MAX_AUDIO_SIZE_MB}MB"
+        )
+
+    key = _presigned_audio_key(request.content_type, request.story_id)
+    try:
+        data = await storage_backend.presign_upload(key, request.content_type, request.size)
+        return {
+            "success": True,
+            "data": data
+        }
+    except StorageBackendError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to create presigned upload: {str(e)}"
+        )
+
+@router.post("/audio/presigned/complete")
+async def complete_presigned_upload(request: PresignedUploadComplete, background_tasks: BackgroundTasks):
+    """
+    Confirmar una subida directa y devolver la URL pública del audio
+
+    Los bytes no pasaron por la API: se valida formato y duración con
+    lecturas de rango del inicio y el final del objeto, y se borra si
+    no es un audio válido.
+    """
+    if not storage_backend.supports_presigned:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Storage backend '{storage_backend.name}' does not support presigned uploads"
+        )
+    _check_presigned_key(request.key)
+
+    try:
+        result = await storage_backend.complete_presigned_upload(
+            request.key,
+            request.upload_id,
+            [part.model_dump() for part in request.parts] if request.parts else None
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to complete upload: {str(e)}"
+        )
+
+    if result["size"] > settings.MAX_AUDIO_SIZE_MB * 1024 * 1024:
+        await storage_backend.delete(request.key)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {settings.MAX_AUDIO_SIZE_MB}MB"
+        )
+
+    try:
+        reader = ObjectReader(storage_backend, request.key, result["size"], asyncio.get_running_loop())
+        metadata = await asyncio.to_thread(probe_and_validate_audio, reader, result["size"])
+    except HTTPException:
+        await storage_backend.delete(request.key)
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to read uploaded audio: {str(e)}"
+        )
+
+    # Subida directa al almacenamiento: solo se conocen los bytes
+    record_upload("presigned", result["size"])
+
+    filename = request.key.split("/", 1)[1]
+    background_tasks.add_task(
+        waveform_service.generate, filename, storage_backend.download_url(request.key)
+    )
+
+    return {
+        "success": True,
+        "message": "Audio uploaded successfully",
+        "data": {
+            "filename": filename,
+            **result,
+            "metadata": metadata.to_dict()
+        }
+    }
+
+@router.delete("/audio/presigned/{upload_id}")
+async def abort_presigned_upload(upload_id: str, key: str):
+    """
+    Cancelar una subida multiparte directa y liberar sus partes
+    """
+    if not storage_backend.supports_presigned:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Storage backend '{storage_backend.name}' does not support presigned uploads"
+        )
+    _check_presigned_key(key)
+    try:
+        await storage_backend.abort_presigned_upload(key, upload_id)
+        return {"success": True, "message": "Upload aborted"}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Upload not found: {str(e)}"
+        )
+
 @router.get("/audio/{filename}")
 async def get_audio_info(filename: str):
     """
@@ -107,3 +359,252 @@ async def delete_audio(filename: str):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete audio: {str(e)}"
         )
+
+# === SUBIDAS REANUDABLES (estilo tus) ===
+
+def _parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Parsear la cabecera Upload-Metadata ("clave base64,clave base64")"""
+    metadata = {}
+    if not header:
+        return metadata
+    for pair in header.split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        value = ""
+        if len(parts) == 2:
+            try:
+                value = base64.b64decode(parts[1]).decode("utf-8")
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid Upload-Metadata value for key '{parts[0]}'"
+                )
+        metadata[parts[0]] = value
+    return metadata
+
+def _upload_headers(meta: dict) -> Dict[str, str]:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(meta["offset"]),
+        "Upload-Length": str(meta["length"]),
+        # HTTP-date (RFC 7231); expires_at se guarda en ISO 8601 UTC
+        "Upload-Expires": format_datetime(
+            datetime.fromisoformat(meta["expires_at"]).replace(tzinfo=timezone.utc), usegmt=True
+        ),
+        "Cache-Control": "no-store"
+    }
+
+def _validate_partial_upload(upload_id: str, part_path, meta: dict) -> None:
+    """
+    Rechazar una subida reanudable en cuanto hay SNIFF_SIZE bytes
+
+    Con el archivo incompleto la duración es una cota inferior, así que
+    solo se rechaza si el formato es desconocido o la cota ya excede el
+    máximo. Los errores de cabecera por truncamiento y la duración aún
+    desconocida se ignoran hasta el ensamblado final.
+    """
+    with open(part_path, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+        rejection = None
+        if sniff_container(head) is None:
+            rejection = HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Invalid or unsupported audio file: Unrecognized audio format"
+            )
+        else:
+            try:
+                _check_audio_duration(probe_audio(f, meta["offset"]), allow_unknown=True)
+            except AudioProbeError:
+                pass
+            except HTTPException as e:
+                rejection = e
+
+    if rejection is not None:
+        local_storage.delete_upload(upload_id)
+        raise rejection
+
+@router.post("/audio/resumable", status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length", ge=1),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata")
+):
+    """
+    Crear una subida de audio reanudable
+
+    Metadata opcional en Upload-Metadata: story_id, filetype.
+    Luego enviar fragmentos con PATCH y consultar el offset con HEAD.
+    """
+    max_size = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+    if upload_length > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {settings.MAX_AUDIO_SIZE_MB}MB"
+        )
+
+    metadata = _parse_upload_metadata(upload_metadata)
+    content_type = metadata.get("filetype") or "audio/webm"
+    if not content_type.startswith("audio/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an audio file"
+        )
+
+    try:
+        meta = local_storage.create_upload(
+            length=upload_length,
+            story_id=metadata.get("story_id") or None,
+            content_type=content_type
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create upload: {str(e)}"
+        )
+
+    response.headers.update(_upload_headers(meta))
+    response.headers["Location"] = f"{settings.API_V1_STR}/upload/audio/resumable/{meta['upload_id']}"
+
+    return {
+        "upload_id": meta["upload_id"],
+        "offset": meta["offset"],
+        "length": meta["length"],
+        "expires_at": meta["expires_at"]
+    }
+
+@router.head("/audio/resumable/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str):
+    """
+    Consultar cuántos bytes de la subida ya recibió el servidor
+    """
+    try:
+        meta = local_storage.get_upload(upload_id)
+    except UploadNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found or expired"
+        )
+
+    return Response(status_code=status.HTTP_200_OK, headers=_upload_headers(meta))
+
+@router.patch("/audio/resumable/{upload_id}")
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum")
+):
+    """
+    Enviar un fragmento de la subida a partir de Upload-Offset
+
+    Cuando se recibe el último byte se ensambla el audio y la respuesta
+    incluye el mismo resultado que POST /upload/audio.
+    """
+    lock = upload_locks.setdefault(upload_id, asyncio.Lock())
+    if lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_423_LOCKED,
+            detail="Another chunk is being written for this upload"
+        )
+
+    async with lock:
+        try:
+            started = time.perf_counter()
+            meta = await local_storage.append_upload_chunk(
+                upload_id,
+                upload_offset,
+                request.stream(),
+                upload_checksum
+            )
+            # Rendimiento real de red: el fragmento se lee del cuerpo en streaming
+            record_upload("resumable", meta["offset"] - upload_offset, time.perf_counter() - started)
+
+            part_path = local_storage.get_upload_part_path(upload_id)
+            headers = _upload_headers(meta)
+            if meta["offset"] < meta["length"]:
+                # Validar con el fragmento que completa los primeros bytes
+                if upload_offset < SNIFF_SIZE <= meta["offset"]:
+                    _validate_partial_upload(upload_id, part_path, meta)
+                return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+            try:
+                with open(part_path, "rb") as f:
+                    metadata = probe_and_validate_audio(f, meta["length"])
+            except HTTPException:
+                local_storage.delete_upload(upload_id)
+                raise
+
+            source_url = None
+            if storage_backend.name == "local":
+                result = local_storage.finalize_upload(upload_id, metadata.suffix)
+            else:
+                # El archivo parcial solo era temporal: se envía al backend y se borra
+                filename = local_storage.new_audio_filename(meta.get("story_id"), metadata.suffix)
+                stored = await storage_backend.put_file(
+                    f"audios/{filename}", str(part_path), meta.get("content_type") or "audio/webm"
+                )
+                local_storage.delete_upload(upload_id)
+                result = _stored_audio_result(filename, stored, meta.get("content_type"))
+                source_url = storage_backend.download_url(stored["key"])
+            result["metadata"] = metadata.to_dict()
+
+            background_tasks.add_task(waveform_service.generate, result["filename"], source_url)
+
+            return {
+                "success": True,
+                "message": "Audio uploaded successfully",
+                "data": result
+            }
+
+        except UploadNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found or expired"
+            )
+        except UploadOffsetMismatchError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e),
+                headers={"Upload-Offset": str(e.expected), "Tus-Resumable": TUS_VERSION}
+            )
+        except UploadChecksumMismatchError as e:
+            raise HTTPException(
+                status_code=HTTP_460_CHECKSUM_MISMATCH,
+                detail=str(e)
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload chunk: {str(e)}"
+            )
+
+@router.delete("/audio/resumable/{upload_id}")
+async def cancel_resumable_upload(upload_id: str):
+    """
+    Cancelar una subida reanudable y liberar el espacio parcial
+    """
+    try:
+        if not local_storage.delete_upload(upload_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+    except UploadNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+
+    return {
+        "success": True,
+        "message": "Upload cancelled successfully"
+    }
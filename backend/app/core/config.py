@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
-from typing import List
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -47,6 +47,100 @@ class Settings(BaseSettings):
     MAX_AUDIO_SIZE_MB: int = 50
     MAX_AUDIO_DURATION_MINUTES: int = 10
 
+    # Subidas reanudables (protocolo estilo tus)
+    RESUMABLE_UPLOAD_EXPIRATION_HOURS: int = 24
+    RESUMABLE_UPLOAD_MAX_CHUNK_MB: int = 8
+
+    # Transcodificación de audio (requiere ffmpeg con libopus)
+    FFMPEG_BINARY: str = "ffmpeg"
+    TRANSCODE_ENABLED: bool = True
+    COMPACT_AUDIO_BITRATE_KBPS: int = 24
+    TRANSCRIPTION_SAMPLE_RATE: int = 16000
+    TRANSCRIPTION_AUDIO_BITRATE_KBPS: int = 32
+
+    # Detección de voz antes de transcribir (compacta silencios largos)
+    VAD_ENABLED: bool = True
+    VAD_FRAME_MS: int = 30
+    VAD_ENERGY_MARGIN_DB: float = 10.0
+    VAD_MIN_SILENCE_MS: int = 700
+    VAD_KEEP_SILENCE_MS: int = 250
+
+    # Picos de forma de onda precalculados (número de barras por nivel)
+    WAVEFORM_RESOLUTIONS: List[int] = [200, 800, 3200]
+    WAVEFORM_SAMPLE_RATE: int = 8000
+    WAVEFORM_BITS: int = 8
+
+    # Backend de almacenamiento de medios: "local" o "s3" (S3, MinIO...)
+    STORAGE_BACKEND: str = "local"
+    S3_ENDPOINT_URL: str = ""
+    S3_BUCKET: str = ""
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PUBLIC_URL: str = ""
+    STORAGE_MULTIPART_CHUNK_MB: int = 8
+    STORAGE_MULTIPART_CONCURRENCY: int = 4
+    PRESIGNED_URL_EXPIRATION_SECONDS: int = 3600
+
+    # Escrituras masivas en Firestore (regla 500/50/5)
+    FIRESTORE_BULK_OPS_PER_SECOND: int = 500
+
+    # Recolector de medios huérfanos (0 horas = tarea periódica desactivada)
+    MEDIA_GC_INTERVAL_HOURS: int = 24
+    MEDIA_GC_GRACE_HOURS: int = 48
+    MEDIA_GC_BATCH_SIZE: int = 200
+    MEDIA_GC_QUARANTINE: bool = True
+    MEDIA_GC_QUARANTINE_DAYS: int = 7
+    MEDIA_GC_KEEP_ARCHIVED: bool = True
+
+    # Hojas de QR imprimibles (PDF con varias tarjetas por página)
+    QR_SHEET_MAX_STORIES: int = 500
+    QR_SHEET_MAX_PAGES_IN_FLIGHT: int = 8
+
+    # Entrega directa de imágenes QR (caché en memoria y en storage/cache/qr)
+    QR_CACHE_MEMORY_MB: int = 32
+    QR_CACHE_DISK_MB: int = 256
+    QR_MIN_SIZE: int = 64
+    QR_MAX_SIZE: int = 2048
+    # Tamaños realmente renderizados: el pedido se redondea al siguiente
+    QR_IMAGE_SIZES: List[int] = [128, 256, 512, 1024, 2048]
+
+    # Búsqueda de texto completo (índice BM25 en memoria, guardado en storage/cache/search)
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_SAVE_DELAY_SECONDS: int = 10
+    # Reconstruir desde Firestore al superar esta antigüedad (0 = nunca)
+    SEARCH_INDEX_MAX_AGE_HOURS: int = 24
+
+    # Pool de procesos CPU compartido (0 = núcleos disponibles)
+    CPU_WORKERS: int = 0
+
+    # Métricas de peticiones y del pipeline (middleware y endpoint /metrics)
+    METRICS_ENABLED: bool = True
+
+    # Presupuesto de lecturas de Firestore por petición (0 = sin límite).
+    # Claves: plantilla de ruta, p. ej. {"/api/v1/stories/": 50}
+    FIRESTORE_READ_BUDGET_DEFAULT: int = 100
+    FIRESTORE_READ_BUDGETS: Dict[str, int] = {
+        "/api/v1/qr/sheets": 500,
+    }
+
+    # Endpoints de administración (/api/v1/admin); sin token quedan desactivados
+    ADMIN_TOKEN: str = ""
+
+    # Perfilado estadístico de peticiones (requiere pyinstrument)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_SLOW_THRESHOLD_MS: int = 0  # > 0: perfilar todo y guardar las lentas
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_DIR: str = "storage/profiles"
+    PROFILING_MAX_FILES: int = 200
+
+    # Detector de bloqueos del event loop
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: int = 100
+    LOOP_STALL_THRESHOLD_MS: int = 100
+    LOOP_STALL_HISTORY: int = 50
+
     @field_validator('GROQ_API_KEY')
     @classmethod
     def validate_groq_api_key(cls, v: str) -> str:
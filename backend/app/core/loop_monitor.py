@@ -0,0 +1,172 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS, registry
+from app.core.request_context import route_template
+
+# Marcos de pila guardados por bloqueo
+STACK_LIMIT = 30
+
+def _is_running(task: asyncio.Task) -> bool:
+    """La corrutina de la tarea se está ejecutando ahora mismo"""
+    coro = task.get_coro()
+    return bool(getattr(coro, "cr_running", False) or getattr(coro, "gi_running", False))
+
+class LoopMonitor:
+    """
+    Detector de bloqueos del event loop
+
+    Una tarea duerme LOOP_MONITOR_INTERVAL_MS y mide cuánto tarda de más
+    en despertar (retraso de planificación). Un hilo vigilante comprueba
+    el último latido de esa tarea: si el loop lleva más de
+    LOOP_STALL_THRESHOLD_MS sin responder, copia la pila del hilo del loop
+    mientras sigue bloqueado y la atribuye a la ruta o tarea en segundo
+    plano que se estaba ejecutando. Al reanudarse el loop el bloqueo se
+    registra con su duración total.
+    """
+
+    def __init__(self, interval_ms: int, threshold_ms: int, history: int):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.stall_count = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.ticks = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Petición atendida por cada tarea (para atribuir los bloqueos)
+        self._task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, Scope]" = weakref.WeakKeyDictionary()
+
+    # === ATRIBUCIÓN ===
+
+    def track_request(self, scope: Scope) -> None:
+        """Asociar la tarea actual a la petición que atiende"""
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_scopes[task] = scope
+
+    def _describe_running_task(self) -> str:
+        """Ruta o nombre de la tarea que ocupa el loop (llamado desde el vigilante)"""
+        # Con el loop bloqueado solo la corrutina de esa tarea está en ejecución
+        for task, scope in list(self._task_scopes.items()):
+            if _is_running(task):
+                return f"{scope['method']} {route_template(scope)}"
+        for task in asyncio.all_tasks(self._loop):
+            if _is_running(task):
+                return f"task:{task.get_name()}"
+        return "loop"
+
+    # === VIGILANCIA ===
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 4):
+            # Desde el último latido el monitor duerme un intervalo completo
+            blocked = time.perf_counter() - self._heartbeat - self.interval
+            if blocked < self.threshold or self._snapshot is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._snapshot = {
+                "source": self._describe_running_task(),
+                "stack": traceback.format_stack(frame, limit=STACK_LIMIT),
+            }
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+            lag = max(now - expected, 0.0)
+            self.ticks += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+            snapshot, self._snapshot = self._snapshot, None
+            if lag >= self.threshold:
+                self._record_stall(lag, snapshot)
+
+    def _record_stall(self, lag: float, snapshot: Optional[Dict[str, Any]]) -> None:
+        # Sin instantánea el bloqueo fue más corto que el ciclo del vigilante
+        source = snapshot["source"] if snapshot else "unknown"
+        self.stall_count += 1
+        EVENT_LOOP_STALLS.inc(source=source)
+        self.stalls.append({
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(lag * 1000, 1),
+            "source": source,
+            "stack": snapshot["stack"] if snapshot else [],
+        })
+        print(f"⚠️  Event loop bloqueado {lag * 1000:.0f} ms ({source})")
+
+    def start(self) -> None:
+        """Arrancar el monitor en el event loop actual"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop_monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def report(self) -> Dict[str, Any]:
+        """Estado del monitor y bloqueos recientes (más recientes primero)"""
+        recent: List[Dict[str, Any]] = list(reversed(self.stalls))
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "ticks": self.ticks,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stall_count,
+            "recent_stalls": recent,
+        }
+
+# Singleton instance
+loop_monitor = LoopMonitor(
+    settings.LOOP_MONITOR_INTERVAL_MS,
+    settings.LOOP_STALL_THRESHOLD_MS,
+    settings.LOOP_STALL_HISTORY
+)
+
+registry.gauge(
+    "event_loop_lag_max_seconds", "Mayor retraso del event loop desde el arranque",
+    callback=lambda: loop_monitor.max_lag
+)
+
+class LoopMonitorMiddleware:
+    """Asociar cada petición a su tarea para atribuir los bloqueos del loop"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            loop_monitor.track_request(scope)
+        await self.app(scope, receive, send)
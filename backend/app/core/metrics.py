@@ -0,0 +1,389 @@
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.request_context import current_usage, route_template
+
+# Límites por defecto de los histogramas de latencia (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+THROUGHPUT_BUCKETS = tuple(2 ** exponent * 1024 for exponent in range(4, 17, 2))  # 16 KB/s .. 64 MB/s
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """Métrica con etiquetas; segura entre hilos (Firestore corre en hilos)"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Gauge(Metric):
+    """
+    Valor instantáneo; con callback se calcula al exportar
+
+    El callback devuelve un número (sin etiquetas) o un dict
+    {tupla de etiquetas: valor}.
+    """
+
+    type = "gauge"
+
+    def __init__(self, *args: Any, callback: Optional[Callable[[], Any]] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[str]:
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                print(f"Error calculando métrica {self.name}: {e}")
+                return
+            items = list(values.items()) if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Medir la duración de un bloque"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+class MetricsRegistry:
+    """Registro de métricas exportadas en formato de texto de Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Any]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback=callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+# Singleton instance
+registry = MetricsRegistry()
+
+# === CATÁLOGO DE MÉTRICAS ===
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Latencia hasta el último byte de la respuesta", ("method", "route")
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso"
+)
+
+FIRESTORE_OPERATIONS = registry.counter(
+    "firestore_operations_total", "Operaciones de FirebaseService", ("operation", "status")
+)
+FIRESTORE_LATENCY = registry.histogram(
+    "firestore_operation_duration_seconds", "Duración de las operaciones de Firestore", ("operation",)
+)
+FIRESTORE_DOCUMENTS = registry.counter(
+    "firestore_documents_total", "Documentos leídos, recorridos por consultas o escritos", ("kind",)
+)
+FIRESTORE_DOCUMENTS_PER_REQUEST = registry.histogram(
+    "firestore_documents_per_request", "Documentos de Firestore por petición HTTP", ("kind",),
+    buckets=COUNT_BUCKETS
+)
+
+GROQ_REQUESTS = registry.counter(
+    "groq_requests_total", "Llamadas a la API de Groq", ("operation", "model", "status")
+)
+GROQ_LATENCY = registry.histogram(
+    "groq_request_duration_seconds", "Duración de las llamadas a la API de Groq", ("operation", "model")
+)
+GROQ_TOKENS = registry.counter(
+    "groq_tokens_total", "Tokens consumidos en Groq", ("model", "type")
+)
+GROQ_AUDIO_SECONDS = registry.counter(
+    "groq_audio_seconds_total", "Segundos de audio enviados a Whisper", ("model",)
+)
+
+QR_RENDER_LATENCY = registry.histogram(
+    "qr_render_duration_seconds", "Generación de QR de principio a fin (render y guardado)", ("kind",)
+)
+CPU_TASK_WAIT = registry.histogram(
+    "cpu_task_queue_wait_seconds", "Espera en cola del pool CPU", ("function",)
+)
+CPU_TASK_DURATION = registry.histogram(
+    "cpu_task_duration_seconds", "Ejecución en el pool CPU", ("function",)
+)
+
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "Retraso del event loop al despertar el monitor",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EVENT_LOOP_STALLS = registry.counter(
+    "event_loop_stalls_total", "Bloqueos del event loop por encima del umbral", ("source",)
+)
+
+UPLOAD_BYTES = registry.counter(
+    "upload_bytes_total", "Bytes de audio recibidos", ("method",)
+)
+UPLOAD_THROUGHPUT = registry.histogram(
+    "upload_throughput_bytes_per_second", "Rendimiento de las subidas medido en el servidor", ("method",),
+    buckets=THROUGHPUT_BUCKETS
+)
+
+# === INSTRUMENTACIÓN ===
+
+def record_firestore_documents(kind: str, count: int = 1) -> None:
+    """
+    Contar documentos de Firestore (kind: read, streamed o write)
+
+    Se suman al total global y al consumo de la petición en curso.
+    """
+    if count <= 0:
+        return
+    FIRESTORE_DOCUMENTS.inc(count, kind=kind)
+    usage = current_usage()
+    if usage is not None:
+        usage.add_documents(kind, count)
+
+def record_upload(method: str, size: int, seconds: Optional[float] = None) -> None:
+    """Contar bytes subidos y, si se midió, el rendimiento"""
+    UPLOAD_BYTES.inc(size, method=method)
+    if seconds and size:
+        UPLOAD_THROUGHPUT.observe(size / seconds, method=method)
+
+def instrumented(
+    latency: Histogram,
+    counter: Optional[Counter] = None,
+    on_complete: Optional[Callable[[float], None]] = None,
+    **labels: Any
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorador: medir duración y resultado (ok/error) de una función
+
+    Sirve para funciones síncronas y corrutinas. Las etiquetas de
+    `counter` son las de `latency` más `status`; on_complete recibe la
+    duración en segundos.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        def record(started: float, status: str) -> None:
+            elapsed = time.perf_counter() - started
+            latency.observe(elapsed, **labels)
+            if counter is not None:
+                counter.inc(status=status, **labels)
+            if on_complete is not None:
+                on_complete(elapsed)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    record(started, "error")
+                    raise
+                record(started, "ok")
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(started, "error")
+                raise
+            record(started, "ok")
+            return result
+        return wrapper
+    return decorator
+
+def _add_firestore_time(seconds: float) -> None:
+    usage = current_usage()
+    if usage is not None:
+        usage.add_operation(seconds)
+
+def firestore_operation(operation: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorador para los métodos de FirebaseService"""
+    return instrumented(
+        FIRESTORE_LATENCY, FIRESTORE_OPERATIONS, on_complete=_add_firestore_time, operation=operation
+    )
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latencia y estado por plantilla de ruta
+
+    Se usa la ruta declarada (/api/v1/stories/{story_id}), no la URL,
+    para no disparar la cardinalidad. La latencia se mide hasta el
+    último byte enviado, sin contar las BackgroundTasks posteriores.
+    Los documentos por petición se leen del FirestoreUsage que abre
+    FirestoreUsageMiddleware (que debe envolver a este middleware).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_IN_PROGRESS.dec()
+            usage = current_usage()
+            if usage is not None:
+                FIRESTORE_DOCUMENTS_PER_REQUEST.observe(usage.reads, kind="read")
+                FIRESTORE_DOCUMENTS_PER_REQUEST.observe(usage.streamed, kind="streamed")
+                FIRESTORE_DOCUMENTS_PER_REQUEST.observe(usage.writes, kind="write")
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] in ("http.response.body", "http.response.zerocopysend") \
+                    and not message.get("more_body", False):
+                finish()
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
@@ -0,0 +1,126 @@
+import asyncio
+import random
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.request_context import route_template
+
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_NAME_RE = re.compile(
+    r"^(?P<timestamp>\d{8}T\d{6}_\d{6})_(?P<method>[A-Z]+)_(?P<route>[A-Za-z0-9-]*)_(?P<ms>\d+)ms"
+    + re.escape(PROFILE_SUFFIX) + "$"
+)
+
+class ProfileStore:
+    """Directorio rotativo de perfiles (se conservan los PROFILING_MAX_FILES más recientes)"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def filename_for(self, method: str, route: str, duration_ms: int) -> str:
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S_%f")
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-")
+        return f"{timestamp}_{method}_{slug}_{duration_ms}ms{PROFILE_SUFFIX}"
+
+    def save(self, filename: str, content: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / filename
+        path.write_text(content, encoding="utf-8")
+        self.rotate()
+        return path
+
+    def rotate(self) -> None:
+        # El nombre empieza por la fecha: orden alfabético = cronológico
+        profiles = sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"))
+        for old in profiles[:max(len(profiles) - self.max_files, 0)]:
+            old.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Perfiles guardados, más recientes primero"""
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for path in sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True):
+            match = PROFILE_NAME_RE.match(path.name)
+            if not match:
+                continue
+            profiles.append({
+                "name": path.name,
+                "created_at": datetime.strptime(match["timestamp"], "%Y%m%dT%H%M%S_%f").isoformat(),
+                "method": match["method"],
+                "route": match["route"],
+                "duration_ms": int(match["ms"]),
+                "size": path.stat().st_size,
+            })
+        return profiles
+
+    def get_path(self, name: str) -> Optional[Path]:
+        """Ruta de un perfil por nombre (None si no existe o el nombre no es válido)"""
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+# Singleton instance
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+def _render_speedscope(profiler: Any) -> str:
+    from pyinstrument.renderers import SpeedscopeRenderer
+    return profiler.output(renderer=SpeedscopeRenderer())
+
+class ProfilingMiddleware:
+    """
+    Perfilado estadístico opcional de peticiones (pyinstrument)
+
+    Se perfila una fracción PROFILING_SAMPLE_RATE de las peticiones; si
+    PROFILING_SLOW_THRESHOLD_MS > 0 se perfilan todas y solo se guardan
+    las muestreadas y las que superan el umbral. pyinstrument en modo
+    async atribuye a cada petición solo su propio código aunque haya
+    otras en curso en el mismo event loop. La salida es JSON de
+    speedscope (https://www.speedscope.app), listo para flame graphs.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow_threshold = settings.PROFILING_SLOW_THRESHOLD_MS / 1000
+        self.interval = settings.PROFILING_INTERVAL_MS / 1000
+        # Dependencia opcional: solo se importa si el perfilado está activo
+        from pyinstrument import Profiler
+        self.profiler_class = Profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self.profiler_class(interval=self.interval, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            elapsed = time.perf_counter() - started
+        # La respuesta ya se envió: guardar no retrasa al cliente
+        if sampled or elapsed >= self.slow_threshold:
+            await self._save(profiler, scope, elapsed)
+
+    async def _save(self, profiler: Any, scope: Scope, elapsed: float) -> None:
+        # Renderizar y escribir fuera del event loop
+        try:
+            content = await asyncio.to_thread(_render_speedscope, profiler)
+            filename = profile_store.filename_for(scope["method"], route_template(scope), int(elapsed * 1000))
+            await asyncio.to_thread(profile_store.save, filename, content)
+        except Exception as e:
+            print(f"Error guardando perfil: {e}")
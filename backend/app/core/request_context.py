@@ -0,0 +1,126 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+# Plantillas de ruta por endpoint, calculadas una vez por aplicación
+_route_templates: Dict[int, Dict[Any, str]] = {}
+
+def route_template(scope: Scope) -> str:
+    """
+    Ruta declarada que atendió la petición (/api/v1/stories/{story_id})
+
+    Requiere que el router ya haya resuelto el endpoint; si no hubo
+    coincidencia devuelve "unmatched".
+    """
+    app = scope.get("app")
+    routes = _route_templates.get(id(app))
+    if routes is None:
+        routes = {}
+        for route in getattr(app, "routes", []):
+            if isinstance(route, Mount):
+                routes[route.app] = f"{route.path}/{{path}}"
+            elif hasattr(route, "endpoint"):
+                routes[route.endpoint] = route.path
+        _route_templates[id(app)] = routes
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    return routes.get(endpoint, "unmatched")
+
+@dataclass
+class FirestoreUsage:
+    """Documentos y tiempo de Firestore consumidos por una petición"""
+    reads: int = 0
+    streamed: int = 0
+    writes: int = 0
+    operations: int = 0
+    seconds: float = 0.0
+
+    @property
+    def billed_reads(self) -> int:
+        """Lecturas facturadas: lecturas puntuales más documentos de consultas"""
+        return self.reads + self.streamed
+
+    def add_documents(self, kind: str, count: int) -> None:
+        if kind == "read":
+            self.reads += count
+        elif kind == "streamed":
+            self.streamed += count
+        elif kind == "write":
+            self.writes += count
+
+    def add_operation(self, seconds: float) -> None:
+        self.operations += 1
+        self.seconds += seconds
+
+# Consumo de la petición en curso (None fuera de una petición)
+_current_usage: ContextVar[Optional[FirestoreUsage]] = ContextVar("firestore_usage", default=None)
+
+def current_usage() -> Optional[FirestoreUsage]:
+    return _current_usage.get()
+
+def read_budget_for(route: str) -> int:
+    """Presupuesto de lecturas de una ruta (0 = sin límite)"""
+    return settings.FIRESTORE_READ_BUDGETS.get(route, settings.FIRESTORE_READ_BUDGET_DEFAULT)
+
+class FirestoreUsageMiddleware:
+    """
+    Contabilidad de Firestore por petición
+
+    Abre un FirestoreUsage en el contexto de la petición; los métodos de
+    FirebaseService suman en él sus documentos y su duración (también
+    desde hilos: asyncio.to_thread copia el contexto). Al empezar la
+    respuesta se añaden las cabeceras Server-Timing, X-Firestore-Reads y
+    X-Firestore-Writes con lo consumido hasta ese momento (y
+    X-Firestore-Budget: exceeded si ya se superó el presupuesto). El aviso
+    de presupuesto se decide al terminar la aplicación, con los totales
+    que incluyen cuerpos en streaming y tareas en segundo plano.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = FirestoreUsage()
+        token = _current_usage.set(usage)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                reads = usage.billed_reads
+                headers.append("Server-Timing", (
+                    f'firestore;dur={usage.seconds * 1000:.1f};'
+                    f'desc="{reads} reads, {usage.writes} writes"'
+                ))
+                headers.append("Server-Timing", f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                headers["X-Firestore-Reads"] = str(reads)
+                headers["X-Firestore-Writes"] = str(usage.writes)
+
+                budget = read_budget_for(route_template(scope))
+                if budget and reads > budget:
+                    headers["X-Firestore-Budget"] = "exceeded"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_usage.reset(token)
+            route = route_template(scope)
+            budget = read_budget_for(route)
+            reads = usage.billed_reads
+            if budget and reads > budget:
+                print(
+                    f"⚠️  Presupuesto de lecturas Firestore excedido: {scope['method']} {route} "
+                    f"leyó {reads} documentos ({usage.reads} puntuales, {usage.streamed} de consultas; "
+                    f"presupuesto {budget})"
+                )
@@ -0,0 +1,219 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Tipos MIME de audio (mimetypes devuelve video/webm para .webm)
+AUDIO_MEDIA_TYPES = {
+    ".webm": "audio/webm",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".m4a": "audio/mp4",
+}
+
+# Archivos con nombre derivado del contenido: nunca cambian
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """ETag fuerte a partir de inodo, tamaño y mtime"""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 13.1.2)"""
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parsear una cabecera Range de un solo rango
+
+    Returns:
+        (inicio, fin) inclusivos, None si la cabecera se ignora
+
+    Raises:
+        ValueError si el rango no es satisfacible
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Unidades desconocidas o multirango: se responde el archivo completo
+        return None
+
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not start_s:
+            # Sufijo: últimos N bytes
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+
+    if start >= size or end < start:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, min(end, size - 1)
+
+class MediaFileResponse(Response):
+    """
+    Respuesta de archivo con soporte de Range (206), ETag y GET condicional
+
+    Si el servidor ASGI ofrece la extensión http.response.zerocopysend el
+    cuerpo se envía con sendfile desde el descriptor; si no, se leen
+    bloques con pread en un hilo.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        request_headers: Mapping[str, str],
+        media_type: str,
+        etag: Optional[str] = None,
+        cache_control: str = DEFAULT_CACHE_CONTROL
+    ) -> None:
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.status_code = 200
+
+        size = stat_result.st_size
+        etag = etag or stat_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            "cache-control": cache_control,
+        }
+        self.offset, self.count = 0, size
+
+        if self._not_modified(request_headers, etag, stat_result.st_mtime):
+            self.status_code = 304
+            self.count = 0
+            self.media_type = None
+            self.init_headers(headers)
+            return
+
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                self.status_code = 416
+                self.count = 0
+                headers["content-range"] = f"bytes */{size}"
+                self.init_headers(headers)
+                self.headers["content-length"] = "0"
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                self.status_code = 206
+                self.offset, self.count = start, end - start + 1
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.count)
+
+    @staticmethod
+    def _not_modified(request_headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _if_range_matches(request_headers: Mapping[str, str], etag: str, last_modified: str) -> bool:
+        """If-Range: solo aplicar el rango si el archivo no cambió"""
+        if_range = request_headers.get("if-range")
+        if not if_range:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range exige comparación fuerte
+            return if_range == etag
+        return if_range == last_modified
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"].upper() == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+
+            position = self.offset
+            remaining = self.count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(self.chunk_size, remaining), position
+                )
+                if not chunk:
+                    break
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                # El archivo se truncó mientras se enviaba
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+def audio_file_response(
+    file_path: str,
+    stat_result: os.stat_result,
+    request_headers: Mapping[str, str],
+    content_hash: Optional[str] = None
+) -> MediaFileResponse:
+    """
+    Construir la respuesta para un archivo de audio
+
+    Los nombres direccionados por contenido usan el hash como ETag y se
+    marcan como inmutables; el resto se revalida con ETag de stat.
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+    return MediaFileResponse(
+        file_path,
+        stat_result,
+        request_headers,
+        media_type=AUDIO_MEDIA_TYPES.get(suffix, "application/octet-stream"),
+        etag=f'"{content_hash}"' if content_hash else None,
+        cache_control=IMMUTABLE_CACHE_CONTROL if content_hash else DEFAULT_CACHE_CONTROL
+    )
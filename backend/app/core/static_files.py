@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+from app.core.responses import AUDIO_MEDIA_TYPES, audio_file_response
+from app.services.local_storage import local_storage
+
+# Subdirectorios de storage/ que nunca se sirven públicamente
+PRIVATE_DIRS = {"uploads", "quarantine", "cache", "profiles"}
+
+class StorageStaticFiles(StaticFiles):
+    """
+    StaticFiles para storage/ que entiende el layout fragmentado
+
+    Las URLs públicas siguen siendo planas (/storage/audios/<nombre>);
+    el archivo se busca en su shard ab/cd/ y, si no está, en la ruta
+    plana heredada. Los audios se sirven con soporte de Range y caché.
+    """
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        parts = Path(path).parts
+        if parts and parts[0] in PRIVATE_DIRS:
+            return "", None
+
+        if len(parts) == 2 and parts[0] in ("audios", "qr"):
+            if parts[0] == "audios":
+                file_path = local_storage.get_audio_path(parts[1])
+            else:
+                file_path = local_storage.get_qr_path(parts[1])
+            try:
+                return str(file_path.resolve()), os.stat(file_path)
+            except FileNotFoundError:
+                return "", None
+
+        return super().lookup_path(path)
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200
+    ) -> Response:
+        suffix = os.path.splitext(full_path)[1].lower()
+        if suffix not in AUDIO_MEDIA_TYPES:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        # Blobs: el nombre es el SHA-256 del contenido
+        content_hash = None
+        parent = Path(full_path).parent
+        if parent.parent.name == local_storage.blobs_dir.name:
+            content_hash = Path(full_path).stem
+
+        return audio_file_response(full_path, stat_result, Headers(scope=scope), content_hash)
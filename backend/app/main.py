@@ -1,9 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.request_context import FirestoreUsageMiddleware
+from app.core.static_files import StorageStaticFiles
+from app.services.workers import cpu_executor, shutdown_process_pool
+from app.services.media_gc import media_gc
+from app.services.search_index import search_index
 from pathlib import Path
+import asyncio
 
 app = FastAPI(
     title="Historias Vivientes Aymara API",
@@ -18,18 +26,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeceras del protocolo de subida reanudable leídas por el cliente
+    expose_headers=[
+        "Location", "Upload-Offset", "Upload-Length", "Upload-Expires", "Tus-Resumable",
+        "Server-Timing", "X-Firestore-Reads", "X-Firestore-Writes", "X-Firestore-Budget",
+    ],
 )
 
+# Latencia por ruta y documentos de Firestore por petición (/metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Perfilado opcional de peticiones (muestreo o umbral de latencia)
+if settings.PROFILING_ENABLED:
+    from app.core.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Atribución de bloqueos del event loop a la ruta en curso
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+
+# Lecturas/escrituras de Firestore por petición (cabeceras y presupuestos);
+# se añade al final para envolver a MetricsMiddleware
+app.add_middleware(FirestoreUsageMiddleware)
+
 # Crear directorio de almacenamiento si no existe
 storage_path = Path("storage")
 storage_path.mkdir(exist_ok=True)
 
 # Montar directorio de archivos estáticos para servir audios y QR
-app.mount("/storage", StaticFiles(directory="storage"), name="storage")
+app.mount("/storage", StorageStaticFiles(directory="storage"), name="storage")
 
 # Incluir routers de API
 app.include_router(api_router, prefix="/api/v1")
 
+# Tareas periódicas en segundo plano
+background_tasks = set()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if settings.MEDIA_GC_INTERVAL_HOURS > 0:
+        task = asyncio.create_task(media_gc.run_periodically(), name="media_gc")
+        background_tasks.add(task)
+    # Índice de búsqueda: se carga del disco o se reconstruye en segundo plano
+    if settings.SEARCH_INDEX_ENABLED:
+        await search_index.start()
+        if settings.SEARCH_INDEX_MAX_AGE_HOURS > 0:
+            task = asyncio.create_task(search_index.run_periodically(), name="search_index_refresh")
+            background_tasks.add(task)
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    for task in background_tasks:
+        task.cancel()
+    await search_index.stop()
+    loop_monitor.stop()
+    shutdown_process_pool()
+
 @app.get("/")
 async def root():
     return {
@@ -41,3 +96,22 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics disabled\n", status_code=404)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/loop")
+async def loop_health():
+    """Retraso del event loop (sin pilas; el detalle está en /api/v1/admin/loop)"""
+    report = loop_monitor.report()
+    report.pop("recent_stalls")
+    return report
+
+@app.get("/health/workers")
+async def workers_health():
+    """Estado del pool CPU: procesos, trabajos en curso y tiempos por función"""
+    return cpu_executor.stats()
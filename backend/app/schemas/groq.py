@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from app.schemas.story import StoryCategory, CulturalSignificance
+from app.schemas.story import StoryCategory, CulturalSignificance, TranscriptionSegment
 
 class GroqTranscriptionRequest(BaseModel):
     audio_url: str
@@ -11,6 +11,7 @@ class GroqTranscriptionResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     language: str
     duration: Optional[float] = None
+    segments: Optional[List[TranscriptionSegment]] = None
 
 class GroqAnalysisRequest(BaseModel):
     transcription: str
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+from app.services.qr_sheets import SHEET_GRIDS
+
+class QRSheetRequest(BaseModel):
+    community: Optional[str] = Field(None, description="Comunidad cuyos relatos se imprimen")
+    story_ids: Optional[List[str]] = Field(None, description="Relatos concretos (en este orden)")
+    per_page: int = Field(4, description="Tarjetas por página")
+    page_size: Literal["a4", "letter"] = "a4"
+
+    @field_validator('per_page')
+    @classmethod
+    def validate_per_page(cls, v: int) -> int:
+        if v not in SHEET_GRIDS:
+            raise ValueError(f"per_page must be one of {sorted(SHEET_GRIDS)}")
+        return v
+
+    @model_validator(mode='after')
+    def validate_selection(self) -> 'QRSheetRequest':
+        if not self.community and not self.story_ids:
+            raise ValueError("Either community or story_ids is required")
+        return self
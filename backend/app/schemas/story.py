@@ -57,10 +57,16 @@ class Location(LocationBase):
         from_attributes = True
 
 # Schemas para Transcription
+class TranscriptionSegment(BaseModel):
+    start: float = Field(..., ge=0.0, description="Inicio en segundos del audio original")
+    end: float = Field(..., ge=0.0, description="Fin en segundos del audio original")
+    text: str
+
 class TranscriptionBase(BaseModel):
     aymara: str
     spanish: Optional[str] = None
     confidence: float = Field(..., ge=0.0, le=1.0)
+    segments: Optional[List[TranscriptionSegment]] = None
 
 class Transcription(TranscriptionBase):
     class Config:
@@ -97,6 +103,9 @@ class Story(StoryBase):
     status: StoryStatus = StoryStatus.DRAFT
     publicUrl: Optional[str] = None
     qrCodeUrl: Optional[str] = None
+    qrEncodedUrl: Optional[str] = Field(None, description="URL codificada en los QR actuales")
+    audioCompactUrl: Optional[str] = Field(None, description="Opus mono de baja tasa para reproducción")
+    audioTranscriptionUrl: Optional[str] = Field(None, description="Opus mono 16 kHz usado para transcribir")
     createdAt: datetime
     updatedAt: Optional[datetime] = None
     publishedAt: Optional[datetime] = None
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class PresignedUploadRequest(BaseModel):
+    content_type: str = Field("audio/webm", description="Tipo MIME del audio")
+    size: int = Field(..., gt=0, description="Tamaño total en bytes")
+    story_id: Optional[str] = None
+
+class PresignedUploadPart(BaseModel):
+    part_number: int = Field(..., ge=1)
+    etag: str
+
+class PresignedUploadComplete(BaseModel):
+    key: str
+    upload_id: Optional[str] = None
+    parts: Optional[List[PresignedUploadPart]] = None
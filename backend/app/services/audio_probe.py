@@ -0,0 +1,598 @@
+import os
+import struct
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Optional, Tuple
+
+# Bytes leídos del inicio y del final del archivo
+HEAD_SIZE = 64 * 1024
+TAIL_SIZE = 64 * 1024
+
+# Extensión con la que se guarda cada contenedor (el tipo MIME sale de ella)
+CONTAINER_SUFFIXES = {
+    "webm": ".webm",
+    "matroska": ".webm",
+    "ogg": ".ogg",
+    "wav": ".wav",
+    "flac": ".flac",
+    "mp4": ".m4a",
+    "mp3": ".mp3",
+}
+
+class AudioProbeError(Exception):
+    """El archivo no es un audio reconocible o su cabecera está corrupta"""
+
+@dataclass
+class AudioMetadata:
+    container: str
+    codec: Optional[str] = None
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+    @property
+    def suffix(self) -> str:
+        return CONTAINER_SUFFIXES.get(self.container, ".webm")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def _read_at(f: BinaryIO, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    return f.read(size)
+
+# === WEBM / MATROSKA (EBML) ===
+
+EBML_HEADER = b"\x1a\x45\xdf\xa3"
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_CLUSTER = 0x1F43B675
+MKV_CLUSTER_ID_BYTES = b"\x1f\x43\xb6\x75"
+MKV_TIMECODE = 0xE7
+MKV_SIMPLE_BLOCK = 0xA3
+MKV_BLOCK_GROUP = 0xA0
+MKV_BLOCK = 0xA1
+
+MKV_MASTER_ELEMENTS = {MKV_SEGMENT, MKV_INFO, MKV_TRACKS, MKV_TRACK_ENTRY, MKV_AUDIO}
+
+MKV_CODECS = {
+    "A_OPUS": "opus",
+    "A_VORBIS": "vorbis",
+    "A_AAC": "aac",
+    "A_MPEG/L3": "mp3",
+    "A_FLAC": "flac",
+    "A_PCM/INT/LIT": "pcm",
+}
+
+def _read_vint(data: bytes, pos: int, strip_marker: bool) -> Tuple[int, int, bool]:
+    """
+    Leer un entero de longitud variable EBML
+
+    Returns:
+        (valor, nueva posición, tamaño desconocido)
+    """
+    if pos >= len(data):
+        raise AudioProbeError("Truncated EBML data")
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise AudioProbeError("Invalid EBML variable-length integer")
+
+    value = first & (mask - 1) if strip_marker else first
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = strip_marker and value == (1 << (7 * length)) - 1
+    return value, pos + length, unknown
+
+def _read_uint(data: bytes) -> int:
+    return int.from_bytes(data, "big") if data else 0
+
+def _read_float(data: bytes) -> float:
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    raise AudioProbeError("Invalid EBML float")
+
+def _probe_webm(f: BinaryIO, head: bytes, tail: bytes, file_size: int, full_scan: bool) -> AudioMetadata:
+    _, pos, _ = _read_vint(head, 0, strip_marker=False)
+    header_size, pos, _ = _read_vint(head, pos, strip_marker=True)
+    doc_type = b"webm" if b"webm" in head[pos:pos + header_size] else b"matroska"
+    meta = AudioMetadata(container=doc_type.decode())
+
+    timecode_scale = 1_000_000
+    duration_ticks = None
+    is_audio_track = False
+    pos += header_size
+
+    # Recorrido plano: se desciende en los elementos contenedor y se
+    # saltan los demás; se detiene en el primer Cluster (datos de audio)
+    while pos < len(head):
+        try:
+            element_id, data_pos, _ = _read_vint(head, pos, strip_marker=False)
+            size, data_pos, unknown = _read_vint(head, data_pos, strip_marker=True)
+        except AudioProbeError:
+            break
+
+        if element_id == MKV_CLUSTER:
+            break
+        if element_id in MKV_MASTER_ELEMENTS:
+            if element_id == MKV_TRACK_ENTRY:
+                is_audio_track = False
+            pos = data_pos
+            continue
+        if unknown:
+            break
+
+        value = head[data_pos:data_pos + size]
+        if element_id == MKV_TIMECODE_SCALE:
+            timecode_scale = _read_uint(value)
+        elif element_id == MKV_DURATION:
+            duration_ticks = _read_float(value)
+        elif element_id == MKV_TRACK_TYPE:
+            is_audio_track = _read_uint(value) == 2
+        elif element_id == MKV_CODEC_ID and meta.codec is None:
+            codec_id = value.rstrip(b"\x00").decode("ascii", "replace")
+            if codec_id.startswith("A_") or is_audio_track:
+                meta.codec = MKV_CODECS.get(codec_id, codec_id.lower())
+        elif element_id == MKV_SAMPLING_FREQUENCY and meta.sample_rate is None:
+            meta.sample_rate = int(_read_float(value))
+        elif element_id == MKV_CHANNELS and meta.channels is None:
+            meta.channels = _read_uint(value)
+        pos = data_pos + size
+
+    if meta.codec is None:
+        raise AudioProbeError("WebM file has no audio track")
+
+    if duration_ticks:
+        meta.duration = duration_ticks * timecode_scale / 1e9
+    else:
+        # MediaRecorder no escribe Duration: estimar con el último Cluster
+        last_timecode = _last_cluster_timecode(tail)
+        if last_timecode is not None:
+            meta.duration = last_timecode * timecode_scale / 1e9
+        elif full_scan:
+            meta.duration = _scan_webm_duration(f, file_size, timecode_scale)
+    return meta
+
+def _scan_webm_duration(f: BinaryIO, file_size: int, timecode_scale: int) -> Optional[float]:
+    """
+    Duración de un WebM sin Cluster en los últimos TAIL_SIZE bytes
+
+    Pasa con Clusters grandes (un solo Cluster de tamaño desconocido).
+    Se amplía la ventana final al doble hasta encontrar el inicio del
+    último Cluster; en el peor caso se lee el archivo completo.
+    """
+    window = TAIL_SIZE * 2
+    while True:
+        start = max(file_size - window, 0)
+        last_timecode = _last_cluster_timecode(_read_at(f, start, file_size - start))
+        if last_timecode is not None:
+            return last_timecode * timecode_scale / 1e9
+        if start == 0:
+            return None
+        window *= 2
+
+def _last_cluster_timecode(tail: bytes) -> Optional[int]:
+    """Timecode del último bloque del último Cluster presente en el final"""
+    search_end = len(tail)
+    while True:
+        index = tail.rfind(MKV_CLUSTER_ID_BYTES, 0, search_end)
+        if index < 0:
+            return None
+        try:
+            _, pos, _ = _read_vint(tail, index + 4, strip_marker=True)
+            element_id, pos, _ = _read_vint(tail, pos, strip_marker=False)
+            if element_id == MKV_TIMECODE:
+                size, pos, _ = _read_vint(tail, pos, strip_marker=True)
+                cluster_timecode = _read_uint(tail[pos:pos + size])
+                return cluster_timecode + _last_block_offset(tail, pos + size)
+        except AudioProbeError:
+            pass
+        # Falso positivo dentro de datos de audio: seguir buscando atrás
+        search_end = index
+
+def _last_block_offset(data: bytes, pos: int) -> int:
+    """Mayor timecode relativo de los bloques de un Cluster"""
+    max_offset = 0
+    while pos < len(data):
+        try:
+            element_id, data_pos, _ = _read_vint(data, pos, strip_marker=False)
+            size, data_pos, unknown = _read_vint(data, data_pos, strip_marker=True)
+        except AudioProbeError:
+            break
+        if element_id == MKV_BLOCK_GROUP:
+            pos = data_pos
+            continue
+        if element_id in (MKV_SIMPLE_BLOCK, MKV_BLOCK) and data_pos + 3 <= len(data):
+            _, block_pos, _ = _read_vint(data, data_pos, strip_marker=True)
+            if block_pos + 2 <= len(data):
+                max_offset = max(max_offset, struct.unpack(">h", data[block_pos:block_pos + 2])[0])
+        elif element_id == MKV_CLUSTER or unknown:
+            break
+        pos = data_pos + size
+    return max_offset
+
+# === OGG ===
+
+def _probe_ogg(head: bytes, tail: bytes) -> AudioMetadata:
+    if len(head) < 28:
+        raise AudioProbeError("Truncated Ogg page")
+    segments = head[26]
+    packet = head[27 + segments:]
+
+    if packet.startswith(b"OpusHead") and len(packet) >= 19:
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        input_rate = struct.unpack("<I", packet[12:16])[0]
+        meta = AudioMetadata("ogg", "opus", sample_rate=input_rate or 48000, channels=channels)
+        granule_rate, granule_offset = 48000, pre_skip
+    elif packet.startswith(b"\x01vorbis") and len(packet) >= 16:
+        channels = packet[11]
+        rate = struct.unpack("<I", packet[12:16])[0]
+        meta = AudioMetadata("ogg", "vorbis", sample_rate=rate, channels=channels)
+        granule_rate, granule_offset = rate, 0
+    elif packet.startswith(b"\x7fFLAC"):
+        meta = _probe_flac_streaminfo(packet[9:], "ogg")
+        granule_rate, granule_offset = meta.sample_rate, 0
+    else:
+        raise AudioProbeError("Unsupported Ogg codec")
+
+    # Duración: granule position de la última página
+    index = tail.rfind(b"OggS")
+    if index >= 0 and index + 14 <= len(tail) and granule_rate:
+        granule = struct.unpack("<q", tail[index + 6:index + 14])[0]
+        if granule > 0:
+            meta.duration = max(granule - granule_offset, 0) / granule_rate
+    return meta
+
+# === FLAC ===
+
+def _probe_flac_streaminfo(block: bytes, container: str = "flac") -> AudioMetadata:
+    if len(block) < 18:
+        raise AudioProbeError("Truncated FLAC STREAMINFO")
+    bits = int.from_bytes(block[10:18], "big")
+    sample_rate = bits >> 44
+    channels = ((bits >> 41) & 0x7) + 1
+    total_samples = bits & 0xFFFFFFFFF
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return AudioMetadata(container, "flac", duration, sample_rate, channels)
+
+def _probe_flac(head: bytes) -> AudioMetadata:
+    # fLaC + cabecera de bloque (4 bytes) + STREAMINFO
+    return _probe_flac_streaminfo(head[8:])
+
+# === WAV ===
+
+WAV_FORMATS = {1: "pcm", 3: "pcm_float", 6: "alaw", 7: "mulaw", 0xFFFE: "pcm"}
+
+def _probe_wav(head: bytes, file_size: int) -> AudioMetadata:
+    pos = 12
+    meta = AudioMetadata("wav")
+    byte_rate = 0
+    while pos + 8 <= len(head):
+        chunk_id = head[pos:pos + 4]
+        chunk_size = struct.unpack("<I", head[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt " and pos + 24 <= len(head):
+            format_tag, channels, sample_rate, byte_rate, _, bits = struct.unpack(
+                "<HHIIHH", head[pos + 8:pos + 24]
+            )
+            meta.codec = WAV_FORMATS.get(format_tag, f"wav_0x{format_tag:x}")
+            if meta.codec == "pcm":
+                meta.codec = f"pcm_s{bits}le"
+            meta.channels = channels
+            meta.sample_rate = sample_rate
+        elif chunk_id == b"data":
+            if not byte_rate:
+                raise AudioProbeError("WAV data chunk before fmt chunk")
+            # Grabaciones en streaming dejan el tamaño en 0 o 0xFFFFFFFF
+            data_size = chunk_size
+            if data_size in (0, 0xFFFFFFFF):
+                data_size = max(file_size - pos - 8, 0)
+            meta.duration = data_size / byte_rate
+            return meta
+        pos += 8 + chunk_size + (chunk_size & 1)
+
+    if meta.codec is None:
+        raise AudioProbeError("WAV file without fmt chunk")
+    return meta
+
+# === MP3 ===
+
+MP3_BITRATES = {
+    # (versión MPEG-1, capa III) y (MPEG-2/2.5, capa III), en kbps
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+def _id3_size(data: bytes) -> int:
+    if not data.startswith(b"ID3") or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _probe_mp3(f: BinaryIO, head: bytes, file_size: int) -> AudioMetadata:
+    audio_start = _id3_size(head)
+    frame = _read_at(f, audio_start, 4096) if audio_start else head
+
+    # Buscar la primera sincronización de frame válida
+    for pos in range(0, max(len(frame) - 4, 0)):
+        if frame[pos] != 0xFF or (frame[pos + 1] & 0xE0) != 0xE0:
+            continue
+        header = struct.unpack(">I", frame[pos:pos + 4])[0]
+        version_bits = (header >> 19) & 0x3
+        layer_bits = (header >> 17) & 0x3
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        break
+    else:
+        raise AudioProbeError("No MPEG audio frame found")
+
+    mpeg1 = version_bits == 3
+    bitrate = MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    channel_mode = (header >> 6) & 0x3
+    channels = 1 if channel_mode == 3 else 2
+    samples_per_frame = 1152 if mpeg1 else 576
+    meta = AudioMetadata("mp3", "mp3", sample_rate=sample_rate, channels=channels)
+
+    # Cabecera Xing/Info (VBR) con número total de frames
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing_pos = pos + 4 + side_info
+    tag = frame[xing_pos:xing_pos + 4]
+    if tag in (b"Xing", b"Info") and len(frame) >= xing_pos + 12:
+        flags = struct.unpack(">I", frame[xing_pos + 4:xing_pos + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack(">I", frame[xing_pos + 8:xing_pos + 12])[0]
+            meta.duration = frames * samples_per_frame / sample_rate
+            return meta
+
+    # Cabecera VBRI (Fraunhofer): siempre 32 bytes tras la cabecera del frame
+    vbri_pos = pos + 4 + 32
+    if frame[vbri_pos:vbri_pos + 4] == b"VBRI" and len(frame) >= vbri_pos + 18:
+        frames = struct.unpack(">I", frame[vbri_pos + 14:vbri_pos + 18])[0]
+        meta.duration = frames * samples_per_frame / sample_rate
+        return meta
+
+    # CBR: duración por tamaño
+    audio_bytes = file_size - audio_start - pos
+    meta.duration = audio_bytes * 8 / bitrate if bitrate else None
+    return meta
+
+# === MP4 / M4A (Safari MediaRecorder) ===
+
+def _iter_boxes(f: BinaryIO, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        header = _read_at(f, pos, 16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1 and len(header) >= 16:
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            raise AudioProbeError("Invalid MP4 box size")
+        yield box_type, pos + header_size, pos + size
+        pos += size
+
+def _find_box(f: BinaryIO, start: int, end: int, path: Tuple[bytes, ...]) -> Optional[Tuple[int, int]]:
+    for box_type, data_start, box_end in _iter_boxes(f, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return data_start, box_end
+            return _find_box(f, data_start, box_end, path[1:])
+    return None
+
+def _probe_mp4(f: BinaryIO, file_size: int) -> AudioMetadata:
+    meta = AudioMetadata("mp4")
+    moov = _find_box(f, 0, file_size, (b"moov",))
+    if moov is None:
+        raise AudioProbeError("MP4 file without moov box")
+
+    mvhd = _find_box(f, moov[0], moov[1], (b"mvhd",))
+    if mvhd:
+        data = _read_at(f, mvhd[0], 32)
+        if data[0] == 1:
+            timescale, duration = struct.unpack(">IQ", data[20:32])
+        else:
+            timescale, duration = struct.unpack(">II", data[12:20])
+        # MP4 fragmentado (Safari MediaRecorder): mvhd con duración 0
+        if timescale and duration:
+            meta.duration = duration / timescale
+
+    for box_type, trak_start, trak_end in _iter_boxes(f, moov[0], moov[1]):
+        if box_type != b"trak":
+            continue
+        stsd = _find_box(f, trak_start, trak_end, (b"mdia", b"minf", b"stbl", b"stsd"))
+        if not stsd:
+            continue
+        # stsd: versión/flags (4) + número de entradas (4) + primera entrada
+        entry = _read_at(f, stsd[0] + 8, 36)
+        if len(entry) < 36:
+            continue
+        codec = entry[4:8].decode("ascii", "replace")
+        if codec in ("mp4a", "Opus", "fLaC", "alac"):
+            meta.codec = {"mp4a": "aac", "Opus": "opus", "fLaC": "flac"}.get(codec, codec)
+            meta.channels = struct.unpack(">H", entry[24:26])[0]
+            meta.sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+            if meta.duration is None:
+                meta.duration = _fragmented_mp4_duration(f, file_size, moov, trak_start, trak_end)
+            break
+
+    if meta.codec is None:
+        raise AudioProbeError("MP4 file has no audio track")
+    return meta
+
+def _fragmented_mp4_duration(
+    f: BinaryIO,
+    file_size: int,
+    moov: Tuple[int, int],
+    trak_start: int,
+    trak_end: int
+) -> Optional[float]:
+    """
+    Duración de una pista en un MP4 fragmentado
+
+    Suma las duraciones de muestra de los trun de cada moof (o las de
+    tfhd/trex por defecto). Solo se leen las cabeceras de las cajas: los
+    mdat se saltan.
+    """
+    tkhd = _find_box(f, trak_start, trak_end, (b"tkhd",))
+    mdhd = _find_box(f, trak_start, trak_end, (b"mdia", b"mdhd"))
+    if not tkhd or not mdhd:
+        return None
+    data = _read_at(f, tkhd[0], 24)
+    track_id = struct.unpack(">I", data[20:24] if data[0] == 1 else data[12:16])[0]
+    data = _read_at(f, mdhd[0], 24)
+    timescale = struct.unpack(">I", data[20:24] if data[0] == 1 else data[12:16])[0]
+    if not timescale:
+        return None
+
+    default_duration = 0
+    mvex = _find_box(f, moov[0], moov[1], (b"mvex",))
+    if mvex:
+        for box_type, data_start, _ in _iter_boxes(f, mvex[0], mvex[1]):
+            data = _read_at(f, data_start, 16)
+            if box_type == b"trex" and struct.unpack(">I", data[4:8])[0] == track_id:
+                default_duration = struct.unpack(">I", data[12:16])[0]
+
+    total = 0
+    for box_type, moof_start, moof_end in _iter_boxes(f, 0, file_size):
+        if box_type != b"moof":
+            continue
+        for traf_type, traf_start, traf_end in _iter_boxes(f, moof_start, moof_end):
+            if traf_type != b"traf":
+                continue
+            tfhd = _find_box(f, traf_start, traf_end, (b"tfhd",))
+            if not tfhd:
+                continue
+            data = _read_at(f, tfhd[0], tfhd[1] - tfhd[0])
+            flags = int.from_bytes(data[1:4], "big")
+            if struct.unpack(">I", data[4:8])[0] != track_id:
+                continue
+            # Campos opcionales de tfhd en orden: base_data_offset (8),
+            # sample_description_index (4), default_sample_duration (4)
+            pos = 8 + (8 if flags & 0x1 else 0) + (4 if flags & 0x2 else 0)
+            traf_duration = struct.unpack(">I", data[pos:pos + 4])[0] if flags & 0x8 else default_duration
+
+            for run_type, run_start, run_end in _iter_boxes(f, traf_start, traf_end):
+                if run_type != b"trun":
+                    continue
+                data = _read_at(f, run_start, run_end - run_start)
+                flags = int.from_bytes(data[1:4], "big")
+                sample_count = struct.unpack(">I", data[4:8])[0]
+                if not flags & 0x100:
+                    total += sample_count * traf_duration
+                    continue
+                # Registro por muestra: duración, tamaño, flags, offset de composición
+                pos = 8 + (4 if flags & 0x1 else 0) + (4 if flags & 0x4 else 0)
+                record = 4 * bin(flags & 0xF00).count("1")
+                for index in range(sample_count):
+                    offset = pos + index * record
+                    if offset + 4 > len(data):
+                        break
+                    total += struct.unpack(">I", data[offset:offset + 4])[0]
+
+    return total / timescale if total else None
+
+# === API ===
+
+def sniff_container(head: bytes) -> Optional[str]:
+    """Identificar el contenedor por sus bytes mágicos"""
+    if head.startswith(EBML_HEADER):
+        return "webm"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0):
+        return "mp3"
+    return None
+
+def probe_audio(f: BinaryIO, file_size: Optional[int] = None, full_scan: bool = False) -> AudioMetadata:
+    """
+    Leer metadata de un audio sin decodificarlo
+
+    Solo lee la cabecera y, si hace falta para la duración, el final del
+    archivo. Deja el cursor del archivo al inicio.
+
+    Args:
+        f: Archivo binario con seek
+        file_size: Tamaño total (se calcula si no se indica)
+        full_scan: Si la duración no está en la cabecera ni al final, leer
+            más del archivo hasta encontrarla (WebM con Clusters grandes)
+
+    Raises:
+        AudioProbeError si el formato no es reconocido o está corrupto
+    """
+    try:
+        if file_size is None:
+            f.seek(0, os.SEEK_END)
+            file_size = f.tell()
+
+        head = _read_at(f, 0, HEAD_SIZE)
+        container = sniff_container(head)
+        if container is None:
+            raise AudioProbeError("Unrecognized audio format")
+
+        tail = b""
+        if container in ("webm", "ogg"):
+            tail_start = max(file_size - TAIL_SIZE, 0)
+            if file_size <= len(head):
+                tail = head[tail_start:]
+            else:
+                tail = _read_at(f, tail_start, TAIL_SIZE)
+
+        if container == "webm":
+            return _probe_webm(f, head, tail, file_size, full_scan)
+        if container == "ogg":
+            return _probe_ogg(head, tail)
+        if container == "wav":
+            return _probe_wav(head, file_size)
+        if container == "flac":
+            return _probe_flac(head)
+        if container == "mp4":
+            return _probe_mp4(f, file_size)
+        return _probe_mp3(f, head, file_size)
+
+    except AudioProbeError:
+        raise
+    except (struct.error, IndexError, ValueError) as e:
+        raise AudioProbeError(f"Corrupt audio header: {e}")
+    finally:
+        f.seek(0)
+
+def probe_audio_file(path: str) -> AudioMetadata:
+    """Leer metadata de un audio en disco"""
+    with open(path, "rb") as f:
+        return probe_audio(f, os.path.getsize(path))
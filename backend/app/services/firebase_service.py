@@ -1,10 +1,28 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
+from google.api_core import exceptions as google_exceptions
+from google.cloud.firestore_v1 import FieldFilter
 from app.core.config import settings
-from typing import Optional, List, Dict, Any
+from app.core.metrics import firestore_operation, record_firestore_documents
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from datetime import datetime
+import asyncio
+import random
+import time
 import geohash2
 
+# Máximo de operaciones por WriteBatch permitido por Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+# Errores transitorios que justifican reintentar un lote
+RETRYABLE_WRITE_ERRORS = (
+    google_exceptions.Aborted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
+
 class FirebaseService:
     _instance = None
 
@@ -33,6 +51,7 @@ class FirebaseService:
 
     # === FIRESTORE OPERATIONS ===
 
+    @firestore_operation('create_story')
     async def create_story(self, story_data: Dict[str, Any]) -> str:
         """Crear un nuevo relato en Firestore"""
         try:
@@ -49,16 +68,19 @@ class FirebaseService:
             # Crear documento
             doc_ref = self.db.collection('stories').document()
             doc_ref.set(story_data)
+            record_firestore_documents('write')
 
             return doc_ref.id
         except Exception as e:
             print(f"Error creando story: {e}")
             raise
 
+    @firestore_operation('get_story')
     async def get_story(self, story_id: str) -> Optional[Dict[str, Any]]:
         """Obtener un relato por ID"""
         try:
             doc = self.db.collection('stories').document(story_id).get()
+            record_firestore_documents('read')
             if doc.exists:
                 data = doc.to_dict()
                 data['id'] = doc.id
@@ -68,16 +90,125 @@ class FirebaseService:
             print(f"Error obteniendo story: {e}")
             raise
 
+    @firestore_operation('update_story')
     async def update_story(self, story_id: str, update_data: Dict[str, Any]) -> bool:
         """Actualizar un relato"""
         try:
             update_data['updatedAt'] = firestore.SERVER_TIMESTAMP
             self.db.collection('stories').document(story_id).update(update_data)
+            record_firestore_documents('write')
             return True
         except Exception as e:
             print(f"Error actualizando story: {e}")
             return False
 
+    @firestore_operation('bulk_update')
+    async def bulk_update(
+        self,
+        updates: Iterable[Tuple[str, Dict[str, Any]]],
+        collection: str = 'stories',
+        batch_size: int = FIRESTORE_BATCH_LIMIT,
+        max_retries: int = 5,
+        touch_updated_at: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Actualizar muchos documentos con WriteBatch
+
+        Agrupa las escrituras en lotes de hasta 500 operaciones, reintenta
+        con backoff exponencial los errores transitorios y limita el ritmo
+        según la regla 500/50/5 de Firestore (FIRESTORE_BULK_OPS_PER_SECOND
+        al inicio, +50% cada 5 minutos). Si un lote falla por un error no
+        transitorio (p. ej. un documento inexistente) se reescribe documento
+        a documento para aislar los fallidos.
+
+        Args:
+            updates: Pares (document_id, campos)
+
+        Returns:
+            Dict con written, failed (lista de {id, error}), batches y retries
+        """
+        return await asyncio.to_thread(
+            self._bulk_update_sync,
+            list(updates),
+            collection,
+            min(batch_size, FIRESTORE_BATCH_LIMIT),
+            max_retries,
+            touch_updated_at
+        )
+
+    def _bulk_update_sync(
+        self,
+        updates: List[Tuple[str, Dict[str, Any]]],
+        collection: str,
+        batch_size: int,
+        max_retries: int,
+        touch_updated_at: bool
+    ) -> Dict[str, Any]:
+        collection_ref = self.db.collection(collection)
+        result = {'written': 0, 'failed': [], 'batches': 0, 'retries': 0}
+
+        started = time.monotonic()
+        window_start = started
+        window_ops = 0
+
+        for start in range(0, len(updates), batch_size):
+            chunk = updates[start:start + batch_size]
+
+            # Throttle: ops/s permitidas según el tiempo transcurrido
+            now = time.monotonic()
+            rate = settings.FIRESTORE_BULK_OPS_PER_SECOND * 1.5 ** int((now - started) // 300)
+            if now - window_start >= 1.0:
+                window_start, window_ops = now, 0
+            elif window_ops + len(chunk) > rate:
+                time.sleep(1.0 - (now - window_start))
+                window_start, window_ops = time.monotonic(), 0
+            window_ops += len(chunk)
+
+            for attempt in range(max_retries + 1):
+                batch = self.db.batch()
+                for doc_id, fields in chunk:
+                    fields = dict(fields)
+                    if touch_updated_at:
+                        fields['updatedAt'] = firestore.SERVER_TIMESTAMP
+                    batch.update(collection_ref.document(doc_id), fields)
+                try:
+                    batch.commit()
+                    record_firestore_documents('write', len(chunk))
+                    result['written'] += len(chunk)
+                    break
+                except RETRYABLE_WRITE_ERRORS as e:
+                    if attempt == max_retries:
+                        result['failed'].extend({'id': doc_id, 'error': str(e)} for doc_id, _ in chunk)
+                        break
+                    result['retries'] += 1
+                    time.sleep(min(2 ** attempt, 30) * (0.5 + random.random()))
+                except Exception:
+                    self._write_individually(collection_ref, chunk, touch_updated_at, result)
+                    break
+            result['batches'] += 1
+
+        return result
+
+    def _write_individually(
+        self,
+        collection_ref,
+        chunk: List[Tuple[str, Dict[str, Any]]],
+        touch_updated_at: bool,
+        result: Dict[str, Any]
+    ) -> None:
+        """Reescribir un lote fallido documento a documento"""
+        for doc_id, fields in chunk:
+            fields = dict(fields)
+            if touch_updated_at:
+                fields['updatedAt'] = firestore.SERVER_TIMESTAMP
+            try:
+                collection_ref.document(doc_id).update(fields)
+                record_firestore_documents('write')
+                result['written'] += 1
+            except Exception as e:
+                result['failed'].append({'id': doc_id, 'error': str(e)})
+
+    @firestore_operation('delete_story')
     async def delete_story(self, story_id: str) -> bool:
         """Eliminar un relato (soft delete)"""
         try:
@@ -85,11 +216,13 @@ class FirebaseService:
                 'status': 'archived',
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
+            record_firestore_documents('write')
             return True
         except Exception as e:
             print(f"Error eliminando story: {e}")
             return False
 
+    @firestore_operation('list_stories')
     async def list_stories(
         self,
         page: int = 1,
@@ -113,6 +246,7 @@ class FirebaseService:
             # Contar total (aproximado)
             total_docs = query.stream()
             total = sum(1 for _ in total_docs)
+            record_firestore_documents('streamed', total)
 
             # Paginación
             offset = (page - 1) * page_size
@@ -125,6 +259,7 @@ class FirebaseService:
                 data = doc.to_dict()
                 data['id'] = doc.id
                 stories.append(data)
+            record_firestore_documents('streamed', len(stories))
 
             return {
                 'stories': stories,
@@ -137,6 +272,72 @@ class FirebaseService:
             print(f"Error listando stories: {e}")
             raise
 
+    @firestore_operation('get_stories')
+    async def get_stories(
+        self,
+        story_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Leer varios relatos en una sola llamada batch (get_all)
+
+        Mantiene el orden de story_ids y omite los que no existen.
+        """
+        def fetch() -> Dict[str, Dict[str, Any]]:
+            collection = self.db.collection('stories')
+            refs = [collection.document(story_id) for story_id in dict.fromkeys(story_ids)]
+            found = {}
+            for doc in self.db.get_all(refs, field_paths=fields):
+                record_firestore_documents('read')
+                if doc.exists:
+                    data = doc.to_dict()
+                    data['id'] = doc.id
+                    found[doc.id] = data
+            return found
+
+        found = await asyncio.to_thread(fetch)
+        return [found[story_id] for story_id in dict.fromkeys(story_ids) if story_id in found]
+
+    @firestore_operation('list_stories_by_community')
+    async def list_stories_by_community(
+        self,
+        community: str,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Relatos de una comunidad (sin archivados), con proyección opcional"""
+        def fetch() -> List[Dict[str, Any]]:
+            query = self.db.collection('stories').where(
+                filter=FieldFilter('narrator.community', '==', community)
+            )
+            if fields:
+                query = query.select(list(dict.fromkeys([*fields, 'status'])))
+            stories = []
+            for doc in query.stream():
+                record_firestore_documents('streamed')
+                data = doc.to_dict()
+                if data.get('status') == 'archived':
+                    continue
+                data['id'] = doc.id
+                stories.append(data)
+            return stories
+
+        return await asyncio.to_thread(fetch)
+
+    def stream_stories(self, fields: Optional[List[str]] = None):
+        """
+        Recorrer todos los relatos (incluidos archivados) sin cargarlos en memoria
+
+        Síncrono: pensado para scripts y tareas en hilos. Con fields solo
+        se descargan esos campos.
+        """
+        query = self.db.collection('stories')
+        if fields:
+            query = query.select(fields)
+        for doc in query.stream():
+            record_firestore_documents('streamed')
+            yield doc.id, doc.to_dict()
+
+    @firestore_operation('find_nearby_stories')
     async def find_nearby_stories(
         self,
         latitude: float,
@@ -164,6 +365,7 @@ class FirebaseService:
 
                 docs = query.stream()
                 for doc in docs:
+                    record_firestore_documents('streamed')
                     data = doc.to_dict()
                     data['id'] = doc.id
                     stories.append(data)
@@ -176,6 +378,7 @@ class FirebaseService:
             print(f"Error buscando stories cercanos: {e}")
             raise
 
+    @firestore_operation('increment_views')
     async def increment_views(self, story_id: str) -> bool:
         """Incrementar contador de vistas"""
         try:
@@ -183,65 +386,11 @@ class FirebaseService:
             doc_ref.update({
                 'views': firestore.Increment(1)
             })
+            record_firestore_documents('write')
             return True
         except Exception as e:
             print(f"Error incrementando vistas: {e}")
             return False
 
-    # === STORAGE OPERATIONS ===
-
-    async def upload_file(
-        self,
-        file_path: str,
-        destination_blob_name: str,
-        content_type: str = 'application/octet-stream'
-    ) -> str:
-        """Subir archivo a Firebase Storage"""
-        try:
-            blob = self.bucket.blob(destination_blob_name)
-            blob.upload_from_filename(file_path, content_type=content_type)
-            blob.make_public()
-            return blob.public_url
-        except Exception as e:
-            print(f"Error subiendo archivo: {e}")
-            raise
-
-    async def upload_from_bytes(
-        self,
-        file_bytes: bytes,
-        destination_blob_name: str,
-        content_type: str = 'application/octet-stream'
-    ) -> str:
-        """Subir bytes a Firebase Storage"""
-        try:
-            blob = self.bucket.blob(destination_blob_name)
-            blob.upload_from_string(file_bytes, content_type=content_type)
-            blob.make_public()
-            return blob.public_url
-        except Exception as e:
-            print(f"Error subiendo bytes: {e}")
-            raise
-
-    async def delete_file(self, blob_name: str) -> bool:
-        """Eliminar archivo de Storage"""
-        try:
-            blob = self.bucket.blob(blob_name)
-            blob.delete()
-            return True
-        except Exception as e:
-            print(f"Error eliminando archivo: {e}")
-            return False
-
-    async def get_download_url(self, blob_name: str) -> Optional[str]:
-        """Obtener URL de descarga de un archivo"""
-        try:
-            blob = self.bucket.blob(blob_name)
-            if blob.exists():
-                return blob.public_url
-            return None
-        except Exception as e:
-            print(f"Error obteniendo URL: {e}")
-            return None
-
 # Singleton instance
 firebase_service = FirebaseService()
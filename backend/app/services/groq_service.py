@@ -1,13 +1,19 @@
 import httpx
 from groq import Groq
 from app.core.config import settings
+from app.core.metrics import GROQ_AUDIO_SECONDS, GROQ_LATENCY, GROQ_REQUESTS, GROQ_TOKENS
 from app.schemas.groq import (
     GroqTranscriptionResponse,
     GroqAnalysisResponse
 )
 from app.schemas.story import StoryCategory, CulturalSignificance
-from typing import Optional, Dict, Any
+from app.services.voice_activity import TimeOffsetMap, compact_for_transcription
+from app.services.workers import run_in_process
+from typing import Optional, Dict, Any, List, Callable
 import json
+import os
+import time
+from urllib.parse import urlparse
 
 class GroqService:
     def __init__(self):
@@ -18,12 +24,34 @@ class GroqService:
         # Usar Llama para análisis (actualizado - el modelo 3.1-70b fue descontinuado)
         self.llama_model = "llama-3.3-70b-versatile"
 
+    def _call(self, operation: str, method: Callable[..., Any], **kwargs) -> Any:
+        """Llamar a la API de Groq registrando latencia, tokens y segundos de audio"""
+        model = kwargs.get('model', 'unknown')
+        started = time.perf_counter()
+        try:
+            response = method(**kwargs)
+        except Exception:
+            GROQ_REQUESTS.inc(operation=operation, model=model, status="error")
+            raise
+        finally:
+            GROQ_LATENCY.observe(time.perf_counter() - started, operation=operation, model=model)
+
+        GROQ_REQUESTS.inc(operation=operation, model=model, status="ok")
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            GROQ_TOKENS.inc(getattr(usage, 'prompt_tokens', 0) or 0, model=model, type="prompt")
+            GROQ_TOKENS.inc(getattr(usage, 'completion_tokens', 0) or 0, model=model, type="completion")
+        duration = getattr(response, 'duration', None)
+        if duration:
+            GROQ_AUDIO_SECONDS.inc(duration, model=model)
+        return response
+
     async def transcribe_audio(self, audio_url: str, language: str = "ay") -> GroqTranscriptionResponse:
         """
         Transcribir audio usando Groq Whisper API
 
         Args:
-            audio_url: URL del audio en Firebase Storage
+            audio_url: URL del audio (local o firmada del backend de almacenamiento)
             language: Código de idioma (ay para aymara, es para español)
 
         Returns:
@@ -36,6 +64,34 @@ class GroqService:
                 audio_response.raise_for_status()
                 audio_bytes = audio_response.content
 
+            # Whisper infiere el formato por la extensión del nombre
+            extension = os.path.splitext(urlparse(audio_url).path)[1] or ".webm"
+            upload_name = f"audio{extension}"
+
+            # Recortar silencios largos antes de subir; el mapa de tiempos
+            # alinea los timestamps de Whisper con el audio original
+            offset_map = None
+            if settings.VAD_ENABLED:
+                try:
+                    compacted_bytes, map_data = await run_in_process(
+                        compact_for_transcription,
+                        settings.FFMPEG_BINARY,
+                        audio_bytes,
+                        settings.TRANSCRIPTION_SAMPLE_RATE,
+                        settings.TRANSCRIPTION_AUDIO_BITRATE_KBPS,
+                        settings.VAD_FRAME_MS,
+                        settings.VAD_ENERGY_MARGIN_DB,
+                        settings.VAD_MIN_SILENCE_MS,
+                        settings.VAD_KEEP_SILENCE_MS
+                    )
+                    if map_data:
+                        print(f"VAD: audio compactado de {len(audio_bytes)} a {len(compacted_bytes)} bytes")
+                        audio_bytes = compacted_bytes
+                        upload_name = "audio.ogg"
+                        offset_map = TimeOffsetMap.from_dict(map_data)
+                except Exception as e:
+                    print(f"VAD omitido, se envía el audio completo: {e}")
+
             # Mapear códigos de idioma
             # Nota: Aymara (ay) no está en los 99 idiomas oficiales de Whisper
             # Para aymara, usamos auto-detección primero, luego fallback a español
@@ -47,8 +103,10 @@ class GroqService:
                 # Whisper puede detectar el idioma automáticamente
                 try:
                     print("Intentando transcripción con auto-detección de idioma para aymara...")
-                    transcription = self.client.audio.transcriptions.create(
-                        file=("audio.webm", audio_bytes),
+                    transcription = self._call(
+                        "transcription",
+                        self.client.audio.transcriptions.create,
+                        file=(upload_name, audio_bytes),
                         model=self.whisper_model,
                         response_format="verbose_json"
                     )
@@ -59,8 +117,10 @@ class GroqService:
                 except Exception as e:
                     print(f"Auto-detección falló: {e}. Intentando con español como fallback...")
                     # Estrategia 2: Fallback a español
-                    transcription = self.client.audio.transcriptions.create(
-                        file=("audio.webm", audio_bytes),
+                    transcription = self._call(
+                        "transcription",
+                        self.client.audio.transcriptions.create,
+                        file=(upload_name, audio_bytes),
                         model=self.whisper_model,
                         language="es",
                         response_format="verbose_json"
@@ -71,8 +131,10 @@ class GroqService:
             else:
                 # Para otros idiomas soportados, usar directamente
                 print(f"Transcribiendo con idioma especificado: {language}")
-                transcription = self.client.audio.transcriptions.create(
-                    file=("audio.webm", audio_bytes),
+                transcription = self._call(
+                    "transcription",
+                    self.client.audio.transcriptions.create,
+                    file=(upload_name, audio_bytes),
                     model=self.whisper_model,
                     language=language,
                     response_format="verbose_json"
@@ -80,17 +142,51 @@ class GroqService:
                 transcription_text = transcription.text
                 detected_language = language
 
+            duration = getattr(transcription, 'duration', None)
+            if duration is not None and offset_map:
+                duration = offset_map.to_original(duration)
+
             return GroqTranscriptionResponse(
                 text=transcription_text or transcription.text,
                 confidence=1.0,  # Groq no proporciona confidence score
                 language=detected_language or language,
-                duration=transcription.duration if hasattr(transcription, 'duration') else None
+                duration=duration,
+                segments=self._extract_segments(transcription, offset_map)
             )
 
         except Exception as e:
             print(f"Error en transcripción Groq: {e}")
             raise Exception(f"Failed to transcribe audio: {str(e)}")
 
+    def _extract_segments(
+        self,
+        transcription: Any,
+        offset_map: Optional[TimeOffsetMap] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtener los segmentos con timestamps de una respuesta verbose_json
+
+        Si el audio se compactó, los tiempos se trasladan al audio original.
+        """
+        raw_segments = getattr(transcription, 'segments', None)
+        if not raw_segments:
+            return None
+
+        segments = []
+        for segment in raw_segments:
+            get = segment.get if isinstance(segment, dict) else lambda key: getattr(segment, key, None)
+            start, end = get('start'), get('end')
+            if start is None or end is None:
+                continue
+            if offset_map:
+                start, end = offset_map.to_original(start), offset_map.to_original(end)
+            segments.append({
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "text": (get('text') or "").strip()
+            })
+        return segments
+
     async def analyze_content(
         self,
         transcription: str,
@@ -132,7 +228,9 @@ Devuelve SOLO un objeto JSON con esta estructura exacta:
 """
 
             # Llamar a Groq con Llama
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = self._call(
+                "analysis",
+                self.client.chat.completions.create,
                 messages=[
                     {
                         "role": "system",
@@ -218,7 +316,10 @@ Devuelve SOLO un objeto JSON con esta estructura exacta:
                 "transcription": {
                     "aymara": transcription_result.text,
                     "spanish": analysis_result.spanish_translation,
-                    "confidence": transcription_result.confidence
+                    "confidence": transcription_result.confidence,
+                    "segments": [
+                        segment.model_dump() for segment in transcription_result.segments
+                    ] if transcription_result.segments else None
                 },
                 "keywords": analysis_result.keywords,
                 "category": analysis_result.category.value,
@@ -1,11 +1,39 @@
 import os
+import json
 import uuid
-import shutil
+import base64
+import hashlib
 from pathlib import Path
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Optional, AsyncIterator
 from fastapi import UploadFile
 from app.core.config import settings
 
+# Tamaño de bloque para lectura/escritura de archivos grandes
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Algoritmos aceptados en la cabecera Upload-Checksum
+CHECKSUM_ALGORITHMS = ("sha256", "sha1", "md5")
+
+class UploadNotFoundError(Exception):
+    """La subida reanudable no existe o ya expiró"""
+
+class UploadOffsetMismatchError(Exception):
+    """El offset enviado por el cliente no coincide con el del servidor"""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Upload offset mismatch, expected {expected}")
+        self.expected = expected
+
+class UploadChecksumMismatchError(Exception):
+    """El checksum del fragmento no coincide con los bytes recibidos"""
+
+class UploadTooLargeError(Exception):
+    """El fragmento excede el tamaño declarado o el máximo permitido"""
+
+class HardLinkUnsupportedError(OSError):
+    """El sistema de archivos de storage/ no admite hard links (requeridos por el almacén de blobs)"""
+
 class LocalStorageService:
     """
     Servicio de almacenamiento local para archivos de audio
@@ -17,15 +45,168 @@ class LocalStorageService:
         self.base_dir = Path("storage")
         self.audio_dir = self.base_dir / "audios"
         self.qr_dir = self.base_dir / "qr"
+        self.uploads_dir = self.base_dir / "uploads"
+        # Almacén direccionado por contenido (SHA-256) para deduplicar audios
+        self.blobs_dir = self.base_dir / "blobs"
+        # Archivos huérfanos apartados por el recolector antes de borrarlos
+        self.quarantine_dir = self.base_dir / "quarantine"
+        # Derivados regenerables (se puede borrar en cualquier momento)
+        self.cache_dir = self.base_dir / "cache"
 
         # Crear directorios si no existen
         self.audio_dir.mkdir(parents=True, exist_ok=True)
         self.qr_dir.mkdir(parents=True, exist_ok=True)
+        self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+
+    def new_audio_filename(self, story_id: Optional[str] = None, suffix: str = ".webm") -> str:
+        """Generar nombre único para un audio"""
+        if story_id:
+            return f"{story_id}_{uuid.uuid4().hex[:8]}{suffix}"
+        return f"{uuid.uuid4().hex}{suffix}"
+
+    def _audio_result(
+        self,
+        filename: str,
+        file_path: Path,
+        content_type: Optional[str],
+        digest: Optional[str] = None,
+        deduplicated: bool = False
+    ) -> dict:
+        """Construir el dict de resultado de una subida de audio"""
+        result = {
+            "filename": filename,
+            "path": str(file_path),
+            "url": f"/storage/audios/{filename}",
+            "size": os.path.getsize(file_path),
+            "content_type": content_type or "audio/webm"
+        }
+        if digest:
+            result["sha256"] = digest
+            result["content_url"] = self.get_blob_url(digest, Path(filename).suffix)
+            result["deduplicated"] = deduplicated
+        return result
+
+    # === ALMACÉN DIRECCIONADO POR CONTENIDO ===
+
+    def get_blob_path(self, digest: str, suffix: str = ".webm") -> Path:
+        """Ruta del blob para un hash SHA-256 (prefijo de 2 caracteres)"""
+        return self.blobs_dir / digest[:2] / f"{digest}{suffix}"
+
+    def get_blob_url(self, digest: str, suffix: str = ".webm") -> str:
+        """URL pública (relativa) e inmutable de un blob"""
+        return f"/storage/blobs/{digest[:2]}/{digest}{suffix}"
+
+    def hash_file(self, file_path: Path) -> str:
+        """Calcular el SHA-256 de un archivo leyendo por bloques"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def blob_refcount(self, blob_path: Path) -> int:
+        """
+        Número de audios que apuntan a un blob
+
+        Cada alias en storage/audios es un hard link al blob, así que el
+        contador de enlaces del sistema de archivos es el contador de
+        referencias (menos el propio blob).
+        """
+        try:
+            return blob_path.stat().st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def store_blob(self, source_path: Path, alias_path: Path, digest: Optional[str] = None) -> tuple:
+        """
+        Mover un archivo al almacén de blobs y crear su alias
+
+        Si ya existe un blob con el mismo contenido, el archivo fuente se
+        descarta y el alias apunta al blob existente.
+
+        Args:
+            source_path: Archivo temporal con el contenido
+            alias_path: Ruta pública del audio (storage/audios/...)
+            digest: SHA-256 ya calculado (opcional)
+
+        Returns:
+            (digest, deduplicated)
+        """
+        digest = digest or self.hash_file(source_path)
+        blob_path = self.get_blob_path(digest, alias_path.suffix)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # os.link falla si el blob ya existe: crear y comprobar en un solo paso
+        # (dos subidas idénticas simultáneas no pueden reemplazarse el blob)
+        try:
+            self._hard_link(source_path, blob_path)
+            deduplicated = False
+        except FileExistsError:
+            deduplicated = True
+
+        self._link_alias(blob_path, alias_path)
+        source_path.unlink()
+        return digest, deduplicated
+
+    @staticmethod
+    def _hard_link(source: Path, target: Path) -> None:
+        """os.link que falla de forma explícita si el FS no admite hard links"""
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            # Una copia tendría st_nlink == 1 y el recolector y release_blob
+            # la tratarían como blob sin referencias
+            raise HardLinkUnsupportedError(
+                e.errno, f"Hard links are required by the blob store ({target.parent}): {e.strerror}"
+            ) from e
+
+    def _link_alias(self, blob_path: Path, alias_path: Path) -> None:
+        """Crear el alias como hard link al blob (reemplazo atómico)"""
+        tmp_alias = alias_path.with_name(f".{alias_path.name}.tmp")
+        tmp_alias.unlink(missing_ok=True)
+        self._hard_link(blob_path, tmp_alias)
+        os.replace(tmp_alias, alias_path)
+
+    def migrate_audio_to_blob(self, alias_path: Path) -> tuple:
+        """
+        Convertir un audio existente (layout plano) en alias de un blob
+
+        Returns:
+            (digest, deduplicated)
+        """
+        digest = self.hash_file(alias_path)
+        blob_path = self.get_blob_path(digest, alias_path.suffix)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Primer archivo con este contenido: el blob es un enlace al mismo inodo
+        try:
+            self._hard_link(alias_path, blob_path)
+            return digest, False
+        except FileExistsError:
+            pass
+
+        if not os.path.samefile(blob_path, alias_path):
+            # Contenido repetido: el alias pasa a apuntar al blob existente
+            self._link_alias(blob_path, alias_path)
+        return digest, True
+
+    def release_blob(self, alias_path: Path) -> None:
+        """Borrar el blob de un alias si este es su última referencia"""
+        # nlink == 2: solo quedan el blob y el alias que está por borrarse
+        if alias_path.stat().st_nlink != 2:
+            return
+        blob_path = self.get_blob_path(self.hash_file(alias_path), alias_path.suffix)
+        if blob_path.exists() and os.path.samefile(blob_path, alias_path):
+            blob_path.unlink()
 
     async def upload_audio(
         self,
         file: UploadFile,
-        story_id: Optional[str] = None
+        story_id: Optional[str] = None,
+        suffix: str = ".webm"
     ) -> dict:
         """
         Subir archivo de audio al almacenamiento local
@@ -33,37 +214,33 @@ class LocalStorageService:
         Args:
             file: Archivo de audio (UploadFile de FastAPI)
             story_id: ID del relato (opcional)
+            suffix: Extensión del contenedor detectado (define el tipo MIME)
 
         Returns:
             dict con información del archivo subido
         """
         try:
             # Generar nombre único
-            if story_id:
-                filename = f"{story_id}_{uuid.uuid4().hex[:8]}.webm"
-            else:
-                filename = f"{uuid.uuid4().hex}.webm"
-
-            # Ruta completa
-            file_path = self.audio_dir / filename
+            filename = self.new_audio_filename(story_id, suffix)
 
-            # Guardar archivo
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # Ruta completa (layout fragmentado)
+            file_path = self._new_file_path(self.audio_dir, filename)
 
-            # Obtener tamaño
-            file_size = os.path.getsize(file_path)
+            # Guardar en temporal calculando el hash al vuelo
+            tmp_path = self.uploads_dir / f"{uuid.uuid4().hex}.tmp"
+            digest = hashlib.sha256()
+            try:
+                with open(tmp_path, "wb") as buffer:
+                    for block in iter(lambda: file.file.read(COPY_BUFFER_SIZE), b""):
+                        digest.update(block)
+                        buffer.write(block)
 
-            # Generar URL pública (relativa al servidor)
-            public_url = f"/storage/audios/{filename}"
+                # Contenido repetido (reintentos, otros dispositivos) reutiliza el blob
+                sha256, deduplicated = self.store_blob(tmp_path, file_path, digest.hexdigest())
+            finally:
+                tmp_path.unlink(missing_ok=True)
 
-            return {
-                "filename": filename,
-                "path": str(file_path),
-                "url": public_url,
-                "size": file_size,
-                "content_type": file.content_type or "audio/webm"
-            }
+            return self._audio_result(filename, file_path, file.content_type, sha256, deduplicated)
 
         except Exception as e:
             print(f"Error subiendo audio: {e}")
@@ -73,7 +250,8 @@ class LocalStorageService:
         self,
         image_bytes: bytes,
         story_id: str,
-        filename_suffix: str = ""
+        filename_suffix: str = "",
+        extension: str = "png"
     ) -> str:
         """
         Guardar código QR generado
@@ -82,14 +260,15 @@ class LocalStorageService:
             image_bytes: Bytes de la imagen QR
             story_id: ID del relato
             filename_suffix: Sufijo para el nombre (ej: "_printable")
+            extension: Extensión del archivo (png, svg, pdf)
 
         Returns:
             URL pública del QR
         """
         try:
             # Nombre del archivo
-            filename = f"{story_id}{filename_suffix}.png"
-            file_path = self.qr_dir / filename
+            filename = f"{story_id}{filename_suffix}.{extension}"
+            file_path = self._new_file_path(self.qr_dir, filename)
 
             # Guardar imagen
             with open(file_path, "wb") as f:
@@ -104,20 +283,123 @@ class LocalStorageService:
             print(f"Error guardando QR: {e}")
             raise Exception(f"Failed to save QR: {str(e)}")
 
+    # === LAYOUT FRAGMENTADO ===
+
+    def shard_for(self, filename: str) -> Path:
+        """Subdirectorio ab/cd/ derivado del hash del nombre"""
+        name_hash = hashlib.md5(filename.encode("utf-8")).hexdigest()
+        return Path(name_hash[:2]) / name_hash[2:4]
+
+    def _sharded_path(self, directory: Path, filename: str) -> Path:
+        return directory / self.shard_for(filename) / filename
+
+    def _new_file_path(self, directory: Path, filename: str) -> Path:
+        """Ruta fragmentada para un archivo nuevo (crea el subdirectorio)"""
+        file_path = self._sharded_path(directory, filename)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        return file_path
+
+    def _resolve_path(self, directory: Path, filename: str) -> Path:
+        """
+        Resolver un archivo en el layout fragmentado o en el plano heredado
+
+        Si no existe en ninguno se devuelve la ruta fragmentada, que es
+        también donde queda un archivo que la migración en línea movió
+        entre ambas comprobaciones.
+        """
+        # Nombres con separadores nunca son válidos (path traversal)
+        if Path(filename).name != filename:
+            raise ValueError(f"Invalid filename: {filename}")
+
+        sharded = self._sharded_path(directory, filename)
+        if sharded.exists():
+            return sharded
+        legacy = directory / filename
+        if legacy.exists():
+            return legacy
+        return sharded
+
+    def new_audio_path(self, filename: str) -> Path:
+        """Ruta donde escribir un audio nuevo (o derivado) en su shard"""
+        return self._new_file_path(self.audio_dir, filename)
+
+    def _filename_from_url(self, url: Optional[str], prefixes: tuple) -> Optional[str]:
+        if not url:
+            return None
+        path = url
+        if path.startswith(settings.BASE_URL):
+            path = path[len(settings.BASE_URL):]
+        for prefix in prefixes:
+            if path.startswith(prefix):
+                filename = path[len(prefix):].split("?", 1)[0]
+                if filename and Path(filename).name == filename:
+                    return filename
+        return None
+
+    def audio_filename_from_url(self, url: Optional[str]) -> Optional[str]:
+        """
+        Extraer el nombre de archivo de una URL de audio local
+
+        Acepta URLs relativas o absolutas (con BASE_URL) de /storage/audios/
+        y /api/v1/media/audio/. Devuelve None si el audio no es local.
+        """
+        return self._filename_from_url(
+            url, ("/storage/audios/", f"{settings.API_V1_STR}/media/audio/")
+        )
+
+    def qr_filename_from_url(self, url: Optional[str]) -> Optional[str]:
+        """Extraer el nombre de archivo de una URL de QR local"""
+        return self._filename_from_url(url, ("/storage/qr/",))
+
     def get_audio_path(self, filename: str) -> Path:
         """Obtener ruta completa de un audio"""
-        return self.audio_dir / filename
+        return self._resolve_path(self.audio_dir, filename)
 
     def get_qr_path(self, filename: str) -> Path:
         """Obtener ruta completa de un QR"""
-        return self.qr_dir / filename
+        return self._resolve_path(self.qr_dir, filename)
+
+    def iter_files(self, directory: Path):
+        """Recorrer archivos de ambos layouts (ignora temporales ocultos)"""
+        for path in directory.rglob("*"):
+            if path.is_file() and not path.name.startswith("."):
+                yield path
+
+    def migrate_to_sharded(self, file_path: Path) -> Optional[Path]:
+        """
+        Mover un archivo del layout plano a su shard sin interrumpir lecturas
+
+        Se crea primero el hard link en el shard y luego se borra el
+        original, así el archivo es visible en todo momento por al menos
+        una de las dos rutas que consulta _resolve_path.
+
+        Returns:
+            Nueva ruta, o None si ya estaba migrado
+        """
+        directory = file_path.parent
+        target = self._new_file_path(directory, file_path.name)
+        if target.exists():
+            if os.path.samefile(target, file_path):
+                file_path.unlink()
+            return None
+        try:
+            os.link(file_path, target)
+            file_path.unlink()
+        except OSError:
+            # Sin hard links: rename atómico (mismo sistema de archivos)
+            os.replace(file_path, target)
+        return target
 
     def delete_audio(self, filename: str) -> bool:
         """Eliminar archivo de audio"""
         try:
-            file_path = self.audio_dir / filename
+            file_path = self.get_audio_path(filename)
             if file_path.exists():
+                self.release_blob(file_path)
                 file_path.unlink()
+                # Picos de forma de onda derivados del audio (fragmentados por
+                # su propio nombre: no comparten carpeta con el audio)
+                self.get_audio_path(f"{Path(filename).stem}.peaks").unlink(missing_ok=True)
                 return True
             return False
         except Exception as e:
@@ -127,7 +409,7 @@ class LocalStorageService:
     def delete_qr(self, filename: str) -> bool:
         """Eliminar archivo QR"""
         try:
-            file_path = self.qr_dir / filename
+            file_path = self.get_qr_path(filename)
             if file_path.exists():
                 file_path.unlink()
                 return True
@@ -144,5 +426,212 @@ class LocalStorageService:
         """Obtener URL pública de un QR"""
         return f"{settings.BASE_URL}/storage/qr/{filename}"
 
+    # === SUBIDAS REANUDABLES ===
+
+    def _upload_paths(self, upload_id: str) -> tuple:
+        """Rutas del archivo parcial y de su metadata"""
+        # Evitar path traversal: los IDs son hex generados por el servidor
+        if not upload_id.isalnum():
+            raise UploadNotFoundError(upload_id)
+        return (
+            self.uploads_dir / f"{upload_id}.part",
+            self.uploads_dir / f"{upload_id}.json"
+        )
+
+    def _save_upload_meta(self, meta: dict) -> None:
+        _, meta_path = self._upload_paths(meta["upload_id"])
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        # Reemplazo atómico para no dejar metadata corrupta si el proceso cae
+        os.replace(tmp_path, meta_path)
+
+    def create_upload(
+        self,
+        length: int,
+        story_id: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> dict:
+        """
+        Crear una subida reanudable
+
+        Args:
+            length: Tamaño total del archivo en bytes
+            story_id: ID del relato (opcional)
+            content_type: Tipo MIME declarado por el cliente
+
+        Returns:
+            dict con la metadata de la subida
+        """
+        self.cleanup_expired_uploads()
+
+        upload_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        meta = {
+            "upload_id": upload_id,
+            "length": length,
+            "offset": 0,
+            "story_id": story_id,
+            "content_type": content_type or "audio/webm",
+            "created_at": now.isoformat(),
+            "expires_at": (
+                now + timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRATION_HOURS)
+            ).isoformat()
+        }
+
+        part_path, _ = self._upload_paths(upload_id)
+        part_path.touch()
+        self._save_upload_meta(meta)
+        return meta
+
+    def get_upload_part_path(self, upload_id: str) -> Path:
+        """Ruta del archivo parcial de una subida reanudable"""
+        return self._upload_paths(upload_id)[0]
+
+    def get_upload(self, upload_id: str) -> dict:
+        """Obtener la metadata de una subida reanudable vigente"""
+        part_path, meta_path = self._upload_paths(upload_id)
+        if not meta_path.exists() or not part_path.exists():
+            raise UploadNotFoundError(upload_id)
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        if datetime.fromisoformat(meta["expires_at"]) < datetime.utcnow():
+            self.delete_upload(upload_id)
+            raise UploadNotFoundError(upload_id)
+
+        return meta
+
+    async def append_upload_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        chunk: AsyncIterator[bytes],
+        checksum: Optional[str] = None
+    ) -> dict:
+        """
+        Escribir un fragmento en una subida reanudable
+
+        El fragmento solo se confirma si el checksum coincide; de lo
+        contrario el archivo parcial se trunca al offset anterior y el
+        cliente puede reenviar únicamente ese fragmento.
+
+        Args:
+            upload_id: ID de la subida
+            offset: Offset declarado por el cliente (Upload-Offset)
+            chunk: Iterador asíncrono con los bytes del fragmento
+            checksum: Cabecera Upload-Checksum ("<algoritmo> <base64>")
+
+        Returns:
+            dict con la metadata actualizada
+        """
+        meta = self.get_upload(upload_id)
+        if offset != meta["offset"]:
+            raise UploadOffsetMismatchError(meta["offset"])
+
+        digest = None
+        expected_digest = None
+        if checksum:
+            try:
+                algorithm, encoded = checksum.split(" ", 1)
+                expected_digest = base64.b64decode(encoded.strip())
+            except ValueError:
+                raise UploadChecksumMismatchError("Malformed Upload-Checksum header")
+            if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+                raise UploadChecksumMismatchError(f"Unsupported checksum algorithm: {algorithm}")
+            digest = hashlib.new(algorithm.lower())
+
+        max_chunk = settings.RESUMABLE_UPLOAD_MAX_CHUNK_MB * 1024 * 1024
+        remaining = meta["length"] - offset
+        part_path, _ = self._upload_paths(upload_id)
+        written = 0
+
+        with open(part_path, "r+b") as f:
+            # Descartar bytes no confirmados de un intento previo interrumpido
+            f.truncate(offset)
+            f.seek(offset)
+            try:
+                async for data in chunk:
+                    written += len(data)
+                    if written > remaining or written > max_chunk:
+                        raise UploadTooLargeError(
+                            f"Chunk exceeds upload length or max chunk size ({max_chunk} bytes)"
+                        )
+                    if digest is not None:
+                        digest.update(data)
+                    f.write(data)
+
+                if digest is not None and digest.digest() != expected_digest:
+                    raise UploadChecksumMismatchError("Upload-Checksum does not match chunk")
+            except (UploadTooLargeError, UploadChecksumMismatchError):
+                f.truncate(offset)
+                raise
+            except BaseException:
+                # Conexión cortada: sin checksum los bytes recibidos son válidos
+                # y se conservan; el cliente reanuda desde el offset de HEAD
+                if digest is None:
+                    f.flush()
+                    meta["offset"] = offset + written
+                    self._save_upload_meta(meta)
+                else:
+                    f.truncate(offset)
+                raise
+
+        meta["offset"] = offset + written
+        meta["expires_at"] = (
+            datetime.utcnow() + timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRATION_HOURS)
+        ).isoformat()
+        self._save_upload_meta(meta)
+        return meta
+
+    def finalize_upload(self, upload_id: str, suffix: str = ".webm") -> dict:
+        """
+        Ensamblar una subida reanudable completa como audio definitivo
+
+        Args:
+            upload_id: ID de la subida
+            suffix: Extensión del contenedor detectado (define el tipo MIME)
+
+        Returns:
+            dict con el mismo formato que upload_audio
+        """
+        meta = self.get_upload(upload_id)
+        if meta["offset"] != meta["length"]:
+            raise UploadOffsetMismatchError(meta["offset"])
+
+        part_path, meta_path = self._upload_paths(upload_id)
+        filename = self.new_audio_filename(meta.get("story_id"), suffix)
+        file_path = self._new_file_path(self.audio_dir, filename)
+
+        # Mismo sistema de archivos: hard link sin copiar bytes
+        sha256, deduplicated = self.store_blob(part_path, file_path)
+        meta_path.unlink(missing_ok=True)
+
+        return self._audio_result(filename, file_path, meta.get("content_type"), sha256, deduplicated)
+
+    def delete_upload(self, upload_id: str) -> bool:
+        """Cancelar una subida reanudable y borrar sus datos parciales"""
+        part_path, meta_path = self._upload_paths(upload_id)
+        existed = meta_path.exists()
+        part_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        return existed
+
+    def cleanup_expired_uploads(self) -> int:
+        """Eliminar subidas reanudables expiradas"""
+        removed = 0
+        now = datetime.utcnow()
+        for meta_path in self.uploads_dir.glob("*.json"):
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if datetime.fromisoformat(meta["expires_at"]) < now:
+                    self.delete_upload(meta["upload_id"])
+                    removed += 1
+            except Exception as e:
+                print(f"Error limpiando subida {meta_path.name}: {e}")
+        return removed
+
 # Singleton instance
 local_storage = LocalStorageService()
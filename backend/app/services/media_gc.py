@@ -0,0 +1,245 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from app.core.config import settings
+from app.services.local_storage import local_storage
+
+# Campos de un relato que apuntan a archivos en storage/
+AUDIO_URL_FIELDS = ("audioUrl", "audioCompactUrl", "audioTranscriptionUrl")
+QR_URL_FIELDS = ("qrCodeUrl", "printableQrUrl")
+BLOB_DIGEST_RE = re.compile(r"/([0-9a-f]{64})\.[a-z0-9]{1,5}$")
+
+class MediaReferences:
+    """Conjunto de archivos referenciados por Firestore"""
+
+    def __init__(self):
+        # Raíz del nombre (hasta el primer punto): cubre renditions y picos
+        self.audio_stems: Set[str] = set()
+        self.qr_files: Set[str] = set()
+        self.blob_digests: Set[str] = set()
+        self.stories = 0
+
+    def add_story(self, story_id: str, data: Dict[str, Any]) -> None:
+        self.stories += 1
+        for field in AUDIO_URL_FIELDS:
+            url = data.get(field)
+            filename = local_storage.audio_filename_from_url(url)
+            if filename:
+                self.audio_stems.add(filename.split(".", 1)[0])
+            elif url:
+                match = BLOB_DIGEST_RE.search(url.split("?", 1)[0])
+                if match:
+                    self.blob_digests.add(match.group(1))
+
+        # Los QR se pueden regenerar con el nombre derivado del ID
+        self.qr_files.update((f"{story_id}.png", f"{story_id}_printable.png"))
+        for field in QR_URL_FIELDS:
+            filename = local_storage.qr_filename_from_url(data.get(field))
+            if filename:
+                self.qr_files.add(filename)
+
+    def is_audio_referenced(self, filename: str) -> bool:
+        return filename.split(".", 1)[0] in self.audio_stems
+
+    def is_qr_referenced(self, filename: str) -> bool:
+        return filename in self.qr_files
+
+class MediaGarbageCollector:
+    """
+    Recolector de audios y QR que ningún relato referencia
+
+    Recorre la colección stories en streaming, arma el conjunto de
+    referencias y aparta (cuarentena) o borra los archivos huérfanos más
+    antiguos que el periodo de gracia, por lotes. La edad se mide con el
+    máximo de mtime y ctime: un alias recién enlazado a un blob antiguo
+    comparte mtime con él, pero su ctime es el del enlace.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def build_references(self, keep_archived: bool = True) -> MediaReferences:
+        """Leer de Firestore solo los campos con URLs de medios"""
+        from app.services.firebase_service import firebase_service
+
+        references = MediaReferences()
+        fields = ["status", *AUDIO_URL_FIELDS, *QR_URL_FIELDS]
+        for story_id, data in firebase_service.stream_stories(fields):
+            if not keep_archived and data.get("status") == "archived":
+                continue
+            references.add_story(story_id, data)
+        return references
+
+    def _file_age(self, stat_result: os.stat_result, now: float) -> float:
+        return now - max(stat_result.st_mtime, stat_result.st_ctime)
+
+    def _iter_orphans(self, references: MediaReferences, grace_seconds: float, report: Dict[str, Any]):
+        """Huérfanos candidatos: (tipo, ruta, stat)"""
+        now = time.time()
+        checks = (
+            ("audios", local_storage.audio_dir, references.is_audio_referenced),
+            ("qr", local_storage.qr_dir, references.is_qr_referenced),
+        )
+        for kind, directory, is_referenced in checks:
+            for path in local_storage.iter_files(directory):
+                report["scanned"] += 1
+                if is_referenced(path.name):
+                    continue
+                try:
+                    stat_result = path.stat()
+                except FileNotFoundError:
+                    continue
+                if self._file_age(stat_result, now) < grace_seconds:
+                    report["skipped_recent"] += 1
+                    continue
+                yield kind, path, stat_result
+
+        # Blobs sin ningún alias (nlink == 1) que nadie cita directamente
+        for path in local_storage.iter_files(local_storage.blobs_dir):
+            report["scanned"] += 1
+            try:
+                stat_result = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat_result.st_nlink > 1 or path.stem in references.blob_digests:
+                continue
+            if self._file_age(stat_result, now) < grace_seconds:
+                report["skipped_recent"] += 1
+                continue
+            yield "blobs", path, stat_result
+
+    def _dispose(self, kind: str, path: Path, quarantine_root: Optional[Path]) -> None:
+        if quarantine_root is not None:
+            # rename conserva el inodo: los blobs siguen contando el alias
+            destination = quarantine_root / kind / path.name
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, destination)
+            return
+        if kind == "audios":
+            local_storage.release_blob(path)
+        path.unlink()
+
+    def purge_quarantine(self, max_age_days: int, dry_run: bool = False) -> Dict[str, int]:
+        """Borrar definitivamente las cuarentenas más antiguas que max_age_days"""
+        purged = {"files": 0, "bytes": 0}
+        if not local_storage.quarantine_dir.exists():
+            return purged
+
+        cutoff = time.time() - max_age_days * 86400
+        for run_dir in sorted(local_storage.quarantine_dir.iterdir()):
+            if not run_dir.is_dir() or run_dir.stat().st_mtime > cutoff:
+                continue
+            for path in run_dir.rglob("*"):
+                if path.is_file():
+                    purged["files"] += 1
+                    # Un alias con otros enlaces no libera espacio
+                    stat_result = path.stat()
+                    if stat_result.st_nlink == 1:
+                        purged["bytes"] += stat_result.st_size
+            if not dry_run:
+                shutil.rmtree(run_dir, ignore_errors=True)
+        return purged
+
+    def collect(
+        self,
+        grace_hours: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        quarantine: Optional[bool] = None,
+        keep_archived: Optional[bool] = None,
+        dry_run: bool = False,
+        pause: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Ejecutar una pasada completa del recolector (bloqueante)
+
+        Returns:
+            Informe con archivos revisados, huérfanos y bytes recuperados
+        """
+        grace_hours = settings.MEDIA_GC_GRACE_HOURS if grace_hours is None else grace_hours
+        batch_size = batch_size or settings.MEDIA_GC_BATCH_SIZE
+        quarantine = settings.MEDIA_GC_QUARANTINE if quarantine is None else quarantine
+        keep_archived = settings.MEDIA_GC_KEEP_ARCHIVED if keep_archived is None else keep_archived
+
+        started = time.monotonic()
+        report: Dict[str, Any] = {
+            "started_at": datetime.utcnow().isoformat(),
+            "dry_run": dry_run,
+            "mode": "quarantine" if quarantine else "delete",
+            "stories": 0,
+            "scanned": 0,
+            "skipped_recent": 0,
+            "orphaned": 0,
+            "reclaimed_bytes": 0,
+            "by_kind": {"audios": 0, "qr": 0, "blobs": 0},
+            "expired_uploads": 0,
+            "errors": 0,
+        }
+
+        # Si Firestore falla se aborta: nunca borrar con referencias incompletas
+        references = self.build_references(keep_archived)
+        report["stories"] = references.stories
+
+        quarantine_root = None
+        if quarantine and not dry_run:
+            quarantine_root = local_storage.quarantine_dir / datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+
+        in_batch = 0
+        for kind, path, stat_result in self._iter_orphans(references, grace_hours * 3600, report):
+            report["orphaned"] += 1
+            report["by_kind"][kind] += 1
+            # Un alias deduplicado solo libera espacio si es la última copia
+            if kind != "audios" or stat_result.st_nlink <= 2:
+                report["reclaimed_bytes"] += stat_result.st_size
+            if dry_run:
+                continue
+
+            try:
+                self._dispose(kind, path, quarantine_root)
+            except Exception as e:
+                report["errors"] += 1
+                print(f"Error recolectando {path}: {e}")
+
+            in_batch += 1
+            if in_batch >= batch_size:
+                in_batch = 0
+                if pause:
+                    time.sleep(pause)
+
+        if not dry_run:
+            report["expired_uploads"] = local_storage.cleanup_expired_uploads()
+        report["quarantine_purged"] = self.purge_quarantine(settings.MEDIA_GC_QUARANTINE_DAYS, dry_run)
+        report["duration_seconds"] = round(time.monotonic() - started, 2)
+        return report
+
+    async def run(self, **kwargs) -> Optional[Dict[str, Any]]:
+        """Ejecutar collect() en un hilo; ignora pasadas solapadas"""
+        if self._lock.locked():
+            return None
+        async with self._lock:
+            report = await asyncio.to_thread(self.collect, **kwargs)
+            self.last_report = report
+            return report
+
+    async def run_periodically(self) -> None:
+        """Bucle de la tarea en segundo plano (MEDIA_GC_INTERVAL_HOURS)"""
+        interval = settings.MEDIA_GC_INTERVAL_HOURS * 3600
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                report = await self.run()
+                if report:
+                    print(
+                        f"GC de medios: {report['orphaned']} huérfanos, "
+                        f"{report['reclaimed_bytes'] / 1024 / 1024:.1f} MB recuperados"
+                    )
+            except Exception as e:
+                print(f"Error en GC de medios: {e}")
+
+# Singleton instance
+media_gc = MediaGarbageCollector()
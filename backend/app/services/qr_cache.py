@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.firebase_service import firebase_service
+from app.services.local_storage import local_storage
+from app.services.qr_render import render_qr
+from app.services.workers import run_in_process
+
+# IDs de documento aceptados (evita path traversal en la caché de disco)
+STORY_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+# (story_id, tamaño, formato)
+QRCacheKey = Tuple[str, int, str]
+
+# IDs de relatos ya verificados en Firestore (LRU)
+MAX_KNOWN_STORIES = 10000
+
+class StoryNotFoundError(LookupError):
+    """El relato del QR pedido no existe"""
+
+def snap_size(size: int) -> int:
+    """Redondear al siguiente tamaño de QR_IMAGE_SIZES (acota las claves de caché)"""
+    sizes = sorted(settings.QR_IMAGE_SIZES)
+    return next((bucket for bucket in sizes if bucket >= size), sizes[-1])
+
+class QRImageCache:
+    """
+    Caché de imágenes QR en memoria y en disco (ambas LRU acotadas por bytes)
+
+    El contenido del QR solo depende del ID del relato y de BASE_URL, así
+    que los aciertos se sirven sin leer Firestore. El primer pedido de
+    cada clave comprueba que el relato existe (una lectura, recordada) y
+    lo renderiza en el pool de procesos; los pedidos simultáneos de la
+    misma clave esperan ese único render. Los archivos de disco llevan un
+    resumen de la URL codificada en el nombre: si BASE_URL cambia, las
+    entradas antiguas dejan de usarse y el LRU las termina borrando.
+    """
+
+    def __init__(self, max_memory_bytes: int, max_disk_bytes: int):
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self._memory: "OrderedDict[QRCacheKey, Tuple[bytes, str]]" = OrderedDict()
+        self._inflight: Dict[QRCacheKey, asyncio.Future] = {}
+        self.cache_dir = local_storage.cache_dir / "qr"
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_bytes = 0
+        # Archivos de disco en orden de uso (se construye al primer render)
+        self._disk: "Optional[OrderedDict[Path, int]]" = None
+        self._disk_scan: Optional[asyncio.Future] = None
+        self._known_stories: "OrderedDict[str, None]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "coalesced": 0, "disk_evictions": 0}
+
+    def story_url(self, story_id: str) -> str:
+        return f"{settings.BASE_URL}/story/{story_id}"
+
+    def _disk_path(self, key: QRCacheKey) -> Path:
+        story_id, size, format = key
+        url_digest = hashlib.sha1(self.story_url(story_id).encode("utf-8")).hexdigest()[:10]
+        filename = f"{story_id}_{size}_{url_digest}.{format}"
+        return self.cache_dir / local_storage.shard_for(filename) / filename
+
+    @staticmethod
+    def _etag(content: bytes) -> str:
+        return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+    def _read_disk(self, path: Path) -> Optional[bytes]:
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # mtime = último uso: el orden LRU sobrevive a los reinicios
+        os.utime(path)
+        return content
+
+    def _scan_disk(self) -> "OrderedDict[Path, int]":
+        files = []
+        if self.cache_dir.exists():
+            for path in self.cache_dir.rglob("*"):
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat_result = path.stat()
+                except FileNotFoundError:
+                    continue
+                if path.is_file():
+                    files.append((stat_result.st_mtime, path, stat_result.st_size))
+        files.sort()
+        return OrderedDict((path, size) for _, path, size in files)
+
+    async def _disk_index(self) -> "OrderedDict[Path, int]":
+        """Índice LRU del disco (un solo recorrido aunque lo pidan varios)"""
+        if self._disk is None:
+            if self._disk_scan is None:
+                self._disk_scan = asyncio.ensure_future(asyncio.to_thread(self._scan_disk))
+            index = await self._disk_scan
+            if self._disk is None:
+                self._disk = index
+                self.disk_bytes = sum(index.values())
+        return self._disk
+
+    async def _track_disk(self, path: Path, size: int) -> None:
+        """Registrar un archivo escrito y borrar los menos usados si se excede el límite"""
+        index = await self._disk_index()
+        self.disk_bytes += size - index.pop(path, 0)
+        index[path] = size
+        evicted = []
+        while self.disk_bytes > self.max_disk_bytes and len(index) > 1:
+            old_path, old_size = index.popitem(last=False)
+            self.disk_bytes -= old_size
+            evicted.append(old_path)
+        if evicted:
+            self.stats["disk_evictions"] += len(evicted)
+            await asyncio.to_thread(lambda: [old.unlink(missing_ok=True) for old in evicted])
+
+    async def _check_story(self, story_id: str) -> None:
+        """Renderizar solo QR de relatos existentes (evita llenar el disco con IDs inventados)"""
+        if story_id in self._known_stories:
+            self._known_stories.move_to_end(story_id)
+            return
+        if not await firebase_service.get_stories([story_id], fields=['status']):
+            raise StoryNotFoundError(f"Story not found: {story_id}")
+        self._known_stories[story_id] = None
+        if len(self._known_stories) > MAX_KNOWN_STORIES:
+            self._known_stories.popitem(last=False)
+
+    def _write_disk(self, path: Path, content: bytes) -> None:
+        """Escritura atómica: un lector nunca ve un archivo a medias"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _remember(self, key: QRCacheKey, entry: Tuple[bytes, str]) -> None:
+        if key in self._memory:
+            return
+        self._memory[key] = entry
+        self.memory_bytes += len(entry[0])
+        while self.memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    async def _load(self, key: QRCacheKey) -> Tuple[bytes, str]:
+        path = self._disk_path(key)
+        content = await asyncio.to_thread(self._read_disk, path)
+        if content is not None:
+            self.stats["disk_hits"] += 1
+            if self._disk is not None and path in self._disk:
+                self._disk.move_to_end(path)
+        else:
+            story_id, size, format = key
+            await self._check_story(story_id)
+            self.stats["renders"] += 1
+            content = await run_in_process(render_qr, self.story_url(story_id), size, format)
+            try:
+                await asyncio.to_thread(self._write_disk, path, content)
+                await self._track_disk(path, len(content))
+            except OSError as e:
+                # Sin disco se sigue sirviendo desde memoria
+                print(f"Error guardando QR en caché: {e}")
+
+        entry = (content, self._etag(content))
+        self._remember(key, entry)
+        return entry
+
+    def _finish(self, key: QRCacheKey, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is not None \
+                and not isinstance(future.exception(), StoryNotFoundError):
+            # Marcar la excepción como leída aunque todos los clientes se fueran
+            print(f"Error renderizando QR {key}: {future.exception()}")
+
+    async def get(self, story_id: str, size: int, format: str) -> Tuple[bytes, str]:
+        """
+        Obtener los bytes del QR y su ETag fuerte
+
+        Raises:
+            ValueError si el ID del relato no es válido
+            StoryNotFoundError si el relato no existe
+        """
+        if not STORY_ID_RE.match(story_id):
+            raise ValueError(f"Invalid story ID: {story_id}")
+
+        key = (story_id, size, format)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return entry
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats["coalesced"] += 1
+
+        # shield: si un cliente se desconecta el render sigue para los demás
+        return await asyncio.shield(future)
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+        self.memory_bytes = 0
+
+# Singleton instance
+qr_image_cache = QRImageCache(
+    settings.QR_CACHE_MEMORY_MB * 1024 * 1024,
+    settings.QR_CACHE_DISK_MB * 1024 * 1024
+)
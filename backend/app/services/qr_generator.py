@@ -1,15 +1,36 @@
-import qrcode
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
 from app.core.config import settings
+from app.core.metrics import QR_RENDER_LATENCY, instrumented
 from app.services.local_storage import local_storage
-from typing import Optional
-import os
+from app.services.qr_cards import render_card_png
+from app.services.qr_render import render_qr
+from app.services.workers import run_in_process
+from typing import Tuple
+
+def render_story_qrs(
+    story_url: str,
+    story_title: str,
+    narrator_name: str,
+    community: str
+) -> Tuple[bytes, bytes]:
+    """
+    QR simple (PNG 512) y tarjeta imprimible de un relato
+
+    Función de módulo para el pool de procesos (regeneración masiva).
+    """
+    return (
+        render_qr(story_url, size=512, format="png"),
+        render_card_png(story_url, story_title, narrator_name, community)
+    )
 
 class QRGenerator:
     def __init__(self):
         self.base_url = settings.BASE_URL
 
+    def story_url(self, story_id: str) -> str:
+        """URL pública del relato que se codifica en sus QR"""
+        return f"{self.base_url}/story/{story_id}"
+
+    @instrumented(QR_RENDER_LATENCY, kind="qr")
     async def generate_qr_code(
         self,
         story_id: str,
@@ -21,7 +42,7 @@ class QRGenerator:
 
         Args:
             story_id: ID del relato
-            format: Formato de salida (png, svg)
+            format: Formato de salida (png, svg, pdf)
             size: Tamaño del QR en píxeles
 
         Returns:
@@ -29,34 +50,16 @@ class QRGenerator:
         """
         try:
             # URL del relato
-            story_url = f"{self.base_url}/story/{story_id}"
-
-            # Crear QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(story_url)
-            qr.make(fit=True)
-
-            # Generar imagen
-            img = qr.make_image(fill_color="black", back_color="white")
+            story_url = self.story_url(story_id)
 
-            # Redimensionar si es necesario
-            if img.size[0] != size:
-                img = img.resize((size, size), Image.Resampling.LANCZOS)
-
-            # Convertir a bytes
-            img_bytes = BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
+            # Matriz de módulos rasterizada a escala entera (sin remuestreo)
+            qr_bytes = await run_in_process(render_qr, story_url, size=size, format=format)
 
             # Guardar en almacenamiento local
             qr_url = await local_storage.upload_qr(
-                img_bytes.getvalue(),
-                story_id
+                qr_bytes,
+                story_id,
+                extension=format
             )
 
             return qr_url
@@ -65,6 +68,7 @@ class QRGenerator:
             print(f"Error generando QR: {e}")
             raise Exception(f"Failed to generate QR code: {str(e)}")
 
+    @instrumented(QR_RENDER_LATENCY, kind="printable")
     async def generate_printable_qr(
         self,
         story_id: str,
@@ -86,88 +90,20 @@ class QRGenerator:
         """
         try:
             # URL del relato
-            story_url = f"{self.base_url}/story/{story_id}"
-
-            # Crear QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=2,
+            story_url = self.story_url(story_id)
+
+            # Tarjeta compuesta sobre la plantilla cacheada, en el pool de procesos
+            card_bytes = await run_in_process(
+                render_card_png,
+                story_url,
+                story_title,
+                narrator_name,
+                community
             )
-            qr.add_data(story_url)
-            qr.make(fit=True)
-
-            # Generar imagen del QR
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            qr_img = qr_img.resize((400, 400), Image.Resampling.LANCZOS)
-
-            # Crear canvas más grande para incluir información
-            canvas_width = 600
-            canvas_height = 700
-            canvas = Image.new('RGB', (canvas_width, canvas_height), 'white')
-
-            # Pegar QR en el centro-superior
-            qr_x = (canvas_width - 400) // 2
-            qr_y = 50
-            canvas.paste(qr_img, (qr_x, qr_y))
-
-            # Agregar texto
-            draw = ImageDraw.Draw(canvas)
-
-            # Intentar usar fuente del sistema, si no usar default
-            try:
-                title_font = ImageFont.truetype("arial.ttf", 24)
-                text_font = ImageFont.truetype("arial.ttf", 18)
-                small_font = ImageFont.truetype("arial.ttf", 14)
-            except:
-                title_font = ImageFont.load_default()
-                text_font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-
-            # Título (centrado)
-            title_text = story_title[:60] + "..." if len(story_title) > 60 else story_title
-            title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
-            title_width = title_bbox[2] - title_bbox[0]
-            title_x = (canvas_width - title_width) // 2
-            draw.text((title_x, 470), title_text, fill='black', font=title_font)
-
-            # Narrador
-            narrator_text = f"Narrado por: {narrator_name}"
-            narrator_bbox = draw.textbbox((0, 0), narrator_text, font=text_font)
-            narrator_width = narrator_bbox[2] - narrator_bbox[0]
-            narrator_x = (canvas_width - narrator_width) // 2
-            draw.text((narrator_x, 510), narrator_text, fill='#333333', font=text_font)
-
-            # Comunidad
-            community_text = f"Comunidad: {community}"
-            community_bbox = draw.textbbox((0, 0), community_text, font=text_font)
-            community_width = community_bbox[2] - community_bbox[0]
-            community_x = (canvas_width - community_width) // 2
-            draw.text((community_x, 540), community_text, fill='#333333', font=text_font)
-
-            # Instrucciones
-            instruction_text = "Escanea el código para escuchar la historia"
-            instruction_bbox = draw.textbbox((0, 0), instruction_text, font=small_font)
-            instruction_width = instruction_bbox[2] - instruction_bbox[0]
-            instruction_x = (canvas_width - instruction_width) // 2
-            draw.text((instruction_x, 590), instruction_text, fill='#666666', font=small_font)
-
-            # Logo/Marca del proyecto
-            brand_text = "Historias Vivientes Aymara"
-            brand_bbox = draw.textbbox((0, 0), brand_text, font=small_font)
-            brand_width = brand_bbox[2] - brand_bbox[0]
-            brand_x = (canvas_width - brand_width) // 2
-            draw.text((brand_x, 620), brand_text, fill='#1976d2', font=small_font)
-
-            # Convertir a bytes
-            img_bytes = BytesIO()
-            canvas.save(img_bytes, format='PNG', quality=95)
-            img_bytes.seek(0)
 
             # Guardar en almacenamiento local
             qr_url = await local_storage.upload_qr(
-                img_bytes.getvalue(),
+                card_bytes,
                 story_id,
                 "_printable"
             )
@@ -0,0 +1,144 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import List
+import numpy as np
+import qrcode
+from PIL import Image
+
+# Niveles de corrección de errores aceptados
+ERROR_CORRECTION_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+QR_FORMATS = ("png", "svg", "pdf")
+
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+@lru_cache(maxsize=1024)
+def qr_matrix(data: str, error_correction: str = "H", border: int = 4) -> np.ndarray:
+    """
+    Calcular la matriz de módulos del QR (True = módulo oscuro)
+
+    Incluye la zona de silencio de `border` módulos a cada lado. Es la
+    parte cara (elección de máscara) y se cachea: renderizar el mismo QR
+    en otro tamaño o formato reutiliza la matriz (de solo lectura).
+    """
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=ERROR_CORRECTION_LEVELS[error_correction],
+        box_size=1,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = np.array(qr.get_matrix(), dtype=bool)
+    matrix.flags.writeable = False
+    return matrix
+
+def render_image(matrix: np.ndarray, size: int) -> Image.Image:
+    """
+    Rasterizar la matriz a escala entera de módulo (imagen 1 bit)
+
+    Cada módulo ocupa size // n píxeles exactos, sin remuestreo; el
+    sobrante hasta `size` se reparte como margen blanco adicional. Si
+    size es menor que la matriz se usa 1 píxel por módulo.
+    """
+    n = matrix.shape[0]
+    scale = max(size // n, 1)
+    modules = np.repeat(np.repeat(matrix, scale, axis=0), scale, axis=1)
+
+    side = max(size, n * scale)
+    offset = (side - n * scale) // 2
+    # En modo "1" un bit a 1 es blanco
+    pixels = np.ones((side, side), dtype=bool)
+    pixels[offset:offset + n * scale, offset:offset + n * scale] = ~modules
+
+    packed = np.packbits(pixels, axis=1)
+    return Image.frombytes("1", (side, side), packed.tobytes())
+
+def render_png(matrix: np.ndarray, size: int) -> bytes:
+    """PNG de 1 bit por píxel"""
+    buffer = BytesIO()
+    render_image(matrix, size).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _dark_runs(matrix: np.ndarray) -> List[tuple]:
+    """Tramos horizontales de módulos oscuros: (fila, columna, longitud)"""
+    runs = []
+    for y, row in enumerate(matrix):
+        edges = np.diff(np.concatenate(([0], row.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        runs.extend((y, int(x), int(end - x)) for x, end in zip(starts, ends))
+    return runs
+
+def render_svg(matrix: np.ndarray, size: int) -> bytes:
+    """SVG compacto: un único path con un rectángulo por tramo de módulos"""
+    n = matrix.shape[0]
+    path = "".join(f"M{x} {y}h{length}v1h-{length}z" for y, x, length in _dark_runs(matrix))
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {n} {n}" '
+        f'width="{size}" height="{size}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path d="{path}" fill="#000"/></svg>'
+    )
+    return svg.encode("ascii")
+
+def render_pdf(matrix: np.ndarray, size: int) -> bytes:
+    """
+    PDF vectorial de una página de size x size puntos
+
+    Se escribe a mano (sin dependencias): los tramos de módulos se
+    dibujan como rectángulos en un solo content stream.
+    """
+    n = matrix.shape[0]
+    scale = size / n
+    operations = [f"q {scale:.4f} 0 0 {-scale:.4f} 0 {size} cm 0 g"]
+    operations.extend(f"{x} {y} {length} 1 re" for y, x, length in _dark_runs(matrix))
+    operations.append("f Q")
+    content = "\n".join(operations).encode("ascii")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {size} {size}] /Contents 4 0 R >>".encode("ascii"),
+        b"<< /Length " + str(len(content)).encode("ascii") + b" >>\nstream\n" + content + b"\nendstream",
+    ]
+
+    output = BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+    )
+    return output.getvalue()
+
+def render_qr(data: str, size: int = 512, format: str = "png", border: int = 4) -> bytes:
+    """
+    Generar un QR en el formato pedido (png, svg o pdf)
+
+    Función de módulo: se puede ejecutar en el pool de procesos.
+    """
+    if format not in QR_FORMATS:
+        raise ValueError(f"Unsupported QR format: {format}")
+    matrix = qr_matrix(data, border=border)
+    if format == "svg":
+        return render_svg(matrix, size)
+    if format == "pdf":
+        return render_pdf(matrix, size)
+    return render_png(matrix, size)
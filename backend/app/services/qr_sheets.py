@@ -0,0 +1,167 @@
+import asyncio
+import zlib
+from collections import deque
+from typing import AsyncIterator, Dict, List, Tuple
+from PIL import Image, ImageDraw
+from app.services.qr_cards import CARD_PALETTE, DEFAULT_LAYOUT, compose_card
+from app.services.workers import run_in_process
+
+# Tarjetas por página -> (columnas, filas)
+SHEET_GRIDS: Dict[int, Tuple[int, int]] = {
+    1: (1, 1),
+    2: (1, 2),
+    4: (2, 2),
+    6: (2, 3),
+    8: (2, 4),
+    9: (3, 3),
+}
+
+# Tamaños de página en puntos PDF (1/72")
+PAGE_SIZES: Dict[str, Tuple[float, float]] = {
+    "a4": (595.28, 841.89),
+    "letter": (612.0, 792.0),
+}
+
+PAGE_MARGIN_PT = 24.0
+CUT_LINE_COLOR = "#cccccc"
+
+# (url del relato, título, narrador, comunidad)
+CardData = Tuple[str, str, str, str]
+
+def render_sheet_page(cards: List[CardData], columns: int, rows: int) -> Tuple[int, int, bytes]:
+    """
+    Imponer varias tarjetas en una página rasterizada
+
+    Las tarjetas se pegan a su tamaño nativo (sin remuestreo) con una
+    línea de corte gris alrededor. La página se cuantiza a la paleta de
+    las tarjetas y se comprime con zlib, lista para incrustarse en el PDF
+    como imagen indexada. Función de módulo para el pool de procesos.
+
+    Returns:
+        (ancho, alto, datos FlateDecode)
+    """
+    card_width, card_height = DEFAULT_LAYOUT.width, DEFAULT_LAYOUT.height
+    page = Image.new("RGB", (columns * card_width, rows * card_height), "white")
+    draw = ImageDraw.Draw(page)
+
+    for index, card in enumerate(cards):
+        x = (index % columns) * card_width
+        y = (index // columns) * card_height
+        page.paste(compose_card(*card), (x, y))
+        draw.rectangle((x, y, x + card_width - 1, y + card_height - 1), outline=CUT_LINE_COLOR)
+
+    indexed = page.quantize(palette=CARD_PALETTE, dither=Image.Dither.NONE)
+    return indexed.width, indexed.height, zlib.compress(indexed.tobytes(), 6)
+
+class PdfStreamWriter:
+    """
+    Escritor PDF incremental: cada página se emite en cuanto está lista
+
+    Los objetos 1 (Catalog) y 2 (Pages) se escriben al final, cuando ya
+    se conocen todas las páginas; la tabla xref recoge los offsets.
+    """
+
+    def __init__(self, page_size: Tuple[float, float]):
+        self.page_width, self.page_height = page_size
+        self.offsets: Dict[int, int] = {}
+        self.position = 0
+        self.next_object = 3
+        self.page_objects: List[int] = []
+        palette = CARD_PALETTE.getpalette()[:768]
+        palette += [0] * (768 - len(palette))
+        self.palette_hex = bytes(palette).hex().upper()
+
+    def _emit(self, chunks: List[bytes], data: bytes) -> None:
+        chunks.append(data)
+        self.position += len(data)
+
+    def _object(self, chunks: List[bytes], number: int, body: bytes) -> None:
+        self.offsets[number] = self.position
+        self._emit(chunks, f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def header(self) -> bytes:
+        chunks: List[bytes] = []
+        self._emit(chunks, b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        return b"".join(chunks)
+
+    def page(self, width: int, height: int, data: bytes) -> bytes:
+        """Página con una imagen indexada centrada dentro de los márgenes"""
+        chunks: List[bytes] = []
+        image_obj, content_obj, page_obj = self.next_object, self.next_object + 1, self.next_object + 2
+        self.next_object += 3
+        self.page_objects.append(page_obj)
+
+        self._object(chunks, image_obj, (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace [/Indexed /DeviceRGB 255 <{self.palette_hex}>] "
+            f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\nstream\n"
+        ).encode("ascii") + data + b"\nendstream")
+
+        available_width = self.page_width - 2 * PAGE_MARGIN_PT
+        available_height = self.page_height - 2 * PAGE_MARGIN_PT
+        scale = min(available_width / width, available_height / height)
+        draw_width, draw_height = width * scale, height * scale
+        x = (self.page_width - draw_width) / 2
+        y = (self.page_height - draw_height) / 2
+        content = f"q {draw_width:.2f} 0 0 {draw_height:.2f} {x:.2f} {y:.2f} cm /Im0 Do Q".encode("ascii")
+        self._object(chunks, content_obj, (
+            f"<< /Length {len(content)} >>\nstream\n".encode("ascii") + content + b"\nendstream"
+        ))
+
+        self._object(chunks, page_obj, (
+            f"<< /Type /Page /Parent 2 0 R "
+            f"/MediaBox [0 0 {self.page_width:.2f} {self.page_height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_obj} 0 R >> >> "
+            f"/Contents {content_obj} 0 R >>"
+        ).encode("ascii"))
+        return b"".join(chunks)
+
+    def trailer(self) -> bytes:
+        chunks: List[bytes] = []
+        kids = " ".join(f"{number} 0 R" for number in self.page_objects)
+        self._object(chunks, 2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_objects)} >>".encode("ascii"))
+        self._object(chunks, 1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.position
+        size = self.next_object
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self.offsets[number]:010d} 00000 n \n" for number in range(1, size))
+        lines.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._emit(chunks, "".join(lines).encode("ascii"))
+        return b"".join(chunks)
+
+async def stream_sheet_pdf(
+    cards: List[CardData],
+    per_page: int = 4,
+    page_size: str = "a4",
+    max_in_flight: int = 8
+) -> AsyncIterator[bytes]:
+    """
+    Generar el PDF de hojas de tarjetas página a página
+
+    Las páginas se renderizan en el pool de procesos con a lo sumo
+    max_in_flight en curso y se emiten en orden a medida que terminan.
+    """
+    columns, rows = SHEET_GRIDS[per_page]
+    writer = PdfStreamWriter(PAGE_SIZES[page_size])
+    pages = [cards[start:start + per_page] for start in range(0, len(cards), per_page)]
+
+    yield writer.header()
+
+    pending: deque = deque()
+    next_page = 0
+    try:
+        while next_page < len(pages) or pending:
+            while next_page < len(pages) and len(pending) < max_in_flight:
+                pending.append(asyncio.ensure_future(
+                    run_in_process(render_sheet_page, pages[next_page], columns, rows)
+                ))
+                next_page += 1
+            width, height, data = await pending.popleft()
+            yield writer.page(width, height, data)
+    finally:
+        # Cliente desconectado: no seguir renderizando páginas
+        for future in pending:
+            future.cancel()
+
+    yield writer.trailer()
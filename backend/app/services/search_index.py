@@ -0,0 +1,423 @@
+import asyncio
+import gzip
+import heapq
+import html
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.local_storage import local_storage
+
+# Cambiar al modificar la tokenización: invalida los índices guardados
+INDEX_VERSION = 2
+
+# Campos indexados y su peso (BM25F: frecuencias y longitudes ponderadas)
+FIELD_WEIGHTS: Dict[str, float] = {
+    'title': 3.0,
+    'keywords': 2.5,
+    'description': 1.5,
+    'transcription.aymara': 1.0,
+    'transcription.spanish': 1.0,
+}
+
+# Campos leídos de Firestore para indexar
+INDEX_FIELDS = ['title', 'keywords', 'description', 'transcription', 'status']
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Espera antes de reintentar una reconstrucción periódica fallida
+REBUILD_RETRY_SECONDS = 900
+
+# Variantes del apóstrofo de las consonantes glotalizadas (ch', k', p', q', t')
+APOSTROPHES = "'’ʼ´`‘"
+_APOSTROPHE_RE = re.compile(f"[{APOSTROPHES}]")
+# Palabra: letras/dígitos con apóstrofos internos (waxt'a, q'uwa)
+TOKEN_RE = re.compile(rf"\w+(?:[{APOSTROPHES}]\w+)*")
+
+# Sufijos aymaras frecuentes (plural, topicalizador, casos, enclíticos).
+# Se quitan de forma iterativa (achachilanakaxa -> achachilanaka -> achachila)
+# conservando al menos MIN_STEM caracteres.
+AYMARA_SUFFIXES = (
+    'nakaru', 'nakana', 'nakata', 'pacha', 'naka', 'taki', 'kama', 'raki',
+    'mpi', 'tha', 'sti', 'xa', 'wa', 'ru', 'x',
+)
+MIN_STEM = 4
+MAX_SUFFIXES = 3
+
+STOPWORDS = {
+    # Español
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los',
+    'por', 'que', 'se', 'su', 'sus', 'un', 'una', 'y', 'o', 'para', 'como',
+    # Aymara
+    'ukat', 'uka', 'aka', 'jupa', 'jupax', 'ukax', 'ukhamaraki',
+}
+
+def fold(text: str) -> str:
+    """Minúsculas sin tildes ni diacríticos (ä -> a, ñ -> n) y apóstrofo único"""
+    # Antes de descomponer: NFKD convierte ´ en espacio + tilde combinante
+    decomposed = unicodedata.normalize('NFKD', _APOSTROPHE_RE.sub("'", text.lower()))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def stem(token: str) -> str:
+    """Quitar sufijos aymaras (máximo MAX_SUFFIXES, raíz de al menos MIN_STEM)"""
+    for _ in range(MAX_SUFFIXES):
+        for suffix in AYMARA_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+@lru_cache(maxsize=65536)
+def term_for(word: str) -> Optional[str]:
+    """
+    Término indexado de una palabra (None si es vacía o stopword)
+
+    Con caché: el vocabulario es pequeño comparado con el número de palabras.
+    """
+    folded = fold(word)
+    if folded in STOPWORDS or len(folded) < 2:
+        return None
+    return stem(folded)
+
+def tokenize(text: str) -> List[str]:
+    return [term for term in map(term_for, TOKEN_RE.findall(text or '')) if term]
+
+def _field_text(story: Dict[str, Any], field: str) -> str:
+    value: Any = story
+    for part in field.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return str(value) if value else ''
+
+def highlight(text: str, terms: Set[str], width: int = 160) -> Optional[str]:
+    """Fragmento de ~width caracteres alrededor de la primera coincidencia, con <mark>"""
+    matches = [m for m in TOKEN_RE.finditer(text or '') if term_for(m.group()) in terms]
+    if not matches:
+        return None
+    start = max(matches[0].start() - width // 3, 0)
+    end = min(start + width, len(text))
+    # Empezar y terminar en límites de palabra
+    if start > 0:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < matches[0].start() else start
+    if end < len(text):
+        space = text.rfind(' ', matches[0].end(), end)
+        end = space if space > 0 else end
+
+    parts, cursor = [], start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(html.escape(text[cursor:match.start()], quote=False))
+        parts.append(f"<mark>{html.escape(match.group(), quote=False)}</mark>")
+        cursor = match.end()
+    parts.append(html.escape(text[cursor:end], quote=False))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+class SearchIndex:
+    """
+    Índice invertido en memoria con ranking BM25F sobre los relatos publicados
+
+    Guarda por documento su vector de términos (frecuencia ponderada por
+    campo) y los postings término -> {documento: frecuencia}. Se actualiza
+    al publicar, editar o archivar relatos y se persiste comprimido en
+    storage/cache/search para arrancar sin releer Firestore; si falta o es
+    de otra versión se reconstruye en segundo plano. Como los cambios
+    hechos fuera de la API (u omitidos) no llegan al índice, se reconstruye
+    también cuando supera SEARCH_INDEX_MAX_AGE_HOURS.
+    """
+
+    def __init__(self):
+        self.path = local_storage.cache_dir / "search" / "index.json.gz"
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.total_length = 0.0
+        self.ready = False
+        self.built_at: Optional[str] = None
+        self._save_task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Cambios recibidos durante una reconstrucción (se reaplican al final)
+        self._changes: Optional[Dict[str, Optional[Tuple[Dict[str, float], float]]]] = None
+
+    # === DOCUMENTOS ===
+
+    @staticmethod
+    def _vector(story: Dict[str, Any]) -> Tuple[Dict[str, float], float]:
+        vector: Counter = Counter()
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            terms = tokenize(_field_text(story, field))
+            length += weight * len(terms)
+            for term in terms:
+                vector[term] += weight
+        return dict(vector), length
+
+    def _add_vector(self, story_id: str, vector: Dict[str, float], length: float) -> None:
+        self._remove(story_id)
+        if not vector:
+            return
+        self.doc_terms[story_id] = vector
+        self.doc_lengths[story_id] = length
+        self.total_length += length
+        for term, frequency in vector.items():
+            self.postings.setdefault(term, {})[story_id] = frequency
+
+    def _remove(self, story_id: str) -> bool:
+        vector = self.doc_terms.pop(story_id, None)
+        if vector is None:
+            return False
+        self.total_length -= self.doc_lengths.pop(story_id)
+        for term in vector:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(story_id, None)
+                if not docs:
+                    del self.postings[term]
+        return True
+
+    def update(self, story_id: str, story: Dict[str, Any]) -> None:
+        """Indexar (o reindexar) un relato; si no está publicado se quita"""
+        if story.get('status') != 'published':
+            self.remove(story_id)
+            return
+        vector, length = self._vector(story)
+        if self._changes is not None:
+            self._changes[story_id] = (vector, length)
+        self._add_vector(story_id, vector, length)
+        self._schedule_save()
+
+    def remove(self, story_id: str) -> None:
+        if self._changes is not None:
+            self._changes[story_id] = None
+        if self._remove(story_id):
+            self._schedule_save()
+
+    # === BÚSQUEDA ===
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[str, float]], Set[str]]:
+        """
+        Buscar con BM25F
+
+        Returns:
+            (total de coincidencias, [(story_id, score)] de la página, términos de la consulta)
+        """
+        terms = set(tokenize(query))
+        document_count = len(self.doc_terms)
+        if not terms or not document_count:
+            return 0, [], terms
+
+        average_length = self.total_length / document_count or 1.0
+        scores: Dict[str, float] = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (document_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for story_id, frequency in docs.items():
+                norm = 1 - BM25_B + BM25_B * self.doc_lengths[story_id] / average_length
+                scores[story_id] = scores.get(story_id, 0.0) + (
+                    idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                )
+
+        # Solo hace falta ordenar hasta el final de la página pedida
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return len(scores), ranked[offset:offset + limit], terms
+
+    @staticmethod
+    def highlights(story: Dict[str, Any], terms: Set[str]) -> Dict[str, str]:
+        """Fragmentos resaltados por campo (solo los que coinciden)"""
+        snippets = {}
+        for field in FIELD_WEIGHTS:
+            snippet = highlight(_field_text(story, field), terms)
+            if snippet:
+                snippets[field] = snippet
+        return snippets
+
+    # === PERSISTENCIA ===
+
+    def _write(self, data: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.path)
+
+    async def save(self) -> None:
+        """Guardar el índice (copia en el loop; serialización y escritura en un hilo)"""
+        # Los vectores nunca se modifican en sitio: basta una copia superficial
+        payload = {
+            story_id: [self.doc_lengths[story_id], vector]
+            for story_id, vector in self.doc_terms.items()
+        }
+        def write() -> None:
+            data = gzip.compress(json.dumps({
+                'version': INDEX_VERSION,
+                'built_at': self.built_at,
+                'saved_at': datetime.utcnow().isoformat(),
+                'documents': payload
+            }, ensure_ascii=False).encode('utf-8'), compresslevel=5)
+            self._write(data)
+        await asyncio.to_thread(write)
+
+    def _schedule_save(self) -> None:
+        """Guardar tras SEARCH_INDEX_SAVE_DELAY_SECONDS agrupando los cambios"""
+        if self._save_task is not None and not self._save_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        async def delayed_save() -> None:
+            await asyncio.sleep(settings.SEARCH_INDEX_SAVE_DELAY_SECONDS)
+            try:
+                await self.save()
+            except Exception as e:
+                print(f"Error guardando índice de búsqueda: {e}")
+
+        self._save_task = loop.create_task(delayed_save(), name="search_index_save")
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        payload = json.loads(gzip.decompress(self.path.read_bytes()))
+        if payload.get('version') != INDEX_VERSION:
+            return None
+        return payload
+
+    def _install(self, documents: Dict[str, Tuple[float, Dict[str, float]]], built_at: Optional[str]) -> None:
+        """Reemplazar el contenido del índice de una vez"""
+        postings: Dict[str, Dict[str, float]] = {}
+        for story_id, (_, vector) in documents.items():
+            for term, frequency in vector.items():
+                postings.setdefault(term, {})[story_id] = frequency
+        self.doc_terms = {story_id: vector for story_id, (_, vector) in documents.items()}
+        self.doc_lengths = {story_id: length for story_id, (length, _) in documents.items()}
+        self.total_length = sum(self.doc_lengths.values())
+        self.postings = postings
+        self.built_at = built_at
+        self.ready = True
+
+    # === CONSTRUCCIÓN ===
+
+    @classmethod
+    def _build_documents(cls, stories: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Tuple[float, Dict[str, float]]]:
+        documents = {}
+        for story_id, story in stories:
+            if story.get('status') != 'published':
+                continue
+            vector, length = cls._vector(story)
+            if vector:
+                documents[story_id] = (length, vector)
+        return documents
+
+    async def rebuild(self) -> int:
+        """Reconstruir desde Firestore (lectura y tokenización en un hilo)"""
+        from app.services.firebase_service import firebase_service
+
+        started = time.perf_counter()
+        built_at = datetime.utcnow().isoformat()
+        self._changes = {}
+        try:
+            documents = await asyncio.to_thread(
+                self._build_documents, firebase_service.stream_stories(INDEX_FIELDS)
+            )
+            # Publicaciones y ediciones durante la lectura ganan a la instantánea
+            for story_id, change in self._changes.items():
+                if change is None:
+                    documents.pop(story_id, None)
+                else:
+                    documents[story_id] = (change[1], change[0])
+        finally:
+            self._changes = None
+        self._install(documents, built_at)
+        await self.save()
+        print(f"Índice de búsqueda reconstruido: {len(documents)} relatos en {time.perf_counter() - started:.1f}s")
+        return len(documents)
+
+    async def start(self) -> None:
+        """Cargar el índice guardado o reconstruirlo en segundo plano"""
+        try:
+            payload = await asyncio.to_thread(self._read)
+        except Exception as e:
+            print(f"Índice de búsqueda ilegible, se reconstruye: {e}")
+            payload = None
+
+        if payload is not None:
+            self._install(payload['documents'], payload.get('built_at'))
+            print(f"Índice de búsqueda cargado: {len(self.doc_terms)} relatos")
+            return
+        self.start_rebuild()
+
+    def start_rebuild(self) -> bool:
+        """Lanzar una reconstrucción en segundo plano (False si ya hay una en curso)"""
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return False
+
+        async def run() -> None:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"Error reconstruyendo índice de búsqueda: {e}")
+
+        self._rebuild_task = asyncio.get_running_loop().create_task(run(), name="search_index_rebuild")
+        return True
+
+    def age_seconds(self) -> float:
+        """Antigüedad de la última reconstrucción (infinita si se desconoce)"""
+        if not self.built_at:
+            return math.inf
+        try:
+            built_at = datetime.fromisoformat(self.built_at)
+        except ValueError:
+            return math.inf
+        return (datetime.utcnow() - built_at).total_seconds()
+
+    async def run_periodically(self) -> None:
+        """Bucle en segundo plano: reconstruir al superar SEARCH_INDEX_MAX_AGE_HOURS"""
+        max_age = settings.SEARCH_INDEX_MAX_AGE_HOURS * 3600
+        while True:
+            wait = max_age - self.age_seconds()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            # Puede haberla lanzado ya start() o el endpoint de administración
+            self.start_rebuild()
+            await self._rebuild_task
+            if self.age_seconds() >= max_age:
+                await asyncio.sleep(min(max_age, REBUILD_RETRY_SECONDS))
+
+    async def stop(self) -> None:
+        """Guardar los cambios pendientes al apagar"""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            await self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'documents': len(self.doc_terms),
+            'terms': len(self.postings),
+            'built_at': self.built_at,
+            'rebuilding': self._rebuild_task is not None and not self._rebuild_task.done(),
+        }
+
+# Singleton instance
+search_index = SearchIndex()
+
+registry.gauge(
+    "search_index_documents", "Relatos publicados en el índice de búsqueda",
+    callback=lambda: len(search_index.doc_terms)
+)
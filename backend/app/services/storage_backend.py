@@ -0,0 +1,534 @@
+import asyncio
+import io
+import os
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.local_storage import local_storage
+
+class StorageBackendError(Exception):
+    """Error del backend de almacenamiento"""
+    pass
+
+class PresignedUploadsNotSupported(StorageBackendError):
+    """El backend no admite subidas directas con URL firmada"""
+    pass
+
+class StorageBackend:
+    """
+    Interfaz común de almacenamiento de medios
+
+    Las claves tienen la forma "<carpeta>/<archivo>" (por ejemplo
+    "audios/abc.webm" o "qr/qr_xyz.png"); cada backend decide cómo
+    traducirlas a rutas u objetos.
+    """
+
+    name = "base"
+    supports_presigned = False
+
+    def get_url(self, key: str) -> str:
+        """URL pública de un objeto"""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def size(self, key: str) -> Optional[int]:
+        """Tamaño en bytes, o None si no existe"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        """Leer length bytes desde start (sin descargar el objeto completo)"""
+        raise NotImplementedError
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream"
+    ) -> Dict[str, Any]:
+        """
+        Guardar un flujo de bytes sin cargarlo entero en memoria
+
+        Returns:
+            Dict con key, url y size
+        """
+        raise NotImplementedError
+
+    async def put_file(
+        self,
+        key: str,
+        file_path: str,
+        content_type: str = "application/octet-stream"
+    ) -> Dict[str, Any]:
+        """Guardar un archivo local bajo la clave indicada"""
+        return await self.put_stream(key, _iter_file(file_path), content_type)
+
+    def download_url(self, key: str) -> str:
+        """URL legible por procesos externos (ffmpeg, Groq), aunque el objeto sea privado"""
+        return self.get_url(key)
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        """Clave de un objeto a partir de su URL pública (None si no es de este backend)"""
+        return None
+
+    async def presign_upload(
+        self,
+        key: str,
+        content_type: str,
+        size: int
+    ) -> Dict[str, Any]:
+        """
+        Preparar una subida directa del cliente al almacenamiento
+
+        Returns:
+            Dict con method, url(s), headers y upload_id (multiparte)
+        """
+        raise PresignedUploadsNotSupported(f"{self.name} does not support presigned uploads")
+
+    async def complete_presigned_upload(
+        self,
+        key: str,
+        upload_id: Optional[str] = None,
+        parts: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Cerrar una subida directa (une las partes si fue multiparte)"""
+        raise PresignedUploadsNotSupported(f"{self.name} does not support presigned uploads")
+
+    async def abort_presigned_upload(self, key: str, upload_id: str) -> None:
+        raise PresignedUploadsNotSupported(f"{self.name} does not support presigned uploads")
+
+async def _iter_file(file_path: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """Leer un archivo por bloques sin bloquear el event loop"""
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+class ObjectReader(io.RawIOBase):
+    """
+    Archivo de solo lectura sobre un objeto del backend (para probe_audio)
+
+    Se usa desde un hilo: cada tramo que falta se pide al backend con una
+    lectura de rango en el event loop. Los tramos leídos se conservan, así
+    que la cabecera y el final se descargan una sola vez.
+    """
+
+    def __init__(
+        self,
+        backend: "StorageBackend",
+        key: str,
+        size: int,
+        loop: asyncio.AbstractEventLoop,
+        min_fetch: int = 64 * 1024
+    ):
+        super().__init__()
+        self.backend = backend
+        self.key = key
+        self.size = size
+        self.loop = loop
+        self.min_fetch = min_fetch
+        self.position = 0
+        self.segments: List[Tuple[int, bytes]] = []
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = max(offset, 0)
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.position + size, self.size)
+        if self.position >= end:
+            return b""
+        data = self._cached(self.position, end)
+        if data is None:
+            fetch_end = min(max(end, self.position + self.min_fetch), self.size)
+            chunk = asyncio.run_coroutine_threadsafe(
+                self.backend.read_range(self.key, self.position, fetch_end - self.position),
+                self.loop
+            ).result()
+            self.segments.append((self.position, chunk))
+            data = chunk[:end - self.position]
+        self.position += len(data)
+        return data
+
+    def _cached(self, start: int, end: int) -> Optional[bytes]:
+        for segment_start, chunk in self.segments:
+            if segment_start <= start and end <= segment_start + len(chunk):
+                return chunk[start - segment_start:end - segment_start]
+        return None
+
+class LocalStorageBackend(StorageBackend):
+    """Backend sobre el directorio storage/ (layout fragmentado)"""
+
+    name = "local"
+
+    def _split_key(self, key: str) -> tuple:
+        folder, _, filename = key.partition("/")
+        if folder not in ("audios", "qr") or not filename or "/" in filename:
+            raise ValueError(f"Invalid storage key: {key}")
+        return folder, filename
+
+    def _path(self, key: str) -> Path:
+        folder, filename = self._split_key(key)
+        if folder == "audios":
+            return local_storage.get_audio_path(filename)
+        return local_storage.get_qr_path(filename)
+
+    def get_url(self, key: str) -> str:
+        folder, filename = self._split_key(key)
+        if folder == "audios":
+            return local_storage.get_audio_url(filename)
+        return local_storage.get_qr_url(filename)
+
+    async def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, key: str) -> bool:
+        folder, filename = self._split_key(key)
+        if folder == "audios":
+            return local_storage.delete_audio(filename)
+        return local_storage.delete_qr(filename)
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        def read() -> bytes:
+            with open(self._path(key), "rb") as f:
+                f.seek(start)
+                return f.read(length)
+        return await asyncio.to_thread(read)
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream"
+    ) -> Dict[str, Any]:
+        destination = self._path(key)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        # Se escribe en uploads/ y se mueve al final: nunca se sirve un archivo a medias
+        tmp_path = local_storage.uploads_dir / f".{uuid.uuid4().hex}.part"
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    await asyncio.to_thread(f.write, chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, destination)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return {"key": key, "url": self.get_url(key), "size": size}
+
+class S3StorageBackend(StorageBackend):
+    """
+    Backend S3 compatible (AWS S3, MinIO, R2...)
+
+    boto3 es bloqueante: cada llamada corre en un hilo. Las subidas que
+    pasan por la API se envían por partes en paralelo, con a lo sumo
+    STORAGE_MULTIPART_CONCURRENCY partes en vuelo (memoria acotada); en
+    las subidas directas el cliente envía las partes con URLs firmadas.
+    """
+
+    name = "s3"
+    supports_presigned = True
+
+    # Límites de S3 para subidas multiparte
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    MAX_PARTS = 10000
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise StorageBackendError(
+                "STORAGE_BACKEND=s3 requiere boto3 (pip install boto3)"
+            )
+
+        if not settings.S3_BUCKET:
+            raise StorageBackendError("S3_BUCKET es requerido con STORAGE_BACKEND=s3")
+
+        self.bucket = settings.S3_BUCKET
+        self.part_size = max(settings.STORAGE_MULTIPART_CHUNK_MB * 1024 * 1024, self.MIN_PART_SIZE)
+        self.concurrency = max(settings.STORAGE_MULTIPART_CONCURRENCY, 1)
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            config=Config(
+                signature_version="s3v4",
+                # MinIO y la mayoría de stand-ins locales usan rutas, no subdominios
+                s3={"addressing_style": "path" if settings.S3_ENDPOINT_URL else "auto"},
+                max_pool_connections=max(self.concurrency * 2, 10)
+            )
+        )
+
+    def get_url(self, key: str) -> str:
+        if settings.S3_PUBLIC_URL:
+            return f"{settings.S3_PUBLIC_URL.rstrip('/')}/{key}"
+        if settings.S3_ENDPOINT_URL:
+            return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{settings.S3_REGION}.amazonaws.com/{key}"
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        prefix = self.get_url("")
+        if not url or not url.startswith(prefix):
+            return None
+        return url[len(prefix):].split("?", 1)[0] or None
+
+    async def _call(self, method: str, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(getattr(self.client, method), **kwargs)
+
+    async def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+        try:
+            head = await self._call("head_object", Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"]
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def delete(self, key: str) -> bool:
+        try:
+            await self._call("delete_object", Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            print(f"Error eliminando objeto {key}: {e}")
+            return False
+
+    async def read_range(self, key: str, start: int, length: int) -> bytes:
+        def read() -> bytes:
+            response = self.client.get_object(
+                Bucket=self.bucket,
+                Key=key,
+                Range=f"bytes={start}-{start + length - 1}"
+            )
+            return response["Body"].read()
+        return await asyncio.to_thread(read)
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream"
+    ) -> Dict[str, Any]:
+        buffer = bytearray()
+        upload_id = None
+        part_number = 0
+        size = 0
+        in_flight: List[asyncio.Task] = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def upload_part(number: int, body: bytes) -> Dict[str, Any]:
+            try:
+                response = await self._call(
+                    "upload_part",
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=body
+                )
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                semaphore.release()
+
+        async def flush(body: bytes) -> None:
+            nonlocal upload_id, part_number
+            if upload_id is None:
+                response = await self._call(
+                    "create_multipart_upload",
+                    Bucket=self.bucket,
+                    Key=key,
+                    ContentType=content_type
+                )
+                upload_id = response["UploadId"]
+            part_number += 1
+            # Una parte fallida aborta la subida sin seguir leyendo el flujo
+            for task in in_flight:
+                if task.done() and task.exception():
+                    raise task.exception()
+            # Esperar hueco antes de leer más del flujo: contrapresión
+            await semaphore.acquire()
+            in_flight.append(asyncio.create_task(upload_part(part_number, body)))
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                size += len(chunk)
+                while len(buffer) >= self.part_size:
+                    await flush(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]
+
+            if upload_id is None:
+                # Cabe en una sola petición
+                await self._call(
+                    "put_object",
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=bytes(buffer),
+                    ContentType=content_type
+                )
+                return {"key": key, "url": self.get_url(key), "size": size}
+
+            if buffer:
+                await flush(bytes(buffer))
+            parts = await asyncio.gather(*in_flight)
+            await self._call(
+                "complete_multipart_upload",
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])}
+            )
+            return {"key": key, "url": self.get_url(key), "size": size}
+
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            if upload_id is not None:
+                await self._call(
+                    "abort_multipart_upload",
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id
+                )
+            raise
+
+    def _presign(self, method: str, params: Dict[str, Any]) -> str:
+        return self.client.generate_presigned_url(
+            method,
+            Params={"Bucket": self.bucket, **params},
+            ExpiresIn=settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        )
+
+    def download_url(self, key: str) -> str:
+        # El bucket puede ser privado: URL GET firmada
+        return self._presign("get_object", {"Key": key})
+
+    async def presign_upload(
+        self,
+        key: str,
+        content_type: str,
+        size: int
+    ) -> Dict[str, Any]:
+        expires_in = settings.PRESIGNED_URL_EXPIRATION_SECONDS
+
+        if size <= self.part_size:
+            url = await asyncio.to_thread(
+                self._presign, "put_object", {"Key": key, "ContentType": content_type}
+            )
+            return {
+                "key": key,
+                "method": "PUT",
+                "url": url,
+                "headers": {"Content-Type": content_type},
+                "expires_in": expires_in
+            }
+
+        # Archivos grandes: el cliente sube las partes en paralelo directamente
+        part_size = max(self.part_size, -(-size // self.MAX_PARTS))
+        n_parts = -(-size // part_size)
+        response = await self._call(
+            "create_multipart_upload",
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type
+        )
+        upload_id = response["UploadId"]
+        part_urls = await asyncio.gather(*[
+            asyncio.to_thread(
+                self._presign,
+                "upload_part",
+                {"Key": key, "UploadId": upload_id, "PartNumber": number}
+            )
+            for number in range(1, n_parts + 1)
+        ])
+        return {
+            "key": key,
+            "method": "PUT",
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": [
+                {"part_number": number, "url": url}
+                for number, url in enumerate(part_urls, start=1)
+            ],
+            "expires_in": expires_in
+        }
+
+    async def complete_presigned_upload(
+        self,
+        key: str,
+        upload_id: Optional[str] = None,
+        parts: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        if upload_id:
+            if not parts:
+                raise StorageBackendError("Multipart upload requires parts")
+            await self._call(
+                "complete_multipart_upload",
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                    for part in sorted(parts, key=lambda p: p["part_number"])
+                ]}
+            )
+
+        size = await self.size(key)
+        if size is None:
+            raise StorageBackendError(f"Object not found: {key}")
+        return {"key": key, "url": self.get_url(key), "size": size}
+
+    async def abort_presigned_upload(self, key: str, upload_id: str) -> None:
+        await self._call(
+            "abort_multipart_upload",
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id
+        )
+
+def create_storage_backend(name: Optional[str] = None) -> StorageBackend:
+    """Instanciar el backend configurado en STORAGE_BACKEND"""
+    name = (name or settings.STORAGE_BACKEND).lower()
+    if name == "local":
+        return LocalStorageBackend()
+    if name == "s3":
+        return S3StorageBackend()
+    raise StorageBackendError(f"Unknown storage backend: {name}")
+
+# Singleton instance
+storage_backend = create_storage_backend()
@@ -0,0 +1,116 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional, List
+from app.core.config import settings
+from app.services.local_storage import local_storage
+from app.services.workers import run_in_process
+
+# Sufijos de las versiones derivadas del audio original
+COMPACT_SUFFIX = ".compact.webm"
+TRANSCRIPTION_SUFFIX = ".16k.ogg"
+
+def _run_ffmpeg(ffmpeg: str, source: str, destination: str, codec_args: List[str]) -> int:
+    """
+    Transcodificar con ffmpeg (se ejecuta en un proceso del pool)
+
+    Escribe a un temporal y lo renombra al terminar para que nunca se
+    sirva un archivo a medio escribir.
+
+    Returns:
+        Tamaño en bytes del archivo generado
+    """
+    tmp_destination = f"{destination}.tmp"
+    command = [
+        ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source,
+        "-vn", "-map_metadata", "-1",
+        *codec_args,
+        tmp_destination
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=600)
+        os.replace(tmp_destination, destination)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(e.stderr.decode("utf-8", "replace").strip() or str(e))
+    finally:
+        if os.path.exists(tmp_destination):
+            os.remove(tmp_destination)
+    return os.path.getsize(destination)
+
+class AudioTranscoder:
+    """
+    Genera versiones compactas del audio subido
+
+    - compact: Opus mono de baja tasa para oyentes (p. ej. 24 kbps)
+    - transcription: Opus mono a 16 kHz para enviar a Whisper
+    """
+
+    def __init__(self):
+        self.ffmpeg = settings.FFMPEG_BINARY
+
+    def _compact_args(self) -> List[str]:
+        return [
+            "-ac", "1",
+            "-c:a", "libopus",
+            "-b:a", f"{settings.COMPACT_AUDIO_BITRATE_KBPS}k",
+            "-application", "voip",
+            "-f", "webm"
+        ]
+
+    def _transcription_args(self) -> List[str]:
+        return [
+            "-ac", "1",
+            "-ar", str(settings.TRANSCRIPTION_SAMPLE_RATE),
+            "-c:a", "libopus",
+            "-b:a", f"{settings.TRANSCRIPTION_AUDIO_BITRATE_KBPS}k",
+            "-application", "voip",
+            "-f", "ogg"
+        ]
+
+    async def _render(self, source: Path, filename: str, codec_args: List[str]) -> dict:
+        destination = local_storage.new_audio_path(filename)
+        size = await run_in_process(
+            _run_ffmpeg, self.ffmpeg, str(source), str(destination), codec_args
+        )
+        return {
+            "filename": filename,
+            "url": f"/storage/audios/{filename}",
+            "size": size
+        }
+
+    async def create_renditions(self, filename: str) -> Optional[dict]:
+        """
+        Crear las versiones compacta y de transcripción de un audio
+
+        Args:
+            filename: Nombre del audio original en storage/audios
+
+        Returns:
+            dict con "compact" y "transcription", o None si está deshabilitado
+        """
+        if not settings.TRANSCODE_ENABLED:
+            return None
+
+        try:
+            source = local_storage.get_audio_path(filename)
+            if not source.exists():
+                raise FileNotFoundError(filename)
+
+            stem = Path(filename).stem
+            compact = await self._render(source, f"{stem}{COMPACT_SUFFIX}", self._compact_args())
+            transcription = await self._render(
+                source, f"{stem}{TRANSCRIPTION_SUFFIX}", self._transcription_args()
+            )
+
+            return {
+                "compact": compact,
+                "transcription": transcription
+            }
+
+        except Exception as e:
+            print(f"Error transcodificando audio: {e}")
+            raise Exception(f"Failed to transcode audio: {str(e)}")
+
+# Singleton instance
+audio_transcoder = AudioTranscoder()
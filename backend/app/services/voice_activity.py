@@ -0,0 +1,189 @@
+import bisect
+import subprocess
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Por debajo de este nivel un frame nunca se considera voz
+ABSOLUTE_SILENCE_DB = -60.0
+
+# Si la compactación ahorra menos que esto se envía el audio sin tocar
+MIN_SAVINGS_RATIO = 0.05
+
+class TimeOffsetMap:
+    """
+    Mapa entre tiempos del audio compactado y del audio original
+
+    Cada segmento es (inicio_compactado, inicio_original, duración) en
+    segundos; los timestamps que devuelve Whisper sobre el audio
+    compactado se trasladan al original con to_original().
+    """
+
+    def __init__(self, segments: List[Tuple[float, float, float]]):
+        self.segments = segments
+        self._starts = [segment[0] for segment in segments]
+
+    def to_original(self, t: float) -> float:
+        """Convertir un tiempo del audio compactado al original"""
+        if not self.segments:
+            return t
+        index = max(bisect.bisect_right(self._starts, t) - 1, 0)
+        compact_start, original_start, duration = self.segments[index]
+        return original_start + min(max(t - compact_start, 0.0), duration)
+
+    def to_dict(self) -> dict:
+        return {"segments": [list(segment) for segment in self.segments]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimeOffsetMap":
+        return cls([tuple(segment) for segment in data.get("segments", [])])
+
+def decode_pcm(ffmpeg: str, audio_bytes: bytes, sample_rate: int) -> np.ndarray:
+    """Decodificar cualquier formato a PCM int16 mono con ffmpeg"""
+    result = subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "pipe:1"
+        ],
+        input=audio_bytes,
+        capture_output=True,
+        check=True,
+        timeout=600
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+def encode_opus(ffmpeg: str, samples: np.ndarray, sample_rate: int, bitrate_kbps: int) -> bytes:
+    """Codificar PCM int16 mono a Opus/Ogg con ffmpeg"""
+    result = subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+            "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", f"{bitrate_kbps}k",
+            "-application", "voip",
+            "-f", "ogg", "pipe:1"
+        ],
+        input=samples.astype(np.int16).tobytes(),
+        capture_output=True,
+        check=True,
+        timeout=600
+    )
+    return result.stdout
+
+def frame_energy_db(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Energía RMS por frame en dBFS"""
+    n_frames = len(samples) // frame_size
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size).astype(np.float32)
+    frames /= 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+def detect_speech_regions(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 30,
+    margin_db: float = 10.0,
+    min_silence_ms: int = 700,
+    keep_silence_ms: int = 250
+) -> List[Tuple[int, int]]:
+    """
+    Detectar regiones con voz por energía
+
+    El umbral se adapta al ruido de la sala: percentil 10 de la energía
+    por frame más un margen. Cada región se amplía con keep_silence_ms
+    de contexto y las regiones separadas por menos de min_silence_ms se
+    unen, así solo se recortan los silencios realmente largos.
+
+    Returns:
+        Lista de (inicio, fin) en muestras, fin exclusivo
+    """
+    frame_size = max(int(sample_rate * frame_ms / 1000), 1)
+    energy = frame_energy_db(samples, frame_size)
+    if energy.size == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy, 10))
+    threshold = max(noise_floor + margin_db, ABSOLUTE_SILENCE_DB)
+    is_speech = energy > threshold
+    if not is_speech.any():
+        return []
+
+    # Bordes de los tramos con voz: +1 inicio, -1 fin
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    pad = int(np.ceil(keep_silence_ms / frame_ms))
+    min_gap = int(np.ceil(min_silence_ms / frame_ms))
+    n_frames = energy.size
+
+    regions: List[List[int]] = []
+    for start, end in zip(starts, ends):
+        start = max(int(start) - pad, 0)
+        end = min(int(end) + pad, n_frames)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+
+    total = len(samples)
+    sample_regions = [(start * frame_size, min(end * frame_size, total)) for start, end in regions]
+    # El resto final (frame incompleto) pertenece a la última región si la toca
+    if sample_regions and regions[-1][1] == n_frames:
+        sample_regions[-1] = (sample_regions[-1][0], total)
+    return sample_regions
+
+def compact_regions(
+    samples: np.ndarray,
+    regions: List[Tuple[int, int]],
+    sample_rate: int
+) -> Tuple[np.ndarray, TimeOffsetMap]:
+    """Concatenar las regiones con voz y construir el mapa de tiempos"""
+    segments = []
+    compact_position = 0
+    for start, end in regions:
+        segments.append((
+            compact_position / sample_rate,
+            start / sample_rate,
+            (end - start) / sample_rate
+        ))
+        compact_position += end - start
+
+    compacted = np.concatenate([samples[start:end] for start, end in regions])
+    return compacted, TimeOffsetMap(segments)
+
+def compact_for_transcription(
+    ffmpeg: str,
+    audio_bytes: bytes,
+    sample_rate: int = 16000,
+    bitrate_kbps: int = 32,
+    frame_ms: int = 30,
+    margin_db: float = 10.0,
+    min_silence_ms: int = 700,
+    keep_silence_ms: int = 250
+) -> Tuple[bytes, Optional[dict]]:
+    """
+    Recortar silencios largos de un audio antes de enviarlo a Whisper
+
+    Se ejecuta en el pool de procesos.
+
+    Returns:
+        (bytes Opus/Ogg compactados, mapa de tiempos serializado), o
+        (bytes originales, None) si no hay nada que recortar
+    """
+    samples = decode_pcm(ffmpeg, audio_bytes, sample_rate)
+    regions = detect_speech_regions(
+        samples, sample_rate, frame_ms, margin_db, min_silence_ms, keep_silence_ms
+    )
+    if not regions:
+        return audio_bytes, None
+
+    kept = sum(end - start for start, end in regions)
+    if kept >= len(samples) * (1 - MIN_SAVINGS_RATIO):
+        return audio_bytes, None
+
+    compacted, offset_map = compact_regions(samples, regions, sample_rate)
+    return encode_opus(ffmpeg, compacted, sample_rate, bitrate_kbps), offset_map.to_dict()
@@ -0,0 +1,137 @@
+import os
+import struct
+import subprocess
+from pathlib import Path
+from typing import List, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+from app.services.local_storage import local_storage
+from app.services.workers import run_in_process
+
+# Formato binario (little endian):
+#   cabecera  "<4sBBHIQ": magic, versión, bits (8/16), niveles, sample rate, muestras totales
+#   tabla     "<I" por nivel: número de picos
+#   datos     por nivel, pares (min, max) intercalados en int8/int16
+PEAKS_MAGIC = b"AWPK"
+PEAKS_VERSION = 1
+PEAKS_HEADER = struct.Struct("<4sBBHIQ")
+PEAKS_SUFFIX = ".peaks"
+
+def compute_peaks(samples: np.ndarray, resolutions: Sequence[int], bits: int = 8) -> List[np.ndarray]:
+    """
+    Calcular picos min/max por nivel de resolución
+
+    Args:
+        samples: PCM int16 mono
+        resolutions: Número de pares (min, max) por nivel
+        bits: 8 o 16 bits por valor
+
+    Returns:
+        Lista de arrays [min0, max0, min1, max1, ...] por nivel
+    """
+    levels = []
+    dtype = np.int8 if bits == 8 else np.int16
+    for resolution in resolutions:
+        count = min(resolution, len(samples))
+        if count == 0:
+            levels.append(np.zeros(0, dtype=dtype))
+            continue
+        edges = np.linspace(0, len(samples), count + 1).astype(np.int64)[:-1]
+        mins = np.minimum.reduceat(samples, edges)
+        maxs = np.maximum.reduceat(samples, edges)
+        if bits == 8:
+            mins = mins >> 8
+            maxs = maxs >> 8
+        peaks = np.empty(count * 2, dtype=dtype)
+        peaks[0::2] = mins
+        peaks[1::2] = maxs
+        levels.append(peaks)
+    return levels
+
+def encode_peaks(levels: List[np.ndarray], sample_rate: int, total_samples: int, bits: int) -> bytes:
+    """Serializar los niveles al formato binario .peaks"""
+    header = PEAKS_HEADER.pack(PEAKS_MAGIC, PEAKS_VERSION, bits, len(levels), sample_rate, total_samples)
+    table = b"".join(struct.pack("<I", len(level) // 2) for level in levels)
+    data = b"".join(level.astype("<i1" if bits == 8 else "<i2").tobytes() for level in levels)
+    return header + table + data
+
+def generate_peaks_file(
+    ffmpeg: str,
+    source: str,
+    destination: str,
+    resolutions: Sequence[int],
+    sample_rate: int = 8000,
+    bits: int = 8
+) -> int:
+    """
+    Decodificar un audio y escribir su archivo de picos
+
+    Se ejecuta en el pool de procesos.
+
+    Returns:
+        Tamaño en bytes del archivo generado
+    """
+    result = subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-i", source,
+            "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "pipe:1"
+        ],
+        capture_output=True,
+        check=True,
+        timeout=600
+    )
+    samples = np.frombuffer(result.stdout, dtype=np.int16)
+    payload = encode_peaks(compute_peaks(samples, resolutions, bits), sample_rate, len(samples), bits)
+
+    tmp_destination = f"{destination}.tmp"
+    with open(tmp_destination, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_destination, destination)
+    return len(payload)
+
+class WaveformService:
+    """Genera y localiza los archivos de picos junto a cada audio"""
+
+    def peaks_filename(self, audio_filename: str) -> str:
+        return f"{Path(audio_filename).stem}{PEAKS_SUFFIX}"
+
+    def get_peaks_path(self, audio_filename: str) -> Path:
+        return local_storage.get_audio_path(self.peaks_filename(audio_filename))
+
+    async def generate(self, audio_filename: str, source_url: Optional[str] = None) -> Optional[Path]:
+        """
+        Generar los picos de un audio (una vez por subida)
+
+        Args:
+            audio_filename: Nombre del audio (define el nombre de los picos)
+            source_url: URL del audio si no está en storage/ (subidas
+                directas a S3); ffmpeg la lee por HTTP
+
+        Returns:
+            Ruta del archivo de picos, o None si falló
+        """
+        try:
+            source = source_url or local_storage.get_audio_path(audio_filename)
+            if source_url is None and not source.exists():
+                raise FileNotFoundError(audio_filename)
+
+            destination = local_storage.new_audio_path(self.peaks_filename(audio_filename))
+            await run_in_process(
+                generate_peaks_file,
+                settings.FFMPEG_BINARY,
+                str(source),
+                str(destination),
+                list(settings.WAVEFORM_RESOLUTIONS),
+                settings.WAVEFORM_SAMPLE_RATE,
+                settings.WAVEFORM_BITS
+            )
+            return destination
+
+        except Exception as e:
+            print(f"Error generando forma de onda: {e}")
+            return None
+
+# Singleton instance
+waveform_service = WaveformService()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import CPU_TASK_DURATION, CPU_TASK_WAIT, registry
+
+def _timed_call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, float, float]:
+    """Ejecutar fn en el proceso hijo y devolver (resultado, inicio, fin) en reloj de pared"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+class CPUExecutor:
+    """
+    Pool de procesos compartido para trabajo CPU (imágenes, audio, QR)
+
+    Todo el trabajo pesado se envía aquí en lugar de ejecutarse en el
+    event loop. Por cada función se mide la espera en cola (desde el
+    envío hasta que un proceso la empieza) y el tiempo de ejecución.
+    """
+
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """Obtener (o crear) el pool de procesos"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _record(self, name: str, wait: float, execution: Optional[float], failed: bool) -> None:
+        stats = self._stats.setdefault(name, {
+            "calls": 0,
+            "errors": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "exec_seconds_total": 0.0,
+            "exec_seconds_max": 0.0,
+        })
+        CPU_TASK_WAIT.observe(wait, function=name)
+        if execution is not None:
+            CPU_TASK_DURATION.observe(execution, function=name)
+
+        stats["calls"] += 1
+        stats["errors"] += int(failed)
+        stats["wait_seconds_total"] += wait
+        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait)
+        if execution is not None:
+            stats["exec_seconds_total"] += execution
+            stats["exec_seconds_max"] = max(stats["exec_seconds_max"], execution)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Ejecutar una función en el pool de procesos
+
+        La función y sus argumentos deben ser serializables con pickle
+        (funciones de módulo, no métodos de instancias con estado).
+        """
+        loop = asyncio.get_running_loop()
+        name = getattr(fn, "__qualname__", repr(fn))
+        submitted = time.time()
+        self.in_flight += 1
+        try:
+            result, started, finished = await loop.run_in_executor(
+                self.get_pool(), partial(_timed_call, fn, *args, **kwargs)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Sin marcas del hijo: se cuenta todo como espera + ejecución
+            self._record(name, time.time() - submitted, None, failed=True)
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self._record(name, max(started - submitted, 0.0), finished - started, failed=False)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Instantánea de las métricas del pool"""
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.max_workers, 0),
+            "functions": {name: dict(values) for name, values in self._stats.items()},
+        }
+
+    def shutdown(self) -> None:
+        """Cerrar el pool al apagar la aplicación"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Singleton instance
+cpu_executor = CPUExecutor(settings.CPU_WORKERS)
+
+registry.gauge(
+    "cpu_tasks_in_flight", "Trabajos enviados al pool CPU sin terminar",
+    callback=lambda: cpu_executor.in_flight
+)
+registry.gauge(
+    "cpu_tasks_queued", "Trabajos del pool CPU esperando un proceso libre",
+    callback=lambda: max(cpu_executor.in_flight - cpu_executor.max_workers, 0)
+)
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Obtener (o crear) el pool de procesos compartido"""
+    return cpu_executor.get_pool()
+
+async def run_in_process(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Atajo de cpu_executor.run()"""
+    return await cpu_executor.run(fn, *args, **kwargs)
+
+def shutdown_process_pool() -> None:
+    """Cerrar el pool al apagar la aplicación"""
+    cpu_executor.shutdown()
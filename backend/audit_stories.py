@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Script para auditar la coherencia entre Firestore y el almacenamiento.
+
+Reemplaza a check_audio_urls.py. Recorre la colección stories con
+proyección (solo los campos necesarios), verifica en paralelo que
+audioUrl, qrCodeUrl y printableQrUrl apunten a archivos existentes en
+el backend de almacenamiento y aplica las correcciones en lotes de
+escritura de hasta 500 operaciones (FirebaseService.bulk_update):
+
+- URL de audio reparada: URLs absolutas o de /api/v1/media/audio/ se
+  normalizan a /storage/audios/<archivo>; si el archivo no existe pero
+  hay un audio subido con el prefijo del ID del relato, se usa ese.
+- QR regenerado cuando falta el archivo o la URL.
+- Republicación de relatos en draft con audio válido (--publish-drafts).
+
+Uso:
+    python audit_stories.py --dry-run                 # Solo informar
+    python audit_stories.py                           # Auditar y corregir
+    python audit_stories.py --publish-drafts --json   # Informe en JSON
+    python audit_stories.py --story-id ID --audio-url /storage/audios/x.webm
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.firebase_service import firebase_service
+from app.services.local_storage import local_storage
+from app.services.storage_backend import storage_backend
+from app.services.qr_generator import qr_generator
+from app.services.waveform import PEAKS_SUFFIX
+
+# Campos leídos de cada relato (proyección)
+AUDIT_FIELDS = ['title', 'status', 'audioUrl', 'qrCodeUrl', 'printableQrUrl', 'narrator']
+
+def load_stories() -> List[Tuple[str, Dict[str, Any]]]:
+    """Leer todos los relatos con proyección (bloqueante)"""
+    return list(firebase_service.stream_stories(AUDIT_FIELDS))
+
+
+def index_audio_files() -> Dict[str, List[str]]:
+    """Audios locales agrupados por ID de relato (prefijo antes de '_')"""
+    index: Dict[str, List[str]] = {}
+    for path in local_storage.iter_files(local_storage.audio_dir):
+        # Solo originales: las renditions llevan más de un sufijo y los picos .peaks
+        if '_' in path.stem and '.' not in path.stem and path.suffix != PEAKS_SUFFIX:
+            index.setdefault(path.stem.split('_', 1)[0], []).append(path.name)
+    return index
+
+
+async def key_exists(key: str, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore:
+        return await storage_backend.exists(key)
+
+
+async def qr_exists(qr_filename: str, semaphore: asyncio.Semaphore) -> bool:
+    """Los QR siempre se escriben en storage/qr, sea cual sea STORAGE_BACKEND"""
+    async with semaphore:
+        return await asyncio.to_thread(lambda: local_storage.get_qr_path(qr_filename).exists())
+
+
+async def audit_story(
+    story_id: str,
+    data: Dict[str, Any],
+    audio_index: Dict[str, List[str]],
+    semaphore: asyncio.Semaphore,
+    publish_drafts: bool
+) -> Dict[str, Any]:
+    """
+    Verificar un relato y proponer correcciones
+
+    Returns:
+        Dict con issues (lista de problemas), update (campos a escribir)
+        y regenerate_qr (bool)
+    """
+    issues: List[str] = []
+    update: Dict[str, Any] = {}
+    audio_ok = False
+
+    audio_url = data.get('audioUrl') or ''
+    filename = local_storage.audio_filename_from_url(audio_url)
+    if not audio_url or audio_url.rstrip('/') == '/storage/audios':
+        issues.append('audio_url_missing')
+    elif filename is None and audio_url.startswith('/'):
+        issues.append('audio_url_unexpected_format')
+    elif filename is not None:
+        audio_ok = await key_exists(f"audios/{filename}", semaphore)
+        if not audio_ok:
+            issues.append('audio_file_missing')
+        elif audio_url != f"/storage/audios/{filename}":
+            issues.append('audio_url_not_canonical')
+            update['audioUrl'] = f"/storage/audios/{filename}"
+    else:
+        # URL externa: no se puede verificar contra el almacenamiento
+        audio_ok = True
+
+    if not audio_ok and not update:
+        candidates = sorted(audio_index.get(story_id, []))
+        if candidates:
+            update['audioUrl'] = f"/storage/audios/{candidates[-1]}"
+            audio_ok = True
+            issues.append('audio_url_repaired')
+
+    regenerate_qr = False
+    for field in ('qrCodeUrl', 'printableQrUrl'):
+        qr_filename = local_storage.qr_filename_from_url(data.get(field))
+        if qr_filename is None or not await qr_exists(qr_filename, semaphore):
+            issues.append(f"{field}_missing")
+            regenerate_qr = True
+
+    if publish_drafts and data.get('status') == 'draft' and audio_ok:
+        issues.append('draft_publishable')
+        update['status'] = 'published'
+
+    return {
+        'id': story_id,
+        'title': data.get('title', 'Sin título'),
+        'status': data.get('status', 'unknown'),
+        'issues': issues,
+        'update': update,
+        # Sin título ni narrador no se puede componer el QR imprimible
+        'regenerate_qr': regenerate_qr and data.get('status') != 'archived' and bool(data.get('title')),
+        'narrator': data.get('narrator') or {}
+    }
+
+
+async def regenerate_qr(result: Dict[str, Any], semaphore: asyncio.Semaphore) -> None:
+    """Regenerar ambos QR y añadir sus URLs a la actualización"""
+    narrator = result['narrator']
+    async with semaphore:
+        result['update']['qrCodeUrl'] = await qr_generator.generate_qr_code(result['id'])
+        result['update']['printableQrUrl'] = await qr_generator.generate_printable_qr(
+            story_id=result['id'],
+            story_title=result['title'],
+            narrator_name=narrator.get('name', 'Anónimo'),
+            community=narrator.get('community', '')
+        )
+        result['update']['qrEncodedUrl'] = qr_generator.story_url(result['id'])
+
+
+async def run_audit(dry_run: bool, publish_drafts: bool, concurrency: int) -> Dict[str, Any]:
+    started = time.monotonic()
+
+    stories, audio_index = await asyncio.gather(
+        asyncio.to_thread(load_stories),
+        asyncio.to_thread(index_audio_files)
+    )
+    loaded = time.monotonic()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*[
+        audit_story(story_id, data, audio_index, semaphore, publish_drafts)
+        for story_id, data in stories
+    ])
+    checked = time.monotonic()
+
+    qr_errors = 0
+    if not dry_run:
+        to_regenerate = [result for result in results if result['regenerate_qr']]
+        outcomes = await asyncio.gather(
+            *[regenerate_qr(result, semaphore) for result in to_regenerate],
+            return_exceptions=True
+        )
+        qr_errors = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+
+    updates = [(result['id'], result['update']) for result in results if result['update']]
+    write_result = {'written': 0, 'failed': []}
+    if not dry_run:
+        write_result = await firebase_service.bulk_update(updates)
+
+    issue_counts: Dict[str, int] = {}
+    for result in results:
+        for issue in result['issues']:
+            issue_counts[issue] = issue_counts.get(issue, 0) + 1
+
+    return {
+        'dry_run': dry_run,
+        'stories': len(stories),
+        'with_issues': sum(1 for result in results if result['issues']),
+        'issues': issue_counts,
+        'updates_planned': len(updates),
+        'updates_written': write_result['written'],
+        'updates_failed': write_result['failed'],
+        'qr_planned': sum(1 for result in results if result['regenerate_qr']),
+        'qr_regenerated': 0 if dry_run else sum(1 for r in results if r['regenerate_qr']) - qr_errors,
+        'qr_errors': qr_errors,
+        'timings': {
+            'load_seconds': round(loaded - started, 2),
+            'check_seconds': round(checked - loaded, 2),
+            'total_seconds': round(time.monotonic() - started, 2)
+        },
+        'problems': [
+            {key: result[key] for key in ('id', 'title', 'status', 'issues', 'update')}
+            for result in results if result['issues']
+        ]
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("=" * 70)
+    print("🔍 AUDITORÍA FIRESTORE ↔ ALMACENAMIENTO")
+    print("=" * 70)
+    if report['dry_run']:
+        print("⚠️  DRY RUN: no se escribió nada\n")
+
+    for problem in report['problems']:
+        print(f"🔴 [{problem['status'].upper()}] {problem['title']}")
+        print(f"   ID: {problem['id']}")
+        print(f"   Problemas: {', '.join(problem['issues'])}")
+        if problem['update']:
+            print(f"   Corrección: {problem['update']}")
+        print()
+
+    print("=" * 70)
+    print("📊 RESUMEN")
+    print("=" * 70)
+    print(f"📚 Historias: {report['stories']}")
+    print(f"🔴 Con problemas: {report['with_issues']}")
+    for issue, count in sorted(report['issues'].items()):
+        print(f"   {issue}: {count}")
+    print(f"✏️  Actualizaciones: {report['updates_written']}/{report['updates_planned']}")
+    for failure in report['updates_failed']:
+        print(f"   ❌ {failure['id']}: {failure['error']}")
+    print(f"🔲 QR regenerados: {report['qr_regenerated']}/{report['qr_planned']} (errores: {report['qr_errors']})")
+    timings = report['timings']
+    print(f"⏱️  Lectura {timings['load_seconds']}s, verificación {timings['check_seconds']}s, "
+          f"total {timings['total_seconds']}s")
+
+
+async def fix_audio_url(story_id: str, new_audio_url: str) -> bool:
+    """Corregir el audioUrl de una historia específica"""
+    print(f"🔧 Corrigiendo historia {story_id}...")
+    filename = local_storage.audio_filename_from_url(new_audio_url)
+    if filename and not await storage_backend.exists(f"audios/{filename}"):
+        print(f"   ⚠️  Archivo NO encontrado: {filename}")
+    success = await firebase_service.update_story(story_id, {'audioUrl': new_audio_url})
+    print("   ✅ audioUrl actualizado" if success else "   ❌ Error al actualizar")
+    return success
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Auditar relatos contra el almacenamiento')
+    parser.add_argument('--dry-run', action='store_true', help='Solo verificar, no corregir')
+    parser.add_argument('--publish-drafts', action='store_true',
+                        help='Publicar relatos en draft con audio válido')
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='Verificaciones simultáneas (por defecto: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='Imprimir el informe en JSON')
+    parser.add_argument('--story-id', type=str, help='Corregir historia específica')
+    parser.add_argument('--audio-url', type=str, help='Nueva audioUrl (usar con --story-id)')
+    args = parser.parse_args()
+
+    if args.story_id and args.audio_url:
+        await fix_audio_url(args.story_id, args.audio_url)
+        return
+
+    try:
+        report = await run_audit(args.dry_run, args.publish_drafts, max(args.concurrency, 1))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de la API sin Firebase ni Groq reales.
+
+Levanta la aplicación con uvicorn en un puerto local usando una
+implementación en memoria de FirebaseService (con latencia simulada) y un
+servidor Groq falso (latencia y 429 configurables), carga un archivo de
+relatos sintéticos y ejecuta escenarios con clientes concurrentes:
+
+    list            GET /stories (página aleatoria de publicados)
+    nearby          GET /stories/nearby/search alrededor de una comunidad
+    get_view        GET /stories/{id} (lectura + incremento de vistas)
+    upload_process  subida de audio, alta del relato y pipeline completo
+    qr              GET /qr/{id}/image (primer render y caché)
+
+Imprime un JSON con rendimiento, latencias p50/p90/p99, lecturas y
+escrituras de Firestore por operación y bloqueos del event loop.
+
+Uso:
+    python benchmark_api.py                                   # Todos los escenarios
+    python benchmark_api.py --scenarios list,get_view --operations 2000 --concurrency 32
+    python benchmark_api.py --scenarios upload_process --groq-429-rate 0.2
+    python benchmark_api.py --firestore-latency-ms 40 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmarks.dataset import generate_stories, load_fixture, wav_bytes
+from benchmarks.environment import APIServer, free_port, prepare
+from benchmarks.fake_groq import FakeGroqConfig, FakeGroqServer
+from benchmarks.scenarios import SCENARIOS, BenchContext, run_scenario
+
+# El pipeline completo tarda segundos: menos repeticiones por defecto
+SLOW_SCENARIOS = {"upload_process"}
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+async def run_benchmarks(args: argparse.Namespace, server: APIServer, groq: FakeGroqServer,
+                         ctx: BenchContext) -> Dict[str, Any]:
+    import httpx
+    from app.core.loop_monitor import loop_monitor
+
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=server.base_url, limits=limits, timeout=300.0) as client:
+        for name in args.scenarios:
+            slow = name in SLOW_SCENARIOS
+            operations = args.pipeline_operations if slow else args.operations
+            concurrency = min(args.concurrency, operations)
+            log(f"▶️  {name}: {operations} operaciones, {concurrency} clientes")
+
+            stalls_before = loop_monitor.stall_count
+            groq_before = vars(groq.stats).copy()
+            result = await run_scenario(
+                name, client, ctx, operations, concurrency,
+                warmup=0 if slow else args.warmup, seed=args.seed
+            )
+
+            new_stalls = loop_monitor.stall_count - stalls_before
+            recent = list(loop_monitor.stalls)[-new_stalls:] if new_stalls else []
+            result.extra["event_loop"] = {
+                "stalls": new_stalls,
+                "max_stall_ms": max((stall["duration_ms"] for stall in recent), default=0.0),
+            }
+            if slow:
+                result.extra["groq"] = {
+                    key: getattr(groq.stats, key) - groq_before[key]
+                    for key in ("transcriptions", "chat_completions", "rate_limited")
+                }
+
+            results[name] = result.summary()
+            latency = results[name]["latency_ms"]
+            log(
+                f"   {results[name]['throughput_per_s']} op/s | p50 {latency['p50']} ms | "
+                f"p99 {latency['p99']} ms | errores {result.errors}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga con Firestore en memoria y Groq falso')
+    parser.add_argument('--scenarios', type=str, default=','.join(SCENARIOS),
+                        help='Escenarios separados por comas (por defecto: %(default)s)')
+    parser.add_argument('--stories', type=int, default=5000, help='Relatos sintéticos (por defecto: %(default)s)')
+    parser.add_argument('--operations', type=int, default=500,
+                        help='Operaciones por escenario (por defecto: %(default)s)')
+    parser.add_argument('--pipeline-operations', type=int, default=20,
+                        help='Operaciones de upload_process (por defecto: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clientes concurrentes (por defecto: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=5, help='Operaciones de calentamiento por escenario')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de los datos y de los clientes')
+    parser.add_argument('--fixture', type=str,
+                        help='Cargar los relatos de un fixture de generate_archive.py (hasta --stories)')
+    parser.add_argument('--firestore-latency-ms', type=float, default=15.0,
+                        help='Latencia simulada por viaje a Firestore (por defecto: %(default)s)')
+    parser.add_argument('--firestore-jitter-ms', type=float, default=5.0)
+    parser.add_argument('--groq-transcription-ms', type=float, default=800.0)
+    parser.add_argument('--groq-chat-ms', type=float, default=1200.0)
+    parser.add_argument('--groq-429-rate', type=float, default=0.0,
+                        help='Probabilidad de que Groq responda 429 (por defecto: %(default)s)')
+    parser.add_argument('--groq-rpm', type=int, default=0, help='Límite de peticiones/minuto de Groq (0 = sin límite)')
+    parser.add_argument('--work-dir', type=str, help='Directorio de trabajo (por defecto: uno temporal)')
+    parser.add_argument('--output', type=str, help='Guardar el JSON en este archivo')
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    # prepare() cambia de directorio: resolver las rutas antes
+    if args.output:
+        args.output = str(Path(args.output).resolve())
+    if args.fixture:
+        args.fixture = str(Path(args.fixture).resolve())
+    if args.work_dir:
+        args.work_dir = str(Path(args.work_dir).resolve())
+
+    groq = FakeGroqServer(FakeGroqConfig(
+        transcription_latency_ms=args.groq_transcription_ms,
+        chat_latency_ms=args.groq_chat_ms,
+        error_rate_429=args.groq_429_rate,
+        requests_per_minute=args.groq_rpm
+    )).start()
+
+    port = free_port()
+    work_dir = prepare(
+        groq.base_url, port, args.work_dir,
+        firestore_latency_ms=args.firestore_latency_ms,
+        firestore_jitter_ms=args.firestore_jitter_ms
+    )
+
+    from benchmarks.memory_firestore import firebase_service
+    started = time.perf_counter()
+    if args.fixture:
+        firebase_service.load(load_fixture(args.fixture, args.stories))
+    else:
+        firebase_service.load(generate_stories(args.stories, seed=args.seed))
+    story_ids = [
+        story_id for story_id, story in firebase_service.stories.items()
+        if story.get('status') == 'published'
+    ]
+    log(f"📚 {len(firebase_service.stories)} relatos sintéticos ({len(story_ids)} publicados) "
+        f"en {time.perf_counter() - started:.1f}s | trabajo en {work_dir}")
+    if not story_ids:
+        parser.error("El conjunto de datos no tiene relatos publicados: aumentar --stories")
+
+    server = APIServer(port).start()
+    try:
+        ctx = BenchContext(story_ids=story_ids, audio=wav_bytes(5.0))
+        results = asyncio.run(run_benchmarks(args, server, groq, ctx))
+    finally:
+        server.stop()
+        groq.stop()
+
+    report = {
+        "config": {
+            "stories": args.stories,
+            "operations": args.operations,
+            "pipeline_operations": args.pipeline_operations,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "fixture": args.fixture,
+            "firestore_latency_ms": args.firestore_latency_ms,
+            "firestore_jitter_ms": args.firestore_jitter_ms,
+            "groq_transcription_ms": args.groq_transcription_ms,
+            "groq_chat_ms": args.groq_chat_ms,
+            "groq_429_rate": args.groq_429_rate,
+            "groq_rpm": args.groq_rpm,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output)
+        log(f"💾 Resultados guardados en {args.output}")
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
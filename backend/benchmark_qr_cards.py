@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark de generación de tarjetas QR imprimibles (tarjetas/segundo).
+
+Compara la composición sin caché (fuentes y plantilla reconstruidas en
+cada tarjeta, como el generador anterior) con el compositor cacheado,
+en un solo hilo y repartido en un pool de procesos.
+
+Uso:
+    python benchmark_qr_cards.py                  # 200 tarjetas
+    python benchmark_qr_cards.py --count 1000 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.qr_cards import (
+    DEFAULT_LAYOUT,
+    build_template,
+    compose_card,
+    load_font,
+    render_card_png,
+)
+from app.services.qr_render import qr_matrix
+
+BASE_URL = "https://historias-aymara.vercel.app"
+
+
+def sample_card(i: int) -> tuple:
+    return (
+        f"{BASE_URL}/story/bench{i:016d}",
+        f"Relato de prueba número {i} sobre el lago Titicaca",
+        "Narradora de prueba",
+        "Achacachi"
+    )
+
+
+def render_uncached(i: int) -> bytes:
+    """Todo desde cero: fuentes, plantilla y matriz del QR"""
+    load_font.cache_clear()
+    qr_matrix.cache_clear()
+    template = build_template(DEFAULT_LAYOUT)
+    buffer = BytesIO()
+    # PNG RGB sin cuantizar, como el generador anterior
+    compose_card(*sample_card(i), template=template).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_cached(i: int) -> bytes:
+    return render_card_png(*sample_card(i))
+
+
+def measure(label: str, fn, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed
+    print(f"   {label:<28} {rate:8.1f} tarjetas/s  ({elapsed * 1000 / count:.2f} ms/tarjeta)")
+    return rate
+
+
+def measure_pool(count: int, workers: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Calentar: cada proceso carga fuentes y plantilla una vez
+        list(pool.map(render_cached, range(workers * 2)))
+        started = time.perf_counter()
+        list(pool.map(render_cached, range(count), chunksize=max(count // (workers * 4), 1)))
+        elapsed = time.perf_counter() - started
+    rate = count / elapsed
+    print(f"   {f'pool de {workers} procesos':<28} {rate:8.1f} tarjetas/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tarjetas QR imprimibles")
+    parser.add_argument("--count", type=int, default=200, help="Tarjetas por escenario")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Procesos del pool")
+    args = parser.parse_args()
+
+    print(f"🖨️  Generando {args.count} tarjetas por escenario\n")
+    baseline = measure("sin caché", render_uncached, args.count)
+    render_cached(0)
+    cached = measure("plantilla + fuentes en caché", render_cached, args.count)
+    pooled = measure_pool(args.count, args.workers)
+
+    print(f"\n📈 Caché: x{cached / baseline:.1f}   Pool: x{pooled / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
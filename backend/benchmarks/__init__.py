@@ -0,0 +1,4 @@
+"""
+Herramientas de benchmark: Firestore en memoria, servidor Groq falso,
+datos sintéticos y escenarios de carga (ver benchmark_api.py)
+"""
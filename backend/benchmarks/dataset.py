@@ -0,0 +1,248 @@
+"""
+Generador de datos sintéticos: relatos con la forma de los documentos de
+Firestore, audio WAV válido para las subidas y fixtures reproducibles
+"""
+
+import gzip
+import io
+import itertools
+import json
+import math
+import random
+import string
+import struct
+import wave
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import geohash2
+
+# (comunidad, latitud, longitud) del altiplano en torno al lago Titicaca
+COMMUNITIES: List[Tuple[str, float, float]] = [
+    ("Achacachi", -16.0500, -68.6833),
+    ("Copacabana", -16.1667, -69.0833),
+    ("Tiwanaku", -16.5547, -68.6733),
+    ("Jesús de Machaca", -16.7667, -68.8167),
+    ("Pucarani", -16.4000, -68.4833),
+    ("Huarina", -16.2000, -68.6333),
+    ("Sorata", -15.7833, -68.6500),
+    ("Batallas", -16.3000, -68.5333),
+    ("Guaqui", -16.5833, -68.8500),
+    ("Puerto Acosta", -15.5333, -69.2500),
+    ("Chucuito", -15.8942, -69.8908),
+    ("Ilave", -16.0833, -69.6333),
+    ("Juli", -16.2167, -69.4500),
+    ("Laja", -16.5333, -68.3833),
+    ("El Alto", -16.5000, -68.1667),
+]
+# Peso relativo de cada comunidad (aprox. proporcional a su población)
+COMMUNITY_WEIGHTS = [6, 4, 3, 2, 2, 1, 2, 2, 1, 1, 2, 3, 2, 1, 12]
+
+FIRST_NAMES = [
+    "Mamani", "Quispe", "Condori", "Choque", "Huanca", "Apaza", "Limachi",
+    "Ticona", "Yupanqui", "Chambi", "Poma", "Callisaya", "Nina", "Layme",
+]
+GIVEN_NAMES = [
+    "Juana", "Felipa", "Bartolina", "Rosa", "Celestina", "Tomás", "Mario",
+    "Gregorio", "Sabina", "Eusebio", "Florencia", "Valentín", "Paulina",
+]
+
+KEYWORDS = [
+    "Pachamama", "achachila", "waxt'a", "ayni", "Titicaca", "Illimani",
+    "Tata Inti", "Mama Quta", "chuño", "apthapi", "q'uwa", "yatiri",
+    "Anata", "Alasita", "Ekeko", "ch'alla", "ayllu", "jilaqata", "wak'a",
+]
+
+AYMARA_WORDS = [
+    "nayra", "pacha", "achachila", "awicha", "jaqi", "marka", "uta",
+    "quta", "qullu", "yapu", "uywa", "jallu", "inti", "phaxsi", "wara",
+    "aruma", "urasa", "sarnaqaña", "jakaña", "parlaña", "amuyt'aña",
+]
+
+SPANISH_WORDS = [
+    "los", "abuelos", "contaban", "que", "en", "el", "lago", "antes",
+    "la", "comunidad", "ofrenda", "cerro", "lluvia", "cosecha", "fiesta",
+    "camino", "noche", "estrellas", "río", "llama", "pueblo", "tiempo",
+]
+
+CATEGORIES = ["ritual", "legend", "personal_story", "historical", "myth", "other"]
+CATEGORY_WEIGHTS = [18, 16, 34, 14, 12, 6]
+SIGNIFICANCE = ["high", "medium", "low"]
+SIGNIFICANCE_WEIGHTS = [25, 55, 20]
+LANGUAGES = ["aymara", "spanish", "mixed"]
+LANGUAGE_WEIGHTS = [45, 20, 35]
+# Palabras clave con distribución de Zipf: las primeras aparecen mucho más
+KEYWORD_WEIGHTS = [1 / rank for rank in range(1, len(KEYWORDS) + 1)]
+
+# Campos datetime (en los fixtures se guardan en ISO 8601)
+DATETIME_FIELDS = ("createdAt", "updatedAt", "publishedAt")
+
+ID_ALPHABET = string.ascii_letters + string.digits
+
+def _sentence(rng: random.Random, words: List[str], length: int) -> str:
+    text = " ".join(rng.choices(words, k=length))
+    return text[:1].upper() + text[1:] + "."
+
+def _paragraph(rng: random.Random, words: List[str], sentences: int) -> str:
+    return " ".join(_sentence(rng, words, rng.randint(6, 16)) for _ in range(sentences))
+
+def new_story_id(rng: random.Random) -> str:
+    """ID de 20 caracteres como los autogenerados por Firestore"""
+    return "".join(rng.choices(ID_ALPHABET, k=20))
+
+def sample_keywords(rng: random.Random, count: int) -> List[str]:
+    """count palabras clave distintas, ponderadas por KEYWORD_WEIGHTS"""
+    keywords: List[str] = []
+    while len(keywords) < count:
+        keyword = rng.choices(KEYWORDS, KEYWORD_WEIGHTS)[0]
+        if keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+def community_location(
+    rng: random.Random,
+    community: Optional[Tuple[str, float, float]] = None,
+    spread_km: float = 8.0
+) -> Dict[str, Any]:
+    """Ubicación aleatoria alrededor de una comunidad, con geohash de 8 caracteres"""
+    name, lat, lon = community or rng.choice(COMMUNITIES)
+    # ~111 km por grado de latitud; la longitud se corrige con el coseno
+    distance = spread_km * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    lat += distance * math.cos(bearing) / 111.0
+    lon += distance * math.sin(bearing) / (111.0 * math.cos(math.radians(lat)))
+    return {
+        "latitude": round(lat, 6),
+        "longitude": round(lon, 6),
+        "placeName": f"{name}, La Paz",
+        "geohash": geohash2.encode(lat, lon, precision=8),
+    }
+
+def generate_story(
+    rng: random.Random,
+    index: int,
+    now: Optional[datetime] = None,
+    published_ratio: float = 0.85,
+    archived_ratio: float = 0.05
+) -> Dict[str, Any]:
+    """Un relato sintético con la forma del documento de Firestore (más su id)"""
+    now = now or datetime.utcnow()
+    community = rng.choices(COMMUNITIES, COMMUNITY_WEIGHTS)[0]
+    created_at = now - timedelta(seconds=rng.randint(0, 2 * 365 * 24 * 3600))
+    duration = rng.randint(30, 600)
+    audio_name = f"{created_at:%Y%m%d_%H%M%S}_{index:08x}.webm"
+
+    roll = rng.random()
+    if roll < archived_ratio:
+        status = "archived"
+    elif roll < archived_ratio + published_ratio:
+        status = "published"
+    else:
+        status = rng.choice(["draft", "processing"])
+
+    story: Dict[str, Any] = {
+        "id": new_story_id(rng),
+        "audioUrl": f"/storage/audios/{audio_name}",
+        "audioDuration": duration,
+        "audioSize": duration * rng.randint(2000, 4000),
+        "audioFormat": "webm",
+        "narrator": {
+            "name": f"{rng.choice(GIVEN_NAMES)} {rng.choice(FIRST_NAMES)}",
+            "age": rng.randint(18, 95),
+            "community": community[0],
+            "language": rng.choices(LANGUAGES, LANGUAGE_WEIGHTS)[0],
+            "consentGiven": True,
+        },
+        "location": community_location(rng, community),
+        "status": status,
+        "views": int(rng.paretovariate(1.2)) - 1,
+        "featured": rng.random() < 0.02,
+        "keywords": [],
+        "createdAt": created_at,
+        "updatedAt": created_at,
+    }
+
+    if status in ("published", "archived"):
+        aymara = _paragraph(rng, AYMARA_WORDS, rng.randint(3, 12))
+        segments, cursor = [], 0.0
+        for sentence in aymara.split(". "):
+            end = min(cursor + rng.uniform(3, 12), duration)
+            segments.append({"start": round(cursor, 3), "end": round(end, 3), "text": sentence})
+            cursor = end
+        story.update({
+            "title": _sentence(rng, SPANISH_WORDS, rng.randint(4, 9))[:-1],
+            "description": _paragraph(rng, SPANISH_WORDS, rng.randint(1, 4)),
+            "keywords": sample_keywords(rng, rng.randint(2, 6)),
+            "category": rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            "culturalSignificance": rng.choices(SIGNIFICANCE, SIGNIFICANCE_WEIGHTS)[0],
+            "transcription": {
+                "aymara": aymara,
+                "spanish": _paragraph(rng, SPANISH_WORDS, rng.randint(3, 12)),
+                "confidence": 1.0,
+                "segments": segments,
+            },
+            "publishedAt": created_at + timedelta(minutes=rng.randint(1, 30)),
+        })
+    return story
+
+def generate_stories(
+    count: int,
+    seed: int = 42,
+    published_ratio: float = 0.85,
+    archived_ratio: float = 0.05
+) -> Iterator[Dict[str, Any]]:
+    """Relatos sintéticos reproducibles (misma semilla, mismos datos)"""
+    rng = random.Random(seed)
+    # Fecha fija: la misma semilla produce exactamente los mismos documentos
+    now = datetime(2025, 1, 1)
+    for index in range(count):
+        yield generate_story(rng, index, now, published_ratio, archived_ratio)
+
+def wav_bytes(seconds: float = 5.0, sample_rate: int = 16000, frequency: float = 220.0) -> bytes:
+    """WAV PCM mono de 16 bits con un tono y ruido suave (pasa la validación de subidas)"""
+    rng = random.Random(seconds)
+    frames = bytearray()
+    for n in range(int(seconds * sample_rate)):
+        value = 0.3 * math.sin(2 * math.pi * frequency * n / sample_rate) + rng.uniform(-0.02, 0.02)
+        frames += struct.pack("<h", int(value * 32767))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+# === FIXTURES ===
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        # Nivel 1: los fixtures grandes se escriben varias veces más rápido
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=1)
+    return open(path, mode, encoding="utf-8")
+
+def save_fixture(path: str, stories: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Escribir relatos como JSON Lines (gzip si termina en .gz) y reenviarlos
+
+    Es un generador para poder guardar el fixture mientras se cargan los
+    mismos relatos en Firestore sin tenerlos todos en memoria.
+    """
+    with _open(Path(path), "w") as fixture:
+        for story in stories:
+            record = dict(story)
+            for name in DATETIME_FIELDS:
+                if isinstance(record.get(name), datetime):
+                    record[name] = record[name].isoformat()
+            fixture.write(json.dumps(record, ensure_ascii=False) + "\n")
+            yield story
+
+def load_fixture(path: str, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Leer un fixture de save_fixture() (con id y fechas como datetime)"""
+    with _open(Path(path), "r") as fixture:
+        for line in itertools.islice(fixture, limit):
+            story = json.loads(line)
+            for name in DATETIME_FIELDS:
+                if story.get(name):
+                    story[name] = datetime.fromisoformat(story[name])
+            yield story
@@ -0,0 +1,90 @@
+"""
+Entorno aislado para ejecutar la API sin Firebase ni Groq reales
+
+prepare() debe llamarse antes de importar cualquier módulo de app: fija
+las variables que exigen los validadores de Settings (clave gsk_ falsa,
+credenciales de mentira), trabaja en un directorio temporal para no
+tocar storage/ y registra benchmarks.memory_firestore en lugar de
+app.services.firebase_service.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def prepare(
+    groq_base_url: str,
+    api_port: int,
+    work_dir: Optional[str] = None,
+    firestore_latency_ms: float = 0.0,
+    firestore_jitter_ms: float = 0.0
+) -> Path:
+    """Preparar variables de entorno, directorio de trabajo y Firestore en memoria"""
+    if "app.main" in sys.modules:
+        raise RuntimeError("benchmarks.environment.prepare() must run before importing the app")
+
+    work = Path(work_dir or tempfile.mkdtemp(prefix="aimara-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    credentials = work / "bench-credentials.json"
+    credentials.write_text("{}")
+
+    os.environ.update({
+        "GROQ_API_KEY": "gsk_benchmark",
+        "GROQ_BASE_URL": groq_base_url,
+        "FIREBASE_CREDENTIALS_PATH": str(credentials),
+        "FIREBASE_STORAGE_BUCKET": "bench-bucket",
+        # El pipeline descarga el audio de BASE_URL: apuntar al servidor local
+        "BASE_URL": f"http://127.0.0.1:{api_port}",
+    })
+    os.chdir(work)
+
+    from benchmarks import memory_firestore
+    memory_firestore.firebase_service.latency_ms = firestore_latency_ms
+    memory_firestore.firebase_service.jitter_ms = firestore_jitter_ms
+    sys.modules["app.services.firebase_service"] = memory_firestore
+    return work
+
+class APIServer:
+    """La aplicación FastAPI servida por uvicorn en un hilo con su propio event loop"""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from app.main import app
+
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+        ))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 15.0) -> "APIServer":
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self.server.serve()), name="api-server", daemon=True
+        )
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=10)
@@ -0,0 +1,186 @@
+"""
+Servidor HTTP local que imita la API de Groq (Whisper y chat completions)
+
+El cliente oficial apunta aquí con GROQ_BASE_URL. La latencia de cada
+endpoint es configurable y el servidor puede responder 429 (con
+retry-after-ms, que el SDK respeta al reintentar) de forma aleatoria o al
+superar un límite de peticiones por minuto.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Optional
+
+TRANSCRIPTION_PATH = "/openai/v1/audio/transcriptions"
+CHAT_PATH = "/openai/v1/chat/completions"
+
+SAMPLE_TRANSCRIPTION = (
+    "Nayra pachanxa achachilanakax Pachamamaru waxt'apxiritayna. "
+    "Antes los abuelos hacían ofrendas a la Pachamama junto al lago."
+)
+
+SAMPLE_ANALYSIS = {
+    "keywords": ["Pachamama", "waxt'a", "achachila", "Titicaca"],
+    "category": "ritual",
+    "cultural_significance": "high",
+    "title": "La ofrenda de los abuelos a la Pachamama",
+    "description": "Relato sintético generado por el servidor Groq de benchmark.",
+    "spanish_translation": "Antes los abuelos hacían ofrendas a la Pachamama."
+}
+
+@dataclass
+class FakeGroqConfig:
+    transcription_latency_ms: float = 800.0
+    chat_latency_ms: float = 1200.0
+    jitter_ms: float = 100.0
+    error_rate_429: float = 0.0       # Probabilidad de responder 429 sin motivo
+    requests_per_minute: int = 0      # 0 = sin límite
+    retry_after_ms: int = 250
+    audio_seconds: float = 30.0       # Duración informada en verbose_json
+
+@dataclass
+class FakeGroqStats:
+    transcriptions: int = 0
+    chat_completions: int = 0
+    rate_limited: int = 0
+    bytes_received: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+class FakeGroqServer:
+    """Servidor Groq falso en un hilo (ThreadingHTTPServer)"""
+
+    def __init__(self, config: Optional[FakeGroqConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeGroqConfig()
+        self.stats = FakeGroqStats()
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _rate_limited(self) -> bool:
+        config = self.config
+        if config.error_rate_429 and random.random() < config.error_rate_429:
+            return True
+        if not config.requests_per_minute:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= config.requests_per_minute:
+                return True
+            self._recent.append(now)
+        return False
+
+    def _sleep(self, latency_ms: float) -> None:
+        delay = latency_ms + random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _transcription(self) -> Dict[str, Any]:
+        self._sleep(self.config.transcription_latency_ms)
+        duration = self.config.audio_seconds
+        sentences = SAMPLE_TRANSCRIPTION.split(". ")
+        step = duration / len(sentences)
+        return {
+            "task": "transcribe",
+            "language": "spanish",
+            "duration": duration,
+            "text": SAMPLE_TRANSCRIPTION,
+            "segments": [
+                {"id": i, "start": round(i * step, 2), "end": round((i + 1) * step, 2), "text": sentence}
+                for i, sentence in enumerate(sentences)
+            ]
+        }
+
+    def _chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self._sleep(self.config.chat_latency_ms)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        content = json.dumps(SAMPLE_ANALYSIS, ensure_ascii=False)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "unknown"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content.split()),
+                "total_tokens": prompt_tokens + len(content.split())
+            }
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with server._lock:
+                    server.stats.bytes_received += len(body)
+                    server.stats.by_path[self.path] = server.stats.by_path.get(self.path, 0) + 1
+
+                if self.path not in (TRANSCRIPTION_PATH, CHAT_PATH):
+                    self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                if server._rate_limited():
+                    with server._lock:
+                        server.stats.rate_limited += 1
+                    self._reply(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                        {"retry-after-ms": str(server.config.retry_after_ms)}
+                    )
+                    return
+
+                if self.path == TRANSCRIPTION_PATH:
+                    payload = server._transcription()
+                    with server._lock:
+                        server.stats.transcriptions += 1
+                else:
+                    payload = server._chat_completion(json.loads(body or b"{}"))
+                    with server._lock:
+                        server.stats.chat_completions += 1
+                self._reply(200, payload)
+
+        return Handler
@@ -0,0 +1,338 @@
+"""
+Implementación en memoria de FirebaseService para benchmarks
+
+Expone la misma interfaz y los mismos nombres de módulo que
+app.services.firebase_service (firebase_service, FIRESTORE_BATCH_LIMIT);
+benchmarks.environment la registra en su lugar antes de importar la app.
+Cada llamada simula la latencia de red de Firestore en el mismo sitio en
+que bloquea el SDK real: dentro del event loop en los métodos que llaman
+al SDK directamente y en un hilo en los que usan asyncio.to_thread, de
+modo que los bloqueos del loop se reproducen igual que en producción.
+"""
+
+import asyncio
+import copy
+import itertools
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import geohash2
+from app.core.metrics import firestore_operation, record_firestore_documents
+
+# Máximo de operaciones por WriteBatch permitido por Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+def _get_field(data: Dict[str, Any], path: str) -> Any:
+    """Leer un campo con ruta de puntos (narrator.community)"""
+    value: Any = data
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _project(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Copia del documento limitada a fields (como select() / field_paths)"""
+    if not fields:
+        return copy.deepcopy(data)
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        value = _get_field(data, path)
+        if value is None:
+            continue
+        target = projected
+        parts = path.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+def geohash_neighbors(center: str) -> List[str]:
+    """Las 8 celdas vecinas de un geohash"""
+    lat, lon, lat_err, lon_err = geohash2.decode_exactly(center)
+    neighbors = []
+    for dlat, dlon in itertools.product((-1, 0, 1), repeat=2):
+        if dlat == 0 and dlon == 0:
+            continue
+        neighbor_lat = max(min(lat + dlat * 2 * lat_err, 90.0), -90.0)
+        neighbor_lon = (lon + dlon * 2 * lon_err + 180.0) % 360.0 - 180.0
+        neighbors.append(geohash2.encode(neighbor_lat, neighbor_lon, precision=len(center)))
+    return list(dict.fromkeys(n for n in neighbors if n != center))
+
+class _Bucket:
+    name = "bench-bucket"
+
+class InMemoryFirebaseService:
+    """
+    Colección stories en un dict con latencia simulada
+
+    Args:
+        latency_ms: Latencia media de cada viaje a Firestore
+        jitter_ms: Variación aleatoria (uniforme) de la latencia
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stories: Dict[str, Dict[str, Any]] = {}
+        self.bucket = _Bucket()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _round_trip(self) -> None:
+        """Simular la latencia de red (bloquea el hilo actual, como el SDK)"""
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _new_id(self) -> str:
+        return f"bench{next(self._ids):015d}"
+
+    def load(self, stories: Iterable[Dict[str, Any]]) -> int:
+        """Cargar relatos sin latencia ni métricas (preparación del benchmark)"""
+        count = 0
+        with self._lock:
+            for story in stories:
+                story = copy.deepcopy(story)
+                story_id = story.pop('id', None) or self._new_id()
+                self.stories[story_id] = story
+                count += 1
+        return count
+
+    # === FIRESTORE OPERATIONS ===
+
+    @firestore_operation('create_story')
+    async def create_story(self, story_data: Dict[str, Any]) -> str:
+        """Crear un nuevo relato"""
+        if 'location' in story_data:
+            lat = story_data['location']['latitude']
+            lon = story_data['location']['longitude']
+            story_data['location']['geohash'] = geohash2.encode(lat, lon, precision=8)
+        now = datetime.utcnow()
+        story_data['createdAt'] = now
+        story_data['updatedAt'] = now
+
+        self._round_trip()
+        story_id = self._new_id()
+        with self._lock:
+            self.stories[story_id] = copy.deepcopy(story_data)
+        record_firestore_documents('write')
+        return story_id
+
+    @firestore_operation('get_story')
+    async def get_story(self, story_id: str) -> Optional[Dict[str, Any]]:
+        """Obtener un relato por ID"""
+        self._round_trip()
+        record_firestore_documents('read')
+        with self._lock:
+            data = self.stories.get(story_id)
+            if data is None:
+                return None
+            data = copy.deepcopy(data)
+        data['id'] = story_id
+        return data
+
+    @firestore_operation('update_story')
+    async def update_story(self, story_id: str, update_data: Dict[str, Any]) -> bool:
+        """Actualizar un relato (False si no existe, como el servicio real)"""
+        update_data['updatedAt'] = datetime.utcnow()
+        self._round_trip()
+        with self._lock:
+            story = self.stories.get(story_id)
+            if story is None:
+                return False
+            story.update(copy.deepcopy(update_data))
+        record_firestore_documents('write')
+        return True
+
+    @firestore_operation('bulk_update')
+    async def bulk_update(
+        self,
+        updates: Iterable[Tuple[str, Dict[str, Any]]],
+        collection: str = 'stories',
+        batch_size: int = FIRESTORE_BATCH_LIMIT,
+        max_retries: int = 5,
+        touch_updated_at: bool = True
+    ) -> Dict[str, Any]:
+        """Actualizar muchos documentos en lotes (un viaje por lote)"""
+        return await asyncio.to_thread(
+            self._bulk_update_sync,
+            list(updates),
+            min(batch_size, FIRESTORE_BATCH_LIMIT),
+            touch_updated_at
+        )
+
+    def _bulk_update_sync(
+        self,
+        updates: List[Tuple[str, Dict[str, Any]]],
+        batch_size: int,
+        touch_updated_at: bool
+    ) -> Dict[str, Any]:
+        result = {'written': 0, 'failed': [], 'batches': 0, 'retries': 0}
+        for start in range(0, len(updates), batch_size):
+            chunk = updates[start:start + batch_size]
+            self._round_trip()
+            with self._lock:
+                for doc_id, fields in chunk:
+                    story = self.stories.get(doc_id)
+                    if story is None:
+                        result['failed'].append({'id': doc_id, 'error': 'No document to update'})
+                        continue
+                    story.update(copy.deepcopy(fields))
+                    if touch_updated_at:
+                        story['updatedAt'] = datetime.utcnow()
+                    result['written'] += 1
+            record_firestore_documents('write', len(chunk))
+            result['batches'] += 1
+        return result
+
+    @firestore_operation('delete_story')
+    async def delete_story(self, story_id: str) -> bool:
+        """Eliminar un relato (soft delete)"""
+        self._round_trip()
+        with self._lock:
+            story = self.stories.get(story_id)
+            if story is None:
+                return False
+            story.update({'status': 'archived', 'updatedAt': datetime.utcnow()})
+        record_firestore_documents('write')
+        return True
+
+    @firestore_operation('list_stories')
+    async def list_stories(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        status: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Listar relatos con paginación y filtros (mismo patrón de lecturas que el real)"""
+        with self._lock:
+            matches = [
+                (story_id, data) for story_id, data in self.stories.items()
+                if (not status or data.get('status') == status)
+                and (not category or data.get('category') == category)
+            ]
+        matches.sort(key=lambda item: item[1].get('createdAt') or datetime.min, reverse=True)
+
+        # El servicio real recorre la consulta completa para contar el total
+        self._round_trip()
+        total = len(matches)
+        record_firestore_documents('streamed', total)
+
+        offset = (page - 1) * page_size
+        self._round_trip()
+        stories = []
+        for story_id, data in matches[offset:offset + page_size]:
+            data = copy.deepcopy(data)
+            data['id'] = story_id
+            stories.append(data)
+        record_firestore_documents('streamed', len(stories))
+
+        return {
+            'stories': stories,
+            'total': total,
+            'page': page,
+            'pageSize': page_size,
+            'hasMore': (offset + page_size) < total
+        }
+
+    @firestore_operation('get_stories')
+    async def get_stories(
+        self,
+        story_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Leer varios relatos en un solo viaje, manteniendo el orden"""
+        def fetch() -> List[Dict[str, Any]]:
+            self._round_trip()
+            found = []
+            with self._lock:
+                for story_id in dict.fromkeys(story_ids):
+                    record_firestore_documents('read')
+                    if story_id in self.stories:
+                        data = _project(self.stories[story_id], fields)
+                        data['id'] = story_id
+                        found.append(data)
+            return found
+
+        return await asyncio.to_thread(fetch)
+
+    @firestore_operation('list_stories_by_community')
+    async def list_stories_by_community(
+        self,
+        community: str,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Relatos de una comunidad (sin archivados), con proyección opcional"""
+        def fetch() -> List[Dict[str, Any]]:
+            self._round_trip()
+            stories = []
+            with self._lock:
+                for story_id, data in self.stories.items():
+                    if _get_field(data, 'narrator.community') != community:
+                        continue
+                    record_firestore_documents('streamed')
+                    if data.get('status') == 'archived':
+                        continue
+                    projected = _project(data, list(dict.fromkeys([*fields, 'status'])) if fields else None)
+                    projected['id'] = story_id
+                    stories.append(projected)
+            return stories
+
+        return await asyncio.to_thread(fetch)
+
+    def stream_stories(self, fields: Optional[List[str]] = None):
+        """Recorrer todos los relatos (incluidos archivados)"""
+        self._round_trip()
+        with self._lock:
+            snapshot = list(self.stories.items())
+        for story_id, data in snapshot:
+            record_firestore_documents('streamed')
+            yield story_id, _project(data, fields)
+
+    @firestore_operation('find_nearby_stories')
+    async def find_nearby_stories(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 10.0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Buscar relatos cercanos: una consulta por prefijo de geohash (centro y vecinos)"""
+        center_geohash = geohash2.encode(latitude, longitude, precision=5)
+        stories = []
+        for gh in [center_geohash] + geohash_neighbors(center_geohash):
+            self._round_trip()
+            with self._lock:
+                matches = [
+                    (story_id, data) for story_id, data in self.stories.items()
+                    if data.get('status') == 'published'
+                    and (_get_field(data, 'location.geohash') or '').startswith(gh)
+                ]
+            for story_id, data in sorted(matches, key=lambda item: item[1]['location']['geohash'])[:limit]:
+                record_firestore_documents('streamed')
+                data = copy.deepcopy(data)
+                data['id'] = story_id
+                stories.append(data)
+        return stories[:limit]
+
+    @firestore_operation('increment_views')
+    async def increment_views(self, story_id: str) -> bool:
+        """Incrementar contador de vistas"""
+        self._round_trip()
+        with self._lock:
+            story = self.stories.get(story_id)
+            if story is None:
+                return False
+            story['views'] = story.get('views', 0) + 1
+        record_firestore_documents('write')
+        return True
+
+# Alias para quien importe la clase por su nombre real
+FirebaseService = InMemoryFirebaseService
+
+# Singleton instance
+firebase_service = InMemoryFirebaseService()
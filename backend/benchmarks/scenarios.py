@@ -0,0 +1,195 @@
+"""
+Escenarios de carga contra la API servida por uvicorn
+
+Cada escenario es una operación de usuario (una o varias peticiones) que
+se repite con N clientes concurrentes. Se mide la latencia de cada
+operación completa y se suman las lecturas/escrituras de Firestore que
+informan las cabeceras X-Firestore-Reads / X-Firestore-Writes.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+import httpx
+from benchmarks.dataset import COMMUNITIES
+
+API = "/api/v1"
+
+@dataclass
+class BenchContext:
+    story_ids: List[str]
+    audio: bytes
+    poll_interval: float = 0.1
+    process_timeout: float = 120.0
+
+class OperationError(Exception):
+    pass
+
+def _check(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise OperationError(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+    return response
+
+# === OPERACIONES ===
+
+async def list_stories(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> List[httpx.Response]:
+    params = {"page": rng.randint(1, 5), "page_size": 20, "status": "published"}
+    return [_check(await client.get(f"{API}/stories/", params=params))]
+
+async def nearby(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> List[httpx.Response]:
+    _, lat, lon = rng.choice(COMMUNITIES)
+    params = {
+        "latitude": lat + rng.uniform(-0.05, 0.05),
+        "longitude": lon + rng.uniform(-0.05, 0.05),
+        "radius_km": 10,
+    }
+    return [_check(await client.get(f"{API}/stories/nearby/search", params=params))]
+
+async def get_and_view(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> List[httpx.Response]:
+    return [_check(await client.get(f"{API}/stories/{rng.choice(ctx.story_ids)}"))]
+
+async def upload_and_process(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> List[httpx.Response]:
+    """Subir audio, crear el relato, procesarlo y esperar a que termine el pipeline"""
+    _, lat, lon = rng.choice(COMMUNITIES)
+    responses = [_check(await client.post(
+        f"{API}/upload/audio",
+        files={"file": ("relato.wav", ctx.audio, "audio/wav")}
+    ))]
+    audio_url = responses[-1].json()["data"]["url"]
+
+    responses.append(_check(await client.post(f"{API}/stories/", json={
+        "audioUrl": audio_url,
+        "audioDuration": 5,
+        "audioFormat": "wav",
+        "narrator": {
+            "name": "Narradora de prueba",
+            "community": "Achacachi",
+            "language": "aymara",
+            "consentGiven": True
+        },
+        "location": {"latitude": lat, "longitude": lon}
+    })))
+    story_id = responses[-1].json()["id"]
+
+    responses.append(_check(await client.post(f"{API}/audio/process", json={
+        "story_id": story_id, "audio_url": audio_url, "language": "ay"
+    })))
+    job_id = responses[-1].json()["job_id"]
+
+    deadline = time.monotonic() + ctx.process_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(ctx.poll_interval)
+        status = _check(await client.get(f"{API}/audio/status/{job_id}"))
+        job = status.json()
+        if job["status"] == "completed":
+            responses.append(status)
+            return responses
+        if job["status"] == "failed":
+            raise OperationError(f"pipeline failed: {job.get('error')}")
+    raise OperationError("pipeline timed out")
+
+async def qr_image(client: httpx.AsyncClient, ctx: BenchContext, rng: random.Random) -> List[httpx.Response]:
+    size = rng.choice((256, 512))
+    return [_check(await client.get(f"{API}/qr/{rng.choice(ctx.story_ids)}/image", params={"size": size}))]
+
+Operation = Callable[[httpx.AsyncClient, BenchContext, random.Random], Awaitable[List[httpx.Response]]]
+
+SCENARIOS: Dict[str, Operation] = {
+    "list": list_stories,
+    "nearby": nearby,
+    "get_view": get_and_view,
+    "upload_process": upload_and_process,
+    "qr": qr_image,
+}
+
+# === EJECUCIÓN ===
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+@dataclass
+class ScenarioResult:
+    name: str
+    concurrency: int
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    error_samples: List[str] = field(default_factory=list)
+    requests: int = 0
+    firestore_reads: int = 0
+    firestore_writes: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        operations = len(latencies)
+        ms = lambda seconds: round(seconds * 1000, 2)
+        return {
+            "concurrency": self.concurrency,
+            "operations": operations,
+            "errors": self.errors,
+            "error_samples": self.error_samples,
+            "http_requests": self.requests,
+            "seconds": round(self.seconds, 3),
+            "throughput_per_s": round(operations / self.seconds, 2) if self.seconds else 0.0,
+            "latency_ms": {
+                "p50": ms(percentile(latencies, 50)),
+                "p90": ms(percentile(latencies, 90)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(latencies[-1]) if latencies else 0.0,
+                "mean": ms(sum(latencies) / operations) if operations else 0.0,
+            },
+            "firestore_reads_per_op": round(self.firestore_reads / operations, 2) if operations else 0.0,
+            "firestore_writes_per_op": round(self.firestore_writes / operations, 2) if operations else 0.0,
+            **self.extra,
+        }
+
+async def run_scenario(
+    name: str,
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    operations: int,
+    concurrency: int,
+    warmup: int = 0,
+    seed: int = 0
+) -> ScenarioResult:
+    """Ejecutar operations repeticiones de un escenario con concurrency clientes"""
+    operation = SCENARIOS[name]
+    result = ScenarioResult(name=name, concurrency=concurrency)
+    remaining = operations
+
+    for i in range(warmup):
+        try:
+            await operation(client, ctx, random.Random(seed - i - 1))
+        except Exception:
+            pass
+
+    async def worker(worker_id: int) -> None:
+        nonlocal remaining
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                responses = await operation(client, ctx, rng)
+            except Exception as e:
+                result.errors += 1
+                if len(result.error_samples) < 5:
+                    result.error_samples.append(str(e) or type(e).__name__)
+                continue
+            result.latencies.append(time.perf_counter() - started)
+            result.requests += len(responses)
+            for response in responses:
+                result.firestore_reads += int(response.headers.get("X-Firestore-Reads", 0))
+                result.firestore_writes += int(response.headers.get("X-Firestore-Writes", 0))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    result.seconds = time.perf_counter() - started
+    return result
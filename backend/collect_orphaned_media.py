@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Script para recolectar audios y QR que ningún relato referencia.
+
+Recorre la colección stories de Firestore, arma el conjunto de archivos
+referenciados y aparta en storage/quarantine/ (o borra con --delete) los
+huérfanos más antiguos que el periodo de gracia. Las cuarentenas se
+borran definitivamente pasados MEDIA_GC_QUARANTINE_DAYS días.
+
+Uso:
+    python collect_orphaned_media.py --dry-run              # Solo informar
+    python collect_orphaned_media.py                        # Cuarentena
+    python collect_orphaned_media.py --delete --grace-hours 72
+    python collect_orphaned_media.py --collect-archived     # Ignorar relatos archivados
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.services.media_gc import media_gc
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recolectar medios huérfanos en storage/")
+    parser.add_argument("--dry-run", action="store_true", help="Solo informar, no mover ni borrar")
+    parser.add_argument("--delete", action="store_true", help="Borrar en lugar de poner en cuarentena")
+    parser.add_argument("--grace-hours", type=float, default=settings.MEDIA_GC_GRACE_HOURS,
+                        help="Edad mínima de un huérfano (por defecto: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=settings.MEDIA_GC_BATCH_SIZE,
+                        help="Archivos por lote (por defecto: %(default)s)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes")
+    parser.add_argument("--collect-archived", action="store_true",
+                        help="Tratar los medios de relatos archivados como huérfanos")
+    parser.add_argument("--json", action="store_true", help="Imprimir el informe en JSON")
+    args = parser.parse_args()
+
+    print("🧹 Recolectando medios huérfanos...")
+    if args.dry_run:
+        print("⚠️  DRY RUN: no se modificará ningún archivo\n")
+
+    try:
+        report = media_gc.collect(
+            grace_hours=args.grace_hours,
+            batch_size=args.batch_size,
+            quarantine=not args.delete,
+            keep_archived=not args.collect_archived,
+            dry_run=args.dry_run,
+            pause=args.pause
+        )
+    except Exception as e:
+        print(f"❌ Error leyendo referencias de Firestore, no se tocó ningún archivo: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"📚 Relatos: {report['stories']}")
+    print(f"📁 Archivos revisados: {report['scanned']}")
+    print(f"⏳ Huérfanos recientes (en gracia): {report['skipped_recent']}")
+    print(f"🗑️  Huérfanos: {report['orphaned']} "
+          f"(audios {report['by_kind']['audios']}, qr {report['by_kind']['qr']}, blobs {report['by_kind']['blobs']})")
+    action = "recuperables" if args.dry_run else ("en cuarentena" if report["mode"] == "quarantine" else "recuperados")
+    print(f"💾 Espacio {action}: {format_bytes(report['reclaimed_bytes'])}")
+    purged = report["quarantine_purged"]
+    if purged["files"]:
+        print(f"🔥 Cuarentena purgada: {purged['files']} archivos, {format_bytes(purged['bytes'])}")
+    if report["expired_uploads"]:
+        print(f"⌛ Subidas reanudables expiradas: {report['expired_uploads']}")
+    if report["errors"]:
+        print(f"❌ Errores: {report['errors']}")
+    print(f"\n✅ Completado en {report['duration_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -143,7 +143,7 @@ async def publish_all_drafts():
         print("🔍 Buscando historias en estado 'draft'...\n")
 
         stories_ref = firebase_service.db.collection('stories')
-        query = stories_ref.where(filter=FieldFilter('status', '==', 'draft'))
+        query = stories_ref.where(filter=FieldFilter('status', '==', 'draft')).select(['title'])
         docs = query.stream()
 
         draft_stories = [(doc.id, doc.to_dict()) for doc in docs]
@@ -160,22 +160,17 @@ async def publish_all_drafts():
             print("❌ Operación cancelada")
             return 0
 
-        # Publicar cada una
-        published_count = 0
-        for story_id, data in draft_stories:
-            title = data.get('title', 'Sin título')
-            print(f"\n📤 Publicando: {title} ({story_id})")
+        # Publicar en lotes de hasta 500 escrituras
+        result = await firebase_service.bulk_update(
+            (story_id, {'status': 'published'}) for story_id, _ in draft_stories
+        )
+        published_count = result['written']
 
-            success = await firebase_service.update_story(story_id, {
-                'status': 'published'
-            })
-
-            if success:
-                print(f"   ✅ Publicada")
-                published_count += 1
-            else:
-                print(f"   ❌ Error")
+        titles = {story_id: data.get('title', 'Sin título') for story_id, data in draft_stories}
+        for failure in result['failed']:
+            print(f"   ❌ {titles.get(failure['id'])} ({failure['id']}): {failure['error']}")
 
+        print(f"\n📦 {result['batches']} lotes, {result['retries']} reintentos")
         print(f"\n✨ Publicadas {published_count} de {len(draft_stories)} historias")
         return published_count
 
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Script para generar un archivo sintético de relatos (10^5–10^6) y cargarlo
+en Firestore, en el emulador o en un fixture para pruebas de escala.
+
+Los relatos tienen la forma de Story: coordenadas agrupadas alrededor de
+comunidades del altiplano con geohash válido, categorías y palabras clave
+con distribuciones realistas y fechas de los últimos dos años. Con la
+misma semilla se generan exactamente los mismos documentos (mismos IDs).
+La carga usa WriteBatch de 500 operaciones desde varios hilos, con
+reintentos de errores transitorios y la rampa 500/50/5 de Firestore.
+
+Los fixtures (JSON Lines, .gz opcional) se pueden volver a cargar con
+--from-fixture o usar en benchmark_api.py --fixture.
+
+Uso:
+    python generate_archive.py --count 100000 --target none --fixture-out archive.jsonl.gz
+    python generate_archive.py --count 1000000 --target emulator --emulator-host localhost:8080
+    python generate_archive.py --from-fixture archive.jsonl.gz --target firestore --collection stories_scale
+    python generate_archive.py --count 2000 --audio --target firestore   # con audios WAV locales
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from google.api_core import exceptions as google_exceptions
+from benchmarks.dataset import generate_stories, load_fixture, save_fixture, wav_bytes
+
+# Máximo de operaciones por WriteBatch permitido por Firestore
+BATCH_SIZE = 500
+
+# Relatos validados contra el esquema Story antes de cargar
+VALIDATE_SAMPLE = 100
+
+# Mismos errores transitorios que reintenta FirebaseService.bulk_update
+RETRYABLE_WRITE_ERRORS = (
+    google_exceptions.Aborted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
+
+
+class RampLimiter:
+    """
+    Límite de operaciones/s compartido entre hilos con la rampa 500/50/5
+
+    Empieza en ops_per_second y sube un 50% cada 5 minutos, como
+    recomienda Firestore para colecciones nuevas. 0 = sin límite.
+    """
+
+    def __init__(self, ops_per_second: int):
+        self.ops_per_second = ops_per_second
+        self.started = time.monotonic()
+        self.window_start = self.started
+        self.window_ops = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, ops: int) -> None:
+        if not self.ops_per_second:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                rate = self.ops_per_second * 1.5 ** int((now - self.started) // 300)
+                if now - self.window_start >= 1.0:
+                    self.window_start, self.window_ops = now, 0
+                if self.window_ops == 0 or self.window_ops + ops <= rate:
+                    self.window_ops += ops
+                    return
+                delay = 1.0 - (now - self.window_start)
+            time.sleep(max(delay, 0.01))
+
+
+class ArchiveLoader:
+    def __init__(self, db, collection: str, writers: int, ops_per_second: int, max_retries: int = 5):
+        self.db = db
+        self.collection = db.collection(collection) if db is not None else None
+        self.writers = writers
+        self.limiter = RampLimiter(ops_per_second)
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.report: Dict[str, Any] = {
+            'generated': 0,
+            'written': 0,
+            'failed': 0,
+            'errors': [],
+            'batches': 0,
+            'retries': 0
+        }
+
+    def _commit(self, chunk: List[Dict[str, Any]]) -> None:
+        self.limiter.acquire(len(chunk))
+        for attempt in range(self.max_retries + 1):
+            batch = self.db.batch()
+            for story in chunk:
+                data = dict(story)
+                batch.set(self.collection.document(data.pop('id')), data)
+            try:
+                batch.commit()
+                with self.lock:
+                    self.report['written'] += len(chunk)
+                    self.report['batches'] += 1
+                return
+            except RETRYABLE_WRITE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self._fail(chunk, e)
+                    return
+                with self.lock:
+                    self.report['retries'] += 1
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random()))
+            except Exception as e:
+                self._fail(chunk, e)
+                return
+
+    def _fail(self, chunk: List[Dict[str, Any]], error: Exception) -> None:
+        with self.lock:
+            self.report['failed'] += len(chunk)
+            self.report['batches'] += 1
+            if len(self.report['errors']) < 10:
+                self.report['errors'].append({'first_id': chunk[0]['id'], 'error': str(error)})
+
+    def progress_line(self, started: float) -> str:
+        elapsed = max(time.monotonic() - started, 1e-6)
+        loaded = self.report['written'] if self.db is not None else self.report['generated']
+        return (
+            f"⏳ Generados {self.report['generated']} | escritos {self.report['written']} | "
+            f"fallidos {self.report['failed']} | {loaded / elapsed:.0f} relatos/s"
+        )
+
+    def load(self, stories: Iterable[Dict[str, Any]], show_progress: bool = True) -> Dict[str, Any]:
+        """Cargar relatos en lotes desde varios hilos (sin tenerlos todos en memoria)"""
+        started = time.monotonic()
+        last_progress = started
+        pending: Set[Future] = set()
+        chunk: List[Dict[str, Any]] = []
+
+        with ThreadPoolExecutor(max_workers=self.writers) as pool:
+            def submit(chunk: List[Dict[str, Any]]) -> None:
+                nonlocal pending
+                if self.db is not None:
+                    # Contrapresión: como mucho dos lotes en cola por hilo
+                    while len(pending) >= self.writers * 2:
+                        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.add(pool.submit(self._commit, chunk))
+
+            for story in stories:
+                self.report['generated'] += 1
+                chunk.append(story)
+                if len(chunk) == BATCH_SIZE:
+                    submit(chunk)
+                    chunk = []
+                if show_progress and time.monotonic() - last_progress >= 1:
+                    last_progress = time.monotonic()
+                    print(self.progress_line(started), flush=True)
+            if chunk:
+                submit(chunk)
+            wait(pending)
+
+        elapsed = time.monotonic() - started
+        self.report['total_seconds'] = round(elapsed, 2)
+        loaded = self.report['written'] if self.db is not None else self.report['generated']
+        self.report['stories_per_second'] = round(loaded / elapsed, 1) if elapsed else 0.0
+        return self.report
+
+
+class AudioAttacher:
+    """Asignar a cada relato un WAV corto real en storage/audios (deduplicado por contenido)"""
+
+    def __init__(self, seconds: float, variants: int):
+        from app.services.local_storage import local_storage
+        self.local_storage = local_storage
+        self.seconds = seconds
+        # Pocas variantes: el almacén de blobs guarda cada contenido una vez
+        self.variants = [
+            wav_bytes(seconds, sample_rate=8000, frequency=160.0 + 20 * i) for i in range(variants)
+        ]
+        self.files = 0
+
+    def attach(self, story: Dict[str, Any]) -> Dict[str, Any]:
+        audio = self.variants[self.files % len(self.variants)]
+        filename = f"{story['id']}_{os.urandom(4).hex()}.wav"
+        tmp_path = self.local_storage.uploads_dir / f"{filename}.tmp"
+        tmp_path.write_bytes(audio)
+        self.local_storage.store_blob(tmp_path, self.local_storage.new_audio_path(filename))
+        self.files += 1
+        story.update({
+            'audioUrl': f"/storage/audios/{filename}",
+            'audioDuration': round(self.seconds),
+            'audioSize': len(audio),
+            'audioFormat': 'wav'
+        })
+        return story
+
+
+def validate_sample(stories: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Validar los primeros relatos contra el esquema Story y reenviarlos todos"""
+    from app.schemas.story import Story
+    for index, story in enumerate(stories):
+        if index < VALIDATE_SAMPLE:
+            Story(**story)
+        yield story
+
+
+def connect(args: argparse.Namespace):
+    """Cliente de Firestore según el destino (None si solo se genera)"""
+    if args.target == 'none':
+        return None
+    if args.target == 'emulator':
+        # Con FIRESTORE_EMULATOR_HOST el cliente usa credenciales anónimas
+        os.environ['FIRESTORE_EMULATOR_HOST'] = args.emulator_host
+        from google.cloud import firestore
+        return firestore.Client(project=args.project)
+    from app.services.firebase_service import firebase_service
+    return firebase_service.db
+
+
+def print_report(report: Dict[str, Any], args: argparse.Namespace) -> None:
+    print("=" * 70)
+    print("🏔️  ARCHIVO SINTÉTICO")
+    print("=" * 70)
+    print(f"🎯 Destino: {args.target}" + (f" (colección {args.collection})" if args.target != 'none' else ""))
+    print(f"📚 Relatos generados: {report['generated']}")
+    if args.target != 'none':
+        print(f"✏️  Escritos: {report['written']} en {report['batches']} lotes ({report['retries']} reintentos)")
+        print(f"❌ Fallidos: {report['failed']}")
+        for failure in report['errors']:
+            print(f"   ❌ lote desde {failure['first_id']}: {failure['error']}")
+    if report.get('audio_files'):
+        print(f"🎙️  Audios creados: {report['audio_files']}")
+    if args.fixture_out:
+        print(f"💾 Fixture: {args.fixture_out}")
+    print(f"⏱️  {report['total_seconds']}s, {report['stories_per_second']} relatos/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar y cargar un archivo sintético de relatos')
+    parser.add_argument('--count', type=int, default=100000, help='Relatos a generar (por defecto: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla (mismos datos e IDs con la misma semilla)')
+    parser.add_argument('--published-ratio', type=float, default=0.85)
+    parser.add_argument('--archived-ratio', type=float, default=0.05)
+    parser.add_argument('--from-fixture', type=str, help='Cargar los relatos de un fixture en lugar de generarlos')
+    parser.add_argument('--fixture-out', type=str, help='Guardar los relatos en un fixture JSON Lines (.gz opcional)')
+    parser.add_argument('--target', choices=['firestore', 'emulator', 'none'], default='firestore',
+                        help='Destino de la carga (por defecto: %(default)s)')
+    parser.add_argument('--emulator-host', type=str, default='localhost:8080')
+    parser.add_argument('--project', type=str, default='demo-aimara', help='Proyecto del emulador')
+    parser.add_argument('--collection', type=str, default='stories', help='Colección destino (por defecto: %(default)s)')
+    parser.add_argument('--writers', type=int, default=8, help='Hilos escribiendo lotes (por defecto: %(default)s)')
+    parser.add_argument('--ops-per-second', type=int,
+                        help='Escrituras/s iniciales (rampa +50%% cada 5 min). Por defecto '
+                             'FIRESTORE_BULK_OPS_PER_SECOND en Firestore y sin límite en el emulador')
+    parser.add_argument('--audio', action='store_true', help='Crear un WAV corto real por relato en storage/audios')
+    parser.add_argument('--audio-seconds', type=float, default=2.0)
+    parser.add_argument('--audio-variants', type=int, default=16, help='Contenidos de audio distintos')
+    parser.add_argument('--json', action='store_true', help='Imprimir el informe en JSON')
+    args = parser.parse_args()
+
+    if args.target == 'none' and not args.fixture_out:
+        parser.error("--target none sin --fixture-out no produce nada")
+
+    ops_per_second = args.ops_per_second
+    if ops_per_second is None:
+        if args.target == 'firestore':
+            from app.core.config import settings
+            ops_per_second = settings.FIRESTORE_BULK_OPS_PER_SECOND
+        else:
+            ops_per_second = 0
+
+    try:
+        db = connect(args)
+    except Exception as e:
+        print(f"❌ Error conectando con Firestore: {e}")
+        sys.exit(1)
+
+    if args.from_fixture:
+        stories: Iterator[Dict[str, Any]] = load_fixture(args.from_fixture, args.count)
+    else:
+        stories = generate_stories(args.count, args.seed, args.published_ratio, args.archived_ratio)
+
+    audio: Optional[AudioAttacher] = None
+    if args.audio:
+        audio = AudioAttacher(args.audio_seconds, max(args.audio_variants, 1))
+        stories = map(audio.attach, stories)
+    stories = validate_sample(stories)
+    if args.fixture_out:
+        stories = save_fixture(args.fixture_out, stories)
+
+    loader = ArchiveLoader(db, args.collection, max(args.writers, 1), ops_per_second)
+    try:
+        report = loader.load(stories, show_progress=not args.json)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if audio:
+        report['audio_files'] = audio.files
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report, args)
+
+
+if __name__ == '__main__':
+    main()
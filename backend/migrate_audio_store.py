@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Script para migrar storage/audios al almacén direccionado por contenido.
+
+Cada audio se indexa por su SHA-256 en storage/blobs/<ab>/<hash>.webm y el
+archivo original en storage/audios queda como hard link al blob, por lo que
+las URLs guardadas en Firestore (/storage/audios/...) siguen funcionando.
+Los audios con contenido idéntico pasan a compartir un único blob.
+
+Uso:
+    python migrate_audio_store.py --dry-run   # Solo reportar duplicados
+    python migrate_audio_store.py             # Migrar
+    python migrate_audio_store.py --stats     # Ver estado del almacén
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.local_storage import local_storage
+from app.services.waveform import PEAKS_SUFFIX
+
+
+def format_mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+def iter_audio_files():
+    """Audios originales de storage/audios (layout plano y fragmentado)"""
+    for path in sorted(local_storage.iter_files(local_storage.audio_dir)):
+        # Las renditions (.compact.webm, .16k.ogg) y los picos se regeneran: no son blobs
+        if '.' not in path.stem and path.suffix != PEAKS_SUFFIX:
+            yield path
+
+
+def show_stats():
+    """Mostrar uso de disco de blobs vs aliases"""
+    blobs = [p for p in local_storage.blobs_dir.rglob('*') if p.is_file()]
+    blob_bytes = sum(p.stat().st_size for p in blobs)
+    aliases = list(iter_audio_files())
+    alias_bytes = sum(p.stat().st_size for p in aliases)
+    unmigrated = [p for p in aliases if p.stat().st_nlink == 1]
+
+    print("📊 ALMACÉN DE AUDIOS")
+    print(f"   Audios (aliases): {len(aliases)} ({format_mb(alias_bytes)} lógicos)")
+    print(f"   Blobs únicos: {len(blobs)} ({format_mb(blob_bytes)} en disco)")
+    print(f"   Sin migrar: {len(unmigrated)}")
+
+
+def migrate(dry_run: bool = False):
+    """Migrar todos los audios al almacén de blobs"""
+    seen = {}
+    migrated = 0
+    deduplicated = 0
+    reclaimed = 0
+
+    for path in iter_audio_files():
+        size = path.stat().st_size
+
+        if dry_run:
+            digest = local_storage.hash_file(path)
+            if digest in seen:
+                print(f"♻️  {path.name} duplica a {seen[digest]} ({format_mb(size)})")
+                deduplicated += 1
+                reclaimed += size
+            else:
+                seen[digest] = path.name
+            continue
+
+        # Ya es alias de un blob: nada que hacer
+        if path.stat().st_nlink > 1:
+            continue
+
+        try:
+            digest, was_duplicate = local_storage.migrate_audio_to_blob(path)
+            migrated += 1
+            if was_duplicate:
+                deduplicated += 1
+                reclaimed += size
+                print(f"♻️  {path.name} -> {digest[:12]}… (duplicado)")
+            else:
+                print(f"✅ {path.name} -> {digest[:12]}…")
+        except Exception as e:
+            print(f"❌ Error migrando {path.name}: {e}")
+
+    print()
+    print("=" * 60)
+    if dry_run:
+        print(f"🔍 Duplicados encontrados: {deduplicated}")
+        print(f"💾 Espacio recuperable: {format_mb(reclaimed)}")
+    else:
+        print(f"✅ Audios migrados: {migrated}")
+        print(f"♻️  Duplicados unificados: {deduplicated}")
+        print(f"💾 Espacio recuperado: {format_mb(reclaimed)}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Migrar storage/audios al almacén direccionado por contenido'
+    )
+    parser.add_argument('--dry-run', action='store_true', help='Solo reportar, no modificar archivos')
+    parser.add_argument('--stats', action='store_true', help='Mostrar estado del almacén')
+    args = parser.parse_args()
+
+    if args.stats:
+        show_stats()
+    else:
+        migrate(dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Script para migrar storage/audios y storage/qr al layout fragmentado.
+
+Los archivos pasan de storage/audios/<nombre> a storage/audios/ab/cd/<nombre>
+(prefijo derivado del hash del nombre). Se puede ejecutar con el servidor
+en marcha: las URLs públicas no cambian y LocalStorageService resuelve
+ambas rutas mientras dura la migración.
+
+Uso:
+    python migrate_storage_layout.py --dry-run                # Contar archivos a mover
+    python migrate_storage_layout.py                          # Migrar audios y QR
+    python migrate_storage_layout.py --batch-size 500 --pause 0.5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.local_storage import local_storage
+
+
+def iter_legacy_files(directory: Path):
+    """Archivos que siguen en la raíz del directorio (layout plano)"""
+    for entry in directory.iterdir():
+        if entry.is_file() and not entry.name.startswith('.'):
+            yield entry
+
+
+def migrate_directory(directory: Path, batch_size: int, pause: float, dry_run: bool) -> int:
+    """Migrar un directorio por lotes, pausando entre lotes"""
+    print(f"📁 {directory}")
+    moved = 0
+    in_batch = 0
+    started = time.monotonic()
+
+    for path in iter_legacy_files(directory):
+        if dry_run:
+            moved += 1
+            continue
+
+        try:
+            if local_storage.migrate_to_sharded(path):
+                moved += 1
+                in_batch += 1
+        except Exception as e:
+            print(f"   ❌ Error moviendo {path.name}: {e}")
+
+        if in_batch >= batch_size:
+            elapsed = time.monotonic() - started
+            print(f"   ⏳ {moved} archivos movidos ({moved / elapsed:.0f}/s)")
+            in_batch = 0
+            # Ceder E/S al servidor entre lotes
+            time.sleep(pause)
+
+    action = "por mover" if dry_run else "movidos"
+    print(f"   ✅ {moved} archivos {action}")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Migrar storage/ al layout fragmentado ab/cd/<nombre>'
+    )
+    parser.add_argument('--batch-size', type=int, default=1000, help='Archivos por lote')
+    parser.add_argument('--pause', type=float, default=0.2, help='Segundos de pausa entre lotes')
+    parser.add_argument('--dry-run', action='store_true', help='Solo contar, no mover')
+    parser.add_argument('--only', choices=['audios', 'qr'], help='Migrar solo un directorio')
+    args = parser.parse_args()
+
+    directories = {
+        'audios': local_storage.audio_dir,
+        'qr': local_storage.qr_dir
+    }
+    if args.only:
+        directories = {args.only: directories[args.only]}
+
+    total = 0
+    for directory in directories.values():
+        total += migrate_directory(directory, args.batch_size, args.pause, args.dry_run)
+
+    print()
+    print("=" * 60)
+    print(f"✨ Total: {total} archivos")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Script para regenerar en masa los QR de los relatos (p. ej. tras cambiar BASE_URL).
+
+Cada QR codifica f"{BASE_URL}/story/{id}". El script recorre la colección
+stories en streaming (proyección), omite los relatos cuyo qrEncodedUrl ya
+coincide con la URL actual, renderiza el QR y la tarjeta imprimible en el
+pool de procesos y escribe las URLs en lotes de hasta 500 operaciones
+(FirebaseService.bulk_update). Los relatos anteriores a qrEncodedUrl se
+consideran afectados. Muestra el progreso y el rendimiento cada segundo.
+
+Uso:
+    python regenerate_qr_codes.py --dry-run            # Contar afectados
+    python regenerate_qr_codes.py                      # Regenerar
+    python regenerate_qr_codes.py --base-url https://nuevo.dominio --concurrency 16
+    python regenerate_qr_codes.py --force --include-archived --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.services.firebase_service import firebase_service, FIRESTORE_BATCH_LIMIT
+from app.services.local_storage import local_storage
+from app.services.qr_generator import render_story_qrs
+from app.services.workers import run_in_process, shutdown_process_pool
+
+# Campos leídos de cada relato (proyección)
+QR_FIELDS = ['title', 'status', 'narrator', 'qrEncodedUrl']
+
+_DONE = object()
+
+
+class QRRegenerationJob:
+    def __init__(
+        self,
+        base_url: str,
+        concurrency: int,
+        dry_run: bool = False,
+        force: bool = False,
+        include_archived: bool = False,
+        limit: Optional[int] = None
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.force = force
+        self.include_archived = include_archived
+        self.limit = limit
+
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+        self.flush_lock = asyncio.Lock()
+        self.started = time.monotonic()
+        self.report: Dict[str, Any] = {
+            'dry_run': dry_run,
+            'base_url': self.base_url,
+            'scanned': 0,
+            'up_to_date': 0,
+            'skipped_archived': 0,
+            'affected': 0,
+            'rendered': 0,
+            'render_errors': [],
+            'written': 0,
+            'write_failed': [],
+            'batches': 0
+        }
+
+    def story_url(self, story_id: str) -> str:
+        return f"{self.base_url}/story/{story_id}"
+
+    def _produce(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop) -> None:
+        """Leer relatos en streaming (hilo) y encolar los afectados"""
+        def put(item) -> None:
+            # Bloquea el hilo si la cola está llena (contrapresión)
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        try:
+            for story_id, data in firebase_service.stream_stories(QR_FIELDS):
+                self.report['scanned'] += 1
+                if data.get('status') == 'archived' and not self.include_archived:
+                    self.report['skipped_archived'] += 1
+                    continue
+                if not self.force and data.get('qrEncodedUrl') == self.story_url(story_id):
+                    self.report['up_to_date'] += 1
+                    continue
+                self.report['affected'] += 1
+                if not self.dry_run:
+                    put((story_id, data))
+                if self.limit and self.report['affected'] >= self.limit:
+                    break
+        finally:
+            for _ in range(self.concurrency):
+                put(_DONE)
+
+    async def _regenerate(self, story_id: str, data: Dict[str, Any]) -> None:
+        narrator = data.get('narrator') or {}
+        story_url = self.story_url(story_id)
+        qr_bytes, card_bytes = await run_in_process(
+            render_story_qrs,
+            story_url,
+            data.get('title') or 'Untitled Story',
+            narrator.get('name', 'Anónimo'),
+            narrator.get('community', '')
+        )
+        qr_url = await local_storage.upload_qr(qr_bytes, story_id)
+        printable_qr_url = await local_storage.upload_qr(card_bytes, story_id, "_printable")
+        self.report['rendered'] += 1
+        self.pending.append((story_id, {
+            'qrCodeUrl': qr_url,
+            'printableQrUrl': printable_qr_url,
+            'qrEncodedUrl': story_url
+        }))
+
+    async def _flush(self, force: bool = False) -> None:
+        """Escribir las actualizaciones acumuladas en lotes completos"""
+        if len(self.pending) < FIRESTORE_BATCH_LIMIT and not force:
+            return
+        async with self.flush_lock:
+            if not self.pending or (len(self.pending) < FIRESTORE_BATCH_LIMIT and not force):
+                return
+            updates, self.pending = self.pending, []
+            result = await firebase_service.bulk_update(updates, touch_updated_at=False)
+            self.report['written'] += result['written']
+            self.report['write_failed'].extend(result['failed'])
+            self.report['batches'] += result['batches']
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            story_id, data = item
+            try:
+                await self._regenerate(story_id, data)
+            except Exception as e:
+                self.report['render_errors'].append({'id': story_id, 'error': str(e)})
+            await self._flush()
+
+    def progress_line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        report = self.report
+        return (
+            f"⏳ Leídos {report['scanned']} | afectados {report['affected']} | "
+            f"renderizados {report['rendered']} | escritos {report['written']} | "
+            f"{report['rendered'] / elapsed:.1f} relatos/s"
+        )
+
+    async def _print_progress(self) -> None:
+        while True:
+            await asyncio.sleep(1)
+            print(self.progress_line(), flush=True)
+
+    async def run(self, show_progress: bool = True) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        ticker = asyncio.create_task(self._print_progress()) if show_progress else None
+
+        try:
+            await asyncio.gather(
+                asyncio.to_thread(self._produce, queue, loop),
+                *[self._worker(queue) for _ in range(self.concurrency)]
+            )
+            await self._flush(force=True)
+        finally:
+            if ticker:
+                ticker.cancel()
+
+        elapsed = time.monotonic() - self.started
+        self.report['total_seconds'] = round(elapsed, 2)
+        self.report['stories_per_second'] = round(self.report['rendered'] / elapsed, 1) if elapsed else 0.0
+        return self.report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("=" * 70)
+    print("🔲 REGENERACIÓN DE QR")
+    print("=" * 70)
+    if report['dry_run']:
+        print("⚠️  DRY RUN: no se generó ni escribió nada")
+    print(f"🌐 URL base: {report['base_url']}")
+    print(f"📚 Relatos leídos: {report['scanned']}")
+    print(f"✅ Ya al día: {report['up_to_date']}")
+    print(f"📦 Archivados omitidos: {report['skipped_archived']}")
+    print(f"🎯 Afectados: {report['affected']}")
+    print(f"🖨️  Renderizados: {report['rendered']} (errores: {len(report['render_errors'])})")
+    for failure in report['render_errors']:
+        print(f"   ❌ {failure['id']}: {failure['error']}")
+    print(f"✏️  Escritos: {report['written']} en {report['batches']} lotes")
+    for failure in report['write_failed']:
+        print(f"   ❌ {failure['id']}: {failure['error']}")
+    print(f"⏱️  {report['total_seconds']}s, {report['stories_per_second']} relatos/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Regenerar en masa los QR de los relatos')
+    parser.add_argument('--base-url', type=str, default=settings.BASE_URL,
+                        help='URL base codificada en los QR (por defecto: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=(os.cpu_count() or 2) * 2,
+                        help='Relatos renderizándose a la vez (por defecto: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='Solo contar los relatos afectados')
+    parser.add_argument('--force', action='store_true', help='Regenerar aunque la URL ya coincida')
+    parser.add_argument('--include-archived', action='store_true', help='Incluir relatos archivados')
+    parser.add_argument('--limit', type=int, help='Máximo de relatos a regenerar')
+    parser.add_argument('--json', action='store_true', help='Imprimir el informe en JSON')
+    args = parser.parse_args()
+
+    job = QRRegenerationJob(
+        base_url=args.base_url,
+        concurrency=max(args.concurrency, 1),
+        dry_run=args.dry_run,
+        force=args.force,
+        include_archived=args.include_archived,
+        limit=args.limit
+    )
+
+    try:
+        report = await job.run(show_progress=not args.json)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        shutdown_process_pool()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+"""
+Configuración común de los tests
+
+Settings exige GROQ_API_KEY y credenciales de Firebase al importarse, así
+que se definen valores de prueba antes de importar app. Los servicios
+crean storage/ en el directorio actual: los tests corren en uno temporal.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+_work_dir = Path(tempfile.mkdtemp(prefix="aimara-tests-"))
+_credentials = _work_dir / "firebase-test.json"
+_credentials.write_text("{}")
+
+os.environ.setdefault("GROQ_API_KEY", "gsk_test")
+os.environ.setdefault("FIREBASE_STORAGE_BUCKET", "test-bucket")
+os.environ["FIREBASE_CREDENTIALS_PATH"] = str(_credentials)
+
+
+def pytest_sessionstart(session):
+    # Después de resolver testpaths y antes de importar los módulos de test
+    os.chdir(_work_dir)
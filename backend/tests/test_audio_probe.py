@@ -0,0 +1,81 @@
+import io
+import struct
+
+from app.services.audio_probe import TAIL_SIZE, probe_audio
+
+# === WEBM ===
+
+def _ebml_size(size: int) -> bytes:
+    return (size | (1 << 56)).to_bytes(8, "big")
+
+def _element(element_id: bytes, payload: bytes) -> bytes:
+    return element_id + _ebml_size(len(payload)) + payload
+
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+def _webm(blocks: int, block_size: int, step_ms: int) -> bytes:
+    """WebM de MediaRecorder: sin Duration y un solo Cluster de tamaño desconocido"""
+    header = _element(b"\x1a\x45\xdf\xa3", _element(b"\x42\x82", b"webm"))
+    info = _element(b"\x15\x49\xa9\x66", _element(b"\x2a\xd7\xb1", struct.pack(">I", 1_000_000)))
+    track = _element(b"\xae", _element(b"\x83", b"\x02") + _element(b"\x86", b"A_OPUS"))
+    tracks = _element(b"\x16\x54\xae\x6b", track)
+    cluster = b"\x1f\x43\xb6\x75" + UNKNOWN_SIZE + _element(b"\xe7", b"\x00")
+    for index in range(blocks):
+        # Número de pista (vint) + timecode relativo (int16) + flags + datos
+        block = b"\x81" + struct.pack(">hB", index * step_ms, 0x80) + bytes(block_size)
+        cluster += _element(b"\xa3", block)
+    return header + b"\x18\x53\x80\x67" + UNKNOWN_SIZE + info + tracks + cluster
+
+def test_webm_duration_from_tail():
+    data = _webm(blocks=20, block_size=100, step_ms=20)
+    meta = probe_audio(io.BytesIO(data))
+    assert (meta.container, meta.codec) == ("webm", "opus")
+    assert meta.duration == 0.38
+    assert meta.suffix == ".webm"
+
+def test_webm_large_cluster_needs_full_scan():
+    data = _webm(blocks=1500, block_size=200, step_ms=20)
+    assert len(data) > 4 * TAIL_SIZE
+    assert probe_audio(io.BytesIO(data)).duration is None
+    assert probe_audio(io.BytesIO(data), full_scan=True).duration == 29.98
+
+# === MP4 FRAGMENTADO ===
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload) + 8) + box_type + payload
+
+def _full_box(box_type: bytes, flags: int, payload: bytes) -> bytes:
+    return _box(box_type, struct.pack(">I", flags) + payload)
+
+def _fragmented_mp4(fragments: int, samples: int, sample_duration: int, timescale: int = 48000) -> bytes:
+    mp4a = struct.pack(">I4s6xH8xHHHHI", 36, b"mp4a", 1, 1, 16, 0, 0, timescale << 16)
+    stbl = _box(b"stbl", _full_box(b"stsd", 0, struct.pack(">I", 1) + mp4a))
+    mdia = _box(b"mdia", (
+        _full_box(b"mdhd", 0, struct.pack(">IIII", 0, 0, timescale, 0) + bytes(4))
+        + _box(b"minf", stbl)
+    ))
+    trak = _box(b"trak", _full_box(b"tkhd", 0, struct.pack(">III", 0, 0, 1) + bytes(68)) + mdia)
+    moov = _box(b"moov", (
+        _full_box(b"mvhd", 0, struct.pack(">IIII", 0, 0, 1000, 0) + bytes(80))
+        + trak
+        + _box(b"mvex", _full_box(b"trex", 0, struct.pack(">IIIII", 1, 1, sample_duration, 0, 0)))
+    ))
+    data = _box(b"ftyp", b"iso6" + bytes(4)) + moov
+    for index in range(fragments):
+        if index % 2:
+            # Duración por muestra en el trun (flag 0x100)
+            trun = _full_box(b"trun", 0x100, struct.pack(">I", samples) + struct.pack(">I", sample_duration) * samples)
+        else:
+            # Duración por defecto de trex
+            trun = _full_box(b"trun", 0, struct.pack(">I", samples))
+        traf = _box(b"traf", _full_box(b"tfhd", 0x020000, struct.pack(">I", 1)) + trun)
+        data += _box(b"moof", _full_box(b"mfhd", 0, struct.pack(">I", index + 1)) + traf)
+        data += _box(b"mdat", bytes(samples * 10))
+    return data
+
+def test_fragmented_mp4_duration():
+    data = _fragmented_mp4(fragments=10, samples=50, sample_duration=960)
+    meta = probe_audio(io.BytesIO(data))
+    assert (meta.container, meta.codec, meta.sample_rate) == ("mp4", "aac", 48000)
+    assert meta.duration == 10.0
+    assert meta.suffix == ".m4a"
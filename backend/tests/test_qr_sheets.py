@@ -0,0 +1,103 @@
+import asyncio
+import re
+import zlib
+
+import pytest
+
+from app.services import qr_sheets
+from app.services.qr_sheets import PAGE_SIZES, PdfStreamWriter, stream_sheet_pdf
+
+
+def _xref(pdf: bytes):
+    """Tabla xref del PDF: {número de objeto: offset}"""
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref\n")
+    header = re.match(rb"xref\n0 (\d+)\n", pdf[startxref:])
+    size = int(header.group(1))
+    table = pdf[startxref + header.end():]
+    # Cada entrada mide exactamente 20 bytes
+    entries = [table[i * 20:(i + 1) * 20] for i in range(size)]
+    assert entries[0] == b"0000000000 65535 f \n"
+    offsets = {}
+    for number, entry in enumerate(entries[1:], start=1):
+        assert re.fullmatch(rb"\d{10} 00000 n \n", entry)
+        offsets[number] = int(entry[:10])
+    assert re.search(rf"trailer\n<< /Size {size} /Root 1 0 R >>".encode(), pdf)
+    return offsets
+
+
+def _assert_offsets(pdf: bytes) -> None:
+    for number, offset in _xref(pdf).items():
+        assert pdf[offset:].startswith(f"{number} 0 obj\n".encode()), number
+
+
+def _write(pages, page_size="a4"):
+    writer = PdfStreamWriter(PAGE_SIZES[page_size])
+    chunks = [writer.header()]
+    chunks += [writer.page(width, height, data) for width, height, data in pages]
+    chunks.append(writer.trailer())
+    return b"".join(chunks)
+
+
+def test_xref_offsets_point_at_objects():
+    # Datos binarios con secuencias que parecen sintaxis PDF
+    pages = [
+        (2, 2, zlib.compress(bytes([0, 1, 2, 3]))),
+        (1, 1, b"\nendobj\n1 0 obj\n\xff\x00"),
+        (3, 1, zlib.compress(b"\x05" * 3)),
+    ]
+    pdf = _write(pages)
+    assert pdf.startswith(b"%PDF-1.4\n")
+    _assert_offsets(pdf)
+    assert len(_xref(pdf)) == 2 + 3 * len(pages)
+
+
+def test_page_tree_and_stream_lengths():
+    pdf = _write([(4, 4, b"abc"), (4, 4, b"defg")])
+    assert re.search(rb"/Type /Pages /Kids \[5 0 R 8 0 R\] /Count 2", pdf)
+    assert pdf.count(b"/Parent 2 0 R") == 2
+    for match in re.finditer(rb"/Length (\d+) >>\nstream\n", pdf):
+        length = int(match.group(1))
+        assert pdf[match.end() + length:].startswith(b"\nendstream")
+
+
+def test_empty_document():
+    pdf = _write([])
+    _assert_offsets(pdf)
+    assert b"/Kids [] /Count 0" in pdf
+
+
+def test_stream_sheet_pdf(monkeypatch):
+    async def run_inline(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(qr_sheets, "run_in_process", run_inline)
+    cards = [
+        (f"https://example.org/story/{index}", f"Relato {index}", "Juana Mamani", "Achacachi")
+        for index in range(5)
+    ]
+
+    async def collect():
+        return [chunk async for chunk in stream_sheet_pdf(cards, per_page=2, max_in_flight=2)]
+
+    pdf = b"".join(asyncio.run(collect()))
+    _assert_offsets(pdf)
+    assert b"/Count 3" in pdf
+
+    # Cada imagen se descomprime al tamaño declarado (1 byte por píxel)
+    images = re.finditer(rb"/Width (\d+) /Height (\d+) .*?/Length (\d+) >>\nstream\n", pdf)
+    count = 0
+    for match in images:
+        width, height, length = map(int, match.groups())
+        data = zlib.decompress(pdf[match.end():match.end() + length])
+        assert len(data) == width * height
+        count += 1
+    assert count == 3
+
+
+@pytest.mark.parametrize("page_size", sorted(PAGE_SIZES))
+def test_media_box(page_size):
+    width, height = PAGE_SIZES[page_size]
+    pdf = _write([(10, 10, b"x")], page_size)
+    assert f"/MediaBox [0 0 {width:.2f} {height:.2f}]".encode() in pdf
+    _assert_offsets(pdf)
@@ -0,0 +1,180 @@
+import os
+from email.utils import formatdate
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.responses import MediaFileResponse, parse_range
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / "audio.webm"
+    path.write_bytes(CONTENT)
+    stat_result = os.stat(path)
+
+    async def endpoint(request: Request):
+        return MediaFileResponse(str(path), stat_result, request.headers, media_type="audio/webm")
+
+    app = Starlette(routes=[Route("/audio", endpoint, methods=["GET", "HEAD"])])
+    client = TestClient(app)
+    full = client.get("/audio")
+    return client, full.headers["etag"], full.headers["last-modified"], stat_result
+
+
+# === parse_range ===
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=-10", (1014, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("items=0-10", None),
+    ("bytes=0-1,5-6", None),
+    ("bytes=5", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=20-10", "bytes=a-b", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1024)
+
+
+# === Rangos ===
+
+def test_full_response(media):
+    client, etag, _, _ = media
+    response = client.get("/audio")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == "1024"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "audio/webm"
+    assert etag.startswith('"')
+
+
+def test_range_response(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.headers["content-length"] == "10"
+
+
+def test_suffix_range(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=-4"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-4:]
+    assert response.headers["content-range"] == "bytes 1020-1023/1024"
+
+
+def test_range_read_in_several_chunks(media, monkeypatch):
+    client, *_ = media
+    monkeypatch.setattr(MediaFileResponse, "chunk_size", 100)
+    response = client.get("/audio", headers={"Range": "bytes=50-849"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[50:850]
+
+
+def test_unsatisfiable_range(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert response.content == b""
+
+
+def test_multirange_returns_full_file(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=0-1,5-6"})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_head_has_length_without_body(media):
+    client, *_ = media
+    response = client.head("/audio", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+# === GET condicional ===
+
+def test_if_none_match(media):
+    client, etag, *_ = media
+    response = client.get("/audio", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert "content-type" not in response.headers
+
+
+@pytest.mark.parametrize("header", ['"other", {etag}', "W/{etag}", "*"])
+def test_if_none_match_variants(media, header):
+    client, etag, *_ = media
+    response = client.get("/audio", headers={"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+
+
+def test_if_none_match_mismatch(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(media):
+    client, _, last_modified, _ = media
+    response = client.get("/audio", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+
+def test_if_modified_since(media):
+    client, _, last_modified, stat_result = media
+    assert client.get("/audio", headers={"If-Modified-Since": last_modified}).status_code == 304
+    older = formatdate(stat_result.st_mtime - 3600, usegmt=True)
+    assert client.get("/audio", headers={"If-Modified-Since": older}).status_code == 200
+    assert client.get("/audio", headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+
+# === If-Range ===
+
+def test_if_range_matching_etag(media):
+    client, etag, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+
+def test_if_range_stale_etag_returns_full_file(media):
+    client, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_range_requires_strong_etag(media):
+    client, etag, *_ = media
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": f"W/{etag}"})
+    assert response.status_code == 200
+
+
+def test_if_range_date(media):
+    client, _, last_modified, stat_result = media
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": last_modified})
+    assert response.status_code == 206
+    older = formatdate(stat_result.st_mtime - 3600, usegmt=True)
+    response = client.get("/audio", headers={"Range": "bytes=0-9", "If-Range": older})
+    assert response.status_code == 200
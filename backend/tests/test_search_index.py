@@ -0,0 +1,99 @@
+import pytest
+
+from app.services.search_index import (
+    APOSTROPHES, SearchIndex, fold, highlight, stem, term_for, tokenize,
+)
+
+# === TOKENIZACIÓN ===
+
+def test_fold_removes_accents_and_case():
+    assert fold("Ñusta Achachilä ÁÉÍÓÚ") == "nusta achachila aeiou"
+
+@pytest.mark.parametrize("apostrophe", list(APOSTROPHES))
+def test_fold_unifies_apostrophes(apostrophe):
+    assert fold(f"Waxt{apostrophe}a") == "waxt'a"
+    assert tokenize(f"la waxt{apostrophe}a") == ["waxt'a"]
+
+def test_stem_strips_stacked_suffixes():
+    assert stem("achachilanakaxa") == "achachila"
+    assert stem("qullqinakampi") == "qullqi"
+    assert term_for("ACHACHILANAKAXA") == "achachila"
+
+def test_stem_keeps_min_length():
+    # Quitar "xa" dejaría una raíz de 3 letras
+    assert stem("utaxa") == "utaxa"
+
+def test_term_for_drops_stopwords_and_short_words():
+    assert term_for("De") is None
+    assert term_for("ukat") is None
+    assert term_for("y") is None
+    assert tokenize("Uka q'uwa, de la pampa") == ["q'uwa", "pampa"]
+
+# === FRAGMENTOS ===
+
+def test_highlight_escapes_html():
+    snippet = highlight("<b>Achachila</b> & q'uwa", {"achachila"})
+    assert snippet == "&lt;b&gt;<mark>Achachila</mark>&lt;/b&gt; &amp; q'uwa"
+
+def test_highlight_without_match():
+    assert highlight("nada que ver", {"achachila"}) is None
+    assert highlight("", {"achachila"}) is None
+
+def test_highlight_cuts_at_word_boundaries():
+    text = " ".join(f"palabra{index}" for index in range(60)) + " achachila " + \
+        " ".join(f"final{index}" for index in range(60))
+    snippet = highlight(text, {"achachila"}, width=80)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>achachila</mark>" in snippet
+    # Sin palabras cortadas a los lados
+    words = snippet.strip("…").split(" ")
+    assert all(word in text.split(" ") for word in words if "mark" not in word)
+    assert len(snippet) <= 80 + len("<mark></mark>") + 2
+
+# === ÍNDICE ===
+
+def _story(title, description="", status="published"):
+    return {"title": title, "description": description, "status": status}
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.update("a", _story("Achachila del Illimani", "Relato de los abuelos"))
+    index.update("b", _story("La pampa", "Los achachilanakaxa cuidan la pampa"))
+    index.update("c", _story("Q'uwa", "Ofrenda para la Pachamama"))
+    return index
+
+def test_search_ranks_title_matches_first(index):
+    total, results, terms = index.search("achachila")
+    assert terms == {"achachila"}
+    assert total == 2
+    assert [story_id for story_id, _ in results] == ["a", "b"]
+    assert results[0][1] > results[1][1] > 0
+
+def test_search_ignores_accents_and_apostrophes(index):
+    assert [story_id for story_id, _ in index.search("Q’UWA")[1]] == ["c"]
+
+def test_search_pagination(index):
+    for number in range(30):
+        index.update(f"p{number:02d}", _story(f"Pampa {number}", "pampa " * (number % 5)))
+    total, first, _ = index.search("pampa", offset=0, limit=10)
+    _, second, _ = index.search("pampa", offset=10, limit=10)
+    _, everything, _ = index.search("pampa", offset=0, limit=100)
+    assert total == 31 == len(everything)
+    assert first + second == everything[:20]
+    assert index.search("pampa", offset=40, limit=10)[1] == []
+
+def test_search_without_terms(index):
+    assert index.search("de la y") == (0, [], set())
+
+def test_update_and_remove(index):
+    index.update("a", _story("Otra historia"))
+    assert [story_id for story_id, _ in index.search("achachila")[1]] == ["b"]
+    # Archivar quita el relato del índice
+    index.update("b", _story("La pampa", "Los achachilanakaxa", status="archived"))
+    assert index.search("achachila")[0] == 0
+    index.remove("c")
+    assert index.search("q'uwa")[0] == 0
+    assert set(index.doc_terms) == {"a"}
+    assert index.total_length == sum(index.doc_lengths.values())
+    assert all(set(docs) <= {"a"} for docs in index.postings.values())